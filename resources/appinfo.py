@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Leitura do cache binário appcache/appinfo.vdf da Steam
+
+from .utils import *
+from .nonsteam import NonSteam
+
+import array
+import bisect
+import io
+import mmap
+import os
+import struct
+import xbmcaddon
+
+# Versões conhecidas do appinfo.vdf (magic) e o tamanho do cabeçalho de cada entrada
+# após os campos appid/size: infoState, last_updated, access_token, sha1, change_number
+# e, a partir da v28, o sha1 da seção binária.
+APPINFO_MAGIC_V27 = 0x07564427
+APPINFO_MAGIC_V28 = 0x07564428
+APPINFO_MAGIC_V29 = 0x07564429
+APPINFO_ENTRY_HEADER = {
+    APPINFO_MAGIC_V27: 40,
+    APPINFO_MAGIC_V28: 60,
+    APPINFO_MAGIC_V29: 60,
+}
+
+APPINFO_INDEX_MAGIC = b'SGAI'
+APPINFO_INDEX_VERSION = 1
+
+
+class AppInfo:
+    """
+    Leitor preguiçoso do appinfo.vdf. O arquivo é mapeado em memória (mmap) e um índice
+    appid -> (offset, tamanho) é construído em uma única passada. O índice é persistido em
+    addon_data e reaproveitado enquanto o tamanho e o mtime do arquivo não mudarem, então
+    as seções de cada app só são decodificadas quando pedidas.
+    """
+
+    def __init__(self, vdf_path=None, index_path=None):
+        self.vdf_path = vdf_path or self.get_appinfo_path()
+        self.index_path = index_path or os.path.join(get_addon_data_dir(), 'appinfo.idx')
+        self._file = None
+        self._mm = None
+        self._magic = None
+        self._keys = None
+        self._appids = None
+        self._offsets = None
+        self._sizes = None
+
+    @staticmethod
+    def get_appinfo_path():
+        """
+        Obtém o caminho do appinfo.vdf a partir das configurações. Se não estiver configurado,
+        assume que fica em appcache, ao lado da pasta librarycache.
+        """
+        addon = xbmcaddon.Addon(id='plugin.program.steamgames')
+        appinfo_vdf = addon.getSetting('appinfo_vdf')
+        if appinfo_vdf:
+            return appinfo_vdf
+        library_cache = addon.getSetting('library_cache')
+        if not library_cache:
+            return ""
+        return os.path.join(os.path.dirname(os.path.normpath(library_cache)), 'appinfo.vdf')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        if self._mm is not None:
+            return True
+        if not self.vdf_path or not os.path.exists(self.vdf_path):
+            return False
+        self._file = open(self.vdf_path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._magic = struct.unpack_from('<I', self._mm, 0)[0]
+        if self._magic not in APPINFO_ENTRY_HEADER:
+            self.close()
+            raise ValueError("Versão do appinfo.vdf não suportada")
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._keys = None
+
+    def _file_signature(self):
+        stat = os.stat(self.vdf_path)
+        return stat.st_size, int(stat.st_mtime)
+
+    def _build_index(self):
+        """
+        Percorre o arquivo uma única vez, pulando as seções pelo campo de tamanho,
+        e guarda apenas appid, offset e tamanho de cada entrada.
+        """
+        mm = self._mm
+        pos = 16 if self._magic == APPINFO_MAGIC_V29 else 8
+        entries = []
+        end = len(mm)
+        while pos + 4 <= end:
+            appid = struct.unpack_from('<I', mm, pos)[0]
+            if appid == 0:
+                break
+            size = struct.unpack_from('<I', mm, pos + 4)[0]
+            entries.append((appid, pos + 8, size))
+            pos += 8 + size
+
+        entries.sort()
+        self._appids = array.array('I', (e[0] for e in entries))
+        self._offsets = array.array('Q', (e[1] for e in entries))
+        self._sizes = array.array('I', (e[2] for e in entries))
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, version, size, mtime, count = struct.unpack('<4sIQqI', f.read(28))
+                if magic != APPINFO_INDEX_MAGIC or version != APPINFO_INDEX_VERSION:
+                    return False
+                if (size, mtime) != self._file_signature():
+                    return False
+                self._appids = array.array('I')
+                self._offsets = array.array('Q')
+                self._sizes = array.array('I')
+                self._appids.fromfile(f, count)
+                self._offsets.fromfile(f, count)
+                self._sizes.fromfile(f, count)
+            return True
+        except (OSError, EOFError, struct.error):
+            self._appids = self._offsets = self._sizes = None
+            return False
+
+    def _save_index(self):
+        try:
+            directory = os.path.dirname(self.index_path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            size, mtime = self._file_signature()
+            header = struct.pack('<4sIQqI', APPINFO_INDEX_MAGIC, APPINFO_INDEX_VERSION, size, mtime, len(self._appids))
+            write_file_atomic(self.index_path, header + self._appids.tobytes() + self._offsets.tobytes()
+                              + self._sizes.tobytes())
+        except OSError as e:
+            kodi_log(f"Falha ao salvar o índice do appinfo.vdf: {str(e)}")
+
+    def _load_key_table(self):
+        """
+        Na v29 os nomes das chaves ficam numa tabela de strings no fim do arquivo.
+        """
+        if self._keys is not None or self._magic != APPINFO_MAGIC_V29:
+            return
+        mm = self._mm
+        pos = struct.unpack_from('<q', mm, 8)[0]
+        count = struct.unpack_from('<I', mm, pos)[0]
+        pos += 4
+        keys = []
+        for _ in range(count):
+            end = mm.find(b'\x00', pos)
+            raw = mm[pos:end]
+            try:
+                keys.append(raw.decode('utf8'))
+            except UnicodeDecodeError:
+                keys.append(raw.decode('latin1'))
+            pos = end + 1
+        self._keys = keys
+
+    def appids(self):
+        if not self.open():
+            return []
+        return list(self._appids)
+
+    def __contains__(self, appid):
+        if not self.open():
+            return False
+        appid = int(appid)
+        i = bisect.bisect_left(self._appids, appid)
+        return i < len(self._appids) and self._appids[i] == appid
+
+    def get(self, appid):
+        """
+        Decodifica e retorna a seção de um app, ou None se o appid não estiver no arquivo.
+        """
+        if not self.open():
+            return None
+        try:
+            appid = int(appid)
+        except (TypeError, ValueError):
+            return None
+        i = bisect.bisect_left(self._appids, appid)
+        if i >= len(self._appids) or self._appids[i] != appid:
+            return None
+
+        self._load_key_table()
+        start = self._offsets[i] + APPINFO_ENTRY_HEADER[self._magic]
+        end = self._offsets[i] + self._sizes[i]
+        infile = io.BufferedReader(io.BytesIO(self._mm[start:end]))
+        data = NonSteam._read_dict(infile, self._keys)
+        return data.get('appinfo', data)
+
+    def get_common(self, appid):
+        """
+        Retorna apenas o bloco 'common' (name, type, genres, hashes de assets...) de um app.
+        """
+        data = self.get(appid)
+        if not data:
+            return {}
+        return data.get('common', {})
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Cópias reduzidas das artes para as listagens
+
+from .utils import *
+from .imageprobe import probe_image_header
+from .cachemanager import CacheManager
+
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import xbmcaddon
+import xbmcvfs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ART_CACHE_MANIFEST = '_art_cache.json'
+ART_CACHE_WORKERS = 4
+ART_CACHE_JPEG_QUALITY = 85
+
+# Tamanho máximo (largura, altura) das cópias de cada campo de arte
+SLOT_MAX_SIZE = {
+    'capsule': (400, 600),
+    'hero': (1280, 720),
+    'banner': (1280, 720),
+    'logo': (400, 200),
+}
+
+_manifest_lock = threading.Lock()
+
+
+def _downscale(source, dest, max_size):
+    """
+    Gera a cópia reduzida de `source` em `dest`. Roda nos workers do pool, por isso é uma
+    função de módulo. Retorna True se a cópia foi gravada.
+    """
+    try:
+        with Image.open(source) as image:
+            if image.format == 'JPEG':
+                # Decodifica o JPEG já em escala reduzida
+                image.draft('RGB', max_size)
+            image.thumbnail(max_size, Image.LANCZOS)
+            # A cópia é montada em memória e gravada com write_file_atomic: um temporário de
+            # nome único, então duas gerações da mesma cópia não escrevem no mesmo arquivo
+            data = io.BytesIO()
+            if dest.endswith('.png'):
+                image.save(data, 'PNG', optimize=True)
+            else:
+                image.convert('RGB').save(data, 'JPEG', quality=ART_CACHE_JPEG_QUALITY, optimize=True)
+        write_file_atomic(dest, data.getvalue())
+        return True
+    except Exception:
+        return False
+
+
+def _create_executor():
+    """
+    Usa processos quando o interpretador é um Python comum. Dentro do Kodi sys.executable é o
+    próprio Kodi (iniciar processos abriria outra instância), então o pool usa threads; o
+    Pillow libera o GIL durante a decodificação e o redimensionamento.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        try:
+            return ProcessPoolExecutor(max_workers=ART_CACHE_WORKERS)
+        except (OSError, ImportError, NotImplementedError):
+            pass
+    return ThreadPoolExecutor(max_workers=ART_CACHE_WORKERS)
+
+
+def to_special_path(file_path):
+    return file_path.replace(xbmcvfs.translatePath('special://userdata/'), 'special://userdata/')
+
+
+class ArtCache:
+    """
+    Mantém em assets/art_cache/ cópias reduzidas das artes do catálogo, por campo. O manifesto
+    registra mtime e tamanho da origem de cada cópia para não refazê-la sem necessidade.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        addon_data = get_addon_data_dir()
+        self.cache_dir = os.path.join(addon_data, 'assets', 'art_cache')
+        self.manifest_path = os.path.join(addon_data, ART_CACHE_MANIFEST)
+        self.manifest = self._load()
+        self.updates = {}
+        self.cache_manager = CacheManager()
+
+    def _load(self):
+        return load_json(self.manifest_path, {})
+
+    def _count(self, name, value=1):
+        if self.metrics:
+            self.metrics.add(name, value)
+
+    def _record(self, key, stat, dest):
+        entry = [int(stat.st_mtime), stat.st_size, dest]
+        self.manifest[key] = entry
+        self.updates[key] = entry
+
+    def process(self, catalog, dialog_progress=None):
+        """
+        Aponta os campos de arte do catálogo para as cópias reduzidas, gerando as que faltam.
+        Imagens que não puderem ser processadas continuam com o arquivo original.
+        """
+        references = []
+        resolved = {}
+        jobs = {}
+
+        for game in catalog.values():
+            for slot, max_size in SLOT_MAX_SIZE.items():
+                path = game.get(slot)
+                if not path:
+                    continue
+                source = xbmcvfs.translatePath(path)
+                key = f"{max_size[0]}x{max_size[1]}|{source}"
+                references.append((game, slot, key))
+                if key in resolved or key in jobs:
+                    continue
+
+                try:
+                    stat = os.stat(source)
+                except OSError:
+                    resolved[key] = None
+                    continue
+
+                entry = self.manifest.get(key)
+                if entry and entry[:2] == [int(stat.st_mtime), stat.st_size] and \
+                        (entry[2] is None or os.path.exists(xbmcvfs.translatePath(entry[2]))):
+                    resolved[key] = entry[2]
+                    self._count("art_cache_hits")
+                    if entry[2]:
+                        self.cache_manager.touch('art', entry[2])
+                    continue
+
+                # Imagens que já cabem no tamanho do campo são usadas como estão
+                info = probe_image_header(source)
+                if info and info[1] <= max_size[0] and info[2] <= max_size[1]:
+                    self._record(key, stat, None)
+                    resolved[key] = None
+                    continue
+
+                ext = '.png' if os.path.splitext(source)[1].lower() in ('.png', '.gif') else '.jpg'
+                dest = os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest()[:20] + ext)
+                jobs[key] = (source, dest, max_size, stat)
+
+        if jobs:
+            self.cache_manager.count('art', misses=len(jobs))
+            resolved.update(self._run_jobs(jobs, dialog_progress))
+
+        for game, slot, key in references:
+            if resolved.get(key):
+                game[slot] = resolved[key]
+
+        self.save()
+
+    def _run_jobs(self, jobs, dialog_progress):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        results = {}
+        executor = _create_executor()
+        try:
+            futures = {
+                executor.submit(_downscale, source, dest, max_size): key
+                for key, (source, dest, max_size, stat) in jobs.items()
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                key = futures[future]
+                source, dest, max_size, stat = jobs[key]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    # Falha do pool, não da imagem: tenta de novo na próxima sincronização
+                    kodi_log(f"Falha no pool de redução de artes: {str(e)}")
+                    results[key] = None
+                    ok = None
+                if ok:
+                    results[key] = to_special_path(dest)
+                    self._count("art_downscaled")
+                    self._record(key, stat, results[key])
+                    self.cache_manager.record('art', dest)
+                elif ok is False:
+                    results[key] = None
+                    self._count("art_downscale_failed")
+                    kodi_log(f"Não foi possível reduzir a arte, usando a original: {source}")
+                    self._record(key, stat, None)
+
+                if dialog_progress:
+                    dialog_progress.update(int(done / len(jobs) * 100), f"Reduzindo artes: {done} de {len(jobs)}")
+                    if dialog_progress.iscanceled():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+        finally:
+            executor.shutdown(wait=True)
+        return results
+
+    def save(self):
+        """
+        Grava as novas entradas do manifesto, mesclando com as de outras etapas.
+        """
+        self.cache_manager.save()
+        if not self.updates:
+            return
+        with _manifest_lock:
+            manifest = self._load()
+            manifest.update(self.updates)
+            try:
+                write_file_atomic(self.manifest_path, json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+            except OSError as e:
+                kodi_log(f"Falha ao salvar o manifesto das artes reduzidas: {str(e)}")
+        self.updates = {}
+
+
+def downscale_catalog_art(catalog, metrics=None, dialog_progress=None):
+    """
+    Etapa opcional após a sincronização: troca as artes grandes do catálogo por cópias
+    reduzidas. Não faz nada se a opção estiver desligada ou se o Pillow não estiver disponível.
+    """
+    if xbmcaddon.Addon().getSetting('downscale_art') != 'true':
+        return
+    if Image is None:
+        kodi_log("Pillow não disponível: artes mantidas no tamanho original.")
+        return
+    if metrics:
+        with metrics.phase("art_downscale"):
+            ArtCache(metrics).process(catalog, dialog_progress)
+    else:
+        ArtCache().process(catalog, dialog_progress)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Índice dos diretórios de arte (library_cache, grid)
+
+import os
+import threading
+import xbmcvfs
+
+_dir_index = {}
+_dir_index_lock = threading.Lock()
+
+
+def get_dir_index(directory):
+    """
+    Retorna o conjunto de nomes de arquivos de um diretório, lendo-o apenas uma vez por
+    invocação do plugin. Sincronizações de vários perfis que compartilham o mesmo diretório
+    (ex.: library_cache) reaproveitam a mesma leitura.
+    """
+    directory = os.path.normcase(os.path.normpath(xbmcvfs.translatePath(directory)))
+    with _dir_index_lock:
+        names = _dir_index.get(directory)
+        if names is None:
+            names = set()
+            if os.path.isdir(directory):
+                with os.scandir(directory) as entries:
+                    names = {os.path.normcase(entry.name) for entry in entries}
+            _dir_index[directory] = names
+    return names
+
+
+def art_exists(directory, file_name):
+    """
+    Verifica se o arquivo existe no diretório usando o índice, sem acessar o disco.
+    """
+    if not directory:
+        return False
+    return os.path.normcase(file_name) in get_dir_index(directory)
+
+
+def clear_dir_index():
+    with _dir_index_lock:
+        _dir_index.clear()
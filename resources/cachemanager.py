@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+# Limite de espaço dos caches em addon_data, com remoção dos menos usados (LRU)
+
+from .utils import *
+from .synclock import SyncLock
+from .pathroots import ART_FIELDS, from_rooted
+
+import json
+import os
+import threading
+import time
+import uuid
+import xbmc
+import xbmcaddon
+import xbmcvfs
+
+CACHE_INDEX_FILE = '_cache_index.json'
+# Acessos registrados pelas listagens, juntados ao índice no próximo save()
+CACHE_ACCESS_LOG = '_cache_access.log'
+MB = 1024 * 1024
+
+# Categorias de cache: pastas ou arquivos (relativos a addon_data) e limite em MB, com a
+# configuração que o substitui, quando houver
+CACHE_CATEGORIES = {
+    'art': {'dirs': ['assets/art_cache'], 'files': [], 'setting': 'art_cache_budget', 'budget': 192},
+    'probe': {'dirs': [], 'files': ['_image_probe_cache.json'], 'setting': None, 'budget': 8},
+    'cprofiles': {'dirs': ['cprofiles'], 'files': [], 'setting': None, 'budget': 16},
+    'routes': {'dirs': ['_routes'], 'files': [], 'setting': None, 'budget': 16},
+}
+CACHE_DEFAULT_BUDGET = 256
+
+_index_lock = threading.Lock()
+
+
+def _read_access_log(path):
+    """
+    Linhas [categoria, chave, acesso, acerto, tamanho] do log de acessos; linhas incompletas
+    (gravação interrompida) são ignoradas.
+    """
+    accesses = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    accesses.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return accesses
+
+
+def _apply_accesses(index, accesses):
+    for category, key, accessed, hit, size in accesses:
+        stored = index["entries"].setdefault(category, {})
+        counters = index["counters"].setdefault(category, [0, 0, 0])
+        counters[0 if hit else 1] += 1
+        if size is not None:
+            stored[key] = [size, accessed]
+        elif key in stored:
+            stored[key][1] = max(stored[key][1], accessed)
+
+
+def _setting_mb(addon, setting_id, default):
+    try:
+        return int(addon.getSetting(setting_id) or default) * MB
+    except ValueError:
+        return default * MB
+
+
+def get_cache_budgets():
+    """
+    Retorna ({categoria: limite em bytes}, limite global em bytes).
+    """
+    addon = xbmcaddon.Addon()
+    budgets = {}
+    for category, spec in CACHE_CATEGORIES.items():
+        budgets[category] = _setting_mb(addon, spec['setting'], spec['budget']) if spec['setting'] \
+            else spec['budget'] * MB
+    return budgets, _setting_mb(addon, 'cache_budget', CACHE_DEFAULT_BUDGET)
+
+
+class CacheManager:
+    """
+    Índice compacto (_cache_index.json) com o tamanho e o último acesso de cada arquivo de
+    cache, por categoria, mais os contadores de acertos, falhas e remoções. As etapas que
+    gravam ou reaproveitam um cache chamam record()/touch()/count() e save() no final; a
+    remoção dos excedentes fica com evict(), que roda fora das listagens.
+    """
+
+    def __init__(self):
+        self.base_dir = get_addon_data_dir()
+        self.index_path = os.path.join(self.base_dir, CACHE_INDEX_FILE)
+        self.access_log_path = os.path.join(self.base_dir, CACHE_ACCESS_LOG)
+        self.updates = {}
+        self.removed = {}
+        self.counters = {}
+        self.evicted_at = None
+
+    def _load(self):
+        index = load_json(self.index_path, {})
+        index.setdefault("entries", {})
+        index.setdefault("counters", {})
+        return index
+
+    def _key(self, path):
+        path = xbmcvfs.translatePath(path)
+        return os.path.relpath(path, self.base_dir).replace(os.sep, '/')
+
+    def _add_counter(self, category, position, value):
+        counters = self.counters.setdefault(category, [0, 0, 0])
+        counters[position] += value
+
+    def record(self, category, path):
+        """
+        Registra (ou atualiza) um arquivo recém-gravado no cache.
+        """
+        try:
+            size = os.path.getsize(xbmcvfs.translatePath(path))
+        except OSError:
+            return
+        self.updates.setdefault(category, {})[self._key(path)] = [size, int(time.time())]
+
+    def touch(self, category, path):
+        """
+        Marca um acerto de cache, renovando o último acesso do arquivo.
+        """
+        self._add_counter(category, 0, 1)
+        self.updates.setdefault(category, {})[self._key(path)] = [None, int(time.time())]
+
+    def count(self, category, hits=0, misses=0):
+        self._add_counter(category, 0, hits)
+        self._add_counter(category, 1, misses)
+
+    def log_access(self, category, path, hit):
+        """
+        Registra um acerto (ou, com hit=False, um arquivo recém-gravado) sem regravar o índice:
+        uma linha acrescentada a CACHE_ACCESS_LOG, juntada ao índice no próximo save(). Usado
+        pelas listagens, em que regravar o índice a cada acesso custaria mais que o cache.
+        """
+        size = None
+        if not hit:
+            try:
+                size = os.path.getsize(xbmcvfs.translatePath(path))
+            except OSError:
+                return
+        line = json.dumps([category, self._key(path), int(time.time()), hit, size], separators=(',', ':'))
+        try:
+            with open(self.access_log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            kodi_log(f"Falha ao registrar o acesso ao cache: {str(e)}")
+
+    def _take_access_log(self):
+        """
+        Retira o log de acessos (renomeado, para que as novas linhas vão para outro arquivo) e
+        retorna (acessos, caminho do arquivo retirado).
+        """
+        taken_path = f"{self.access_log_path}.{uuid.uuid4().hex}"
+        try:
+            os.replace(self.access_log_path, taken_path)
+        except OSError:
+            return [], None
+        return _read_access_log(taken_path), taken_path
+
+    def save(self):
+        """
+        Aplica as alterações pendentes ao índice gravado, mesclando com as de outras etapas.
+        """
+        if not (self.updates or self.removed or self.counters or self.evicted_at or
+                os.path.exists(self.access_log_path)):
+            return
+        with _index_lock:
+            accesses, taken_path = self._take_access_log()
+            index = self._load()
+            _apply_accesses(index, accesses)
+            for category, entries in self.updates.items():
+                stored = index["entries"].setdefault(category, {})
+                for key, (size, accessed) in entries.items():
+                    if size is None:
+                        if key not in stored:
+                            continue
+                        size = stored[key][0]
+                    stored[key] = [size, accessed]
+            for category, keys in self.removed.items():
+                stored = index["entries"].get(category, {})
+                for key in keys:
+                    stored.pop(key, None)
+            for category, values in self.counters.items():
+                stored = index["counters"].setdefault(category, [0, 0, 0])
+                for position, value in enumerate(values):
+                    stored[position] += value
+            if self.evicted_at:
+                index["evicted_at"] = self.evicted_at
+            try:
+                if not os.path.isdir(self.base_dir):
+                    os.makedirs(self.base_dir)
+                write_file_atomic(self.index_path, json.dumps(index, separators=(',', ':')).encode('utf-8'))
+                if taken_path:
+                    os.remove(taken_path)
+            except OSError as e:
+                kodi_log(f"Falha ao salvar o índice dos caches: {str(e)}")
+        self.updates = {}
+        self.removed = {}
+        self.counters = {}
+        self.evicted_at = None
+
+    def _scan(self, category):
+        """
+        Arquivos da categoria em disco: {chave: (tamanho, mtime)}. Pega também os arquivos
+        gravados antes de existir o índice.
+        """
+        spec = CACHE_CATEGORIES[category]
+        found = {}
+        paths = [os.path.join(self.base_dir, name) for name in spec['files']]
+        for directory in spec['dirs']:
+            directory = os.path.join(self.base_dir, directory)
+            if os.path.isdir(directory):
+                paths += [os.path.join(directory, name) for name in os.listdir(directory)
+                          if not name.endswith('.tmp')]
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path):
+                found[self._key(path)] = (stat.st_size, int(stat.st_mtime))
+        return found
+
+    def _referenced(self):
+        """
+        Chaves das artes reduzidas para as quais os catálogos gravados apontam. Essas cópias
+        não são removidas, senão a listagem ficaria sem a arte até a próxima sincronização.
+        As demais (de jogos que saíram do catálogo ou de artes trocadas) são refeitas sob demanda.
+        """
+        referenced = set()
+        for file_name in load_catalog_versions(self.base_dir):
+            data = load_json(os.path.join(self.base_dir, file_name), None)
+            if not isinstance(data, dict):
+                continue
+            roots = data.get("roots") or {}
+            for kind, catalog in data.items():
+                if kind in ("roots", "rejected_roots") or not isinstance(catalog, dict):
+                    continue
+                for game in catalog.values():
+                    for field in ART_FIELDS:
+                        value = game.get(field) if isinstance(game, dict) else None
+                        if isinstance(value, str) and 'art_cache' in value:
+                            referenced.add(self._key(from_rooted(value, roots)))
+        return referenced
+
+    def _remove(self, category, key):
+        try:
+            os.remove(os.path.join(self.base_dir, key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            kodi_log(f"Falha ao remover o cache {key}: {str(e)}")
+            return False
+        self.removed.setdefault(category, []).append(key)
+        self._add_counter(category, 2, 1)
+        return True
+
+    def evict(self, monitor=None):
+        """
+        Remove os arquivos de acesso mais antigo até cada categoria caber no seu limite e o
+        total caber no limite global. Artes reduzidas usadas pelos catálogos atuais nunca são
+        removidas (ver _referenced). Retorna o número de arquivos removidos.
+        """
+        budgets, global_budget = get_cache_budgets()
+        # Junta antes os acessos das listagens, que renovam o último acesso dos arquivos
+        self.save()
+        stored = self._load()["entries"]
+        entries = {}
+        for category in CACHE_CATEGORIES:
+            known = stored.get(category, {})
+            on_disk = self._scan(category)
+            # Arquivos que sumiram saem do índice; os não registrados entram com o mtime
+            self.removed[category] = [key for key in known if key not in on_disk]
+            entries[category] = {key: [size, known[key][1] if key in known else mtime]
+                                 for key, (size, mtime) in on_disk.items()}
+            self.updates[category] = {key: value for key, value in entries[category].items()
+                                      if key not in known or known[key][0] != value[0]}
+
+        referenced = self._referenced()
+        evicted = 0
+        totals = {category: sum(size for size, _ in items.values()) for category, items in entries.items()}
+        for category, items in entries.items():
+            for key, (size, _) in sorted(items.items(), key=lambda item: item[1][1]):
+                if totals[category] <= budgets[category] or (monitor and monitor.abortRequested()):
+                    break
+                if key not in referenced and self._remove(category, key):
+                    totals[category] -= size
+                    del items[key]
+                    evicted += 1
+
+        # Limite global: o menos usado entre todas as categorias
+        oldest = sorted(((accessed, category, key, size) for category, items in entries.items()
+                         for key, (size, accessed) in items.items()))
+        total = sum(totals.values())
+        for accessed, category, key, size in oldest:
+            if total <= global_budget or (monitor and monitor.abortRequested()):
+                break
+            if key not in referenced and self._remove(category, key):
+                total -= size
+                evicted += 1
+
+        self.evicted_at = int(time.time())
+        self.save()
+        if evicted:
+            kodi_log(f"Caches: {evicted} arquivos removidos ({total // 1024} KB em uso)")
+        return evicted
+
+
+def _run_eviction():
+    lock = SyncLock("cache")
+    if not lock.acquire():
+        # Outra invocação já está limpando
+        return
+    status = "error"
+    try:
+        CacheManager().evict(xbmc.Monitor())
+        status = "ok"
+    except Exception as e:
+        kodi_log(f"Falha ao limitar os caches: {str(e)}")
+    finally:
+        lock.release(status)
+
+
+def schedule_cache_eviction():
+    """
+    Inicia a limpeza dos caches em uma thread, depois das sincronizações, para não atrasar
+    as listagens. A thread não é daemon, então a invocação do plugin espera ela terminar.
+    """
+    thread = threading.Thread(target=_run_eviction, name="steamgames-cache-eviction")
+    thread.start()
+    return thread
+
+
+def load_cache_stats():
+    """
+    Retorna {categoria: {"size", "files", "budget", "hits", "misses", "evictions"}} e a data
+    da última limpeza, a partir do índice.
+    """
+    path = get_addon_data_dir()
+    index = load_json(os.path.join(path, CACHE_INDEX_FILE), {})
+    index.setdefault("entries", {})
+    index.setdefault("counters", {})
+    _apply_accesses(index, _read_access_log(os.path.join(path, CACHE_ACCESS_LOG)))
+    budgets, global_budget = get_cache_budgets()
+    stats = {}
+    for category in CACHE_CATEGORIES:
+        entries = index.get("entries", {}).get(category, {})
+        hits, misses, evictions = index.get("counters", {}).get(category, [0, 0, 0])
+        stats[category] = {
+            "size": sum(size for size, _ in entries.values()),
+            "files": len(entries),
+            "budget": budgets[category],
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+        }
+    return stats, global_budget, index.get("evicted_at", 0)
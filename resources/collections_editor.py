@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Sessão de edição das coleções (tags) do shortcuts.json
+
+from .utils import write_file_atomic
+
+import json
+
+
+class CollectionsSession:
+    """
+    Mantém o shortcuts.json em memória durante a edição das coleções.
+    O arquivo é lido uma única vez, a lista ordenada de jogos é montada uma vez e as edições
+    são acumuladas até o commit, que grava o arquivo uma única vez. Edições ainda não
+    gravadas podem ser desfeitas.
+    """
+
+    def __init__(self, json_path):
+        self.json_path = json_path
+        with open(json_path, 'r', encoding='utf-8') as file:
+            self.data = json.load(file)
+        self.keys = list(self.data.keys())
+        self._history = []
+
+    @property
+    def dirty(self):
+        return bool(self._history)
+
+    def options(self):
+        """
+        Monta a lista de opções (nome: tags) na ordem do arquivo.
+        """
+        return [f"{name}: {', '.join(self.data[name])}" for name in self.keys]
+
+    def games_at(self, indices):
+        return [self.keys[i] for i in indices]
+
+    def combined_tags(self, games):
+        """
+        Retorna as tags dos jogos informados, sem repetição e na ordem em que aparecem.
+        """
+        return list(dict.fromkeys(tag for game in games for tag in self.data[game]))
+
+    def set_tags(self, games, tags):
+        """
+        Substitui as tags dos jogos informados, guardando os valores anteriores para desfazer.
+        """
+        self._history.append({game: self.data[game] for game in games})
+        for game in games:
+            self.data[game] = list(tags)
+
+    def undo(self):
+        """
+        Desfaz a última edição ainda não gravada. Retorna False se não houver o que desfazer.
+        """
+        if not self._history:
+            return False
+        for game, tags in self._history.pop().items():
+            self.data[game] = tags
+        return True
+
+    def rollback(self):
+        while self.undo():
+            pass
+
+    def commit(self):
+        """
+        Grava todas as edições pendentes de uma só vez.
+        """
+        if not self._history:
+            return False
+        write_file_atomic(self.json_path, json.dumps(self.data, ensure_ascii=False, indent=2).encode('utf-8'))
+        self._history = []
+        return True
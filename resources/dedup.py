@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# Detecção de jogos duplicados entre os catálogos Steam e Non-Steam
+
+from .utils import *
+from .pathroots import ART_FIELDS, SHARED_ART, load_rooted_catalog, root_catalogs
+from .synclock import CATALOGS_LOCK, run_exclusive
+
+import contextlib
+import re
+import unicodedata
+import xbmcaddon
+
+# Valores da configuração duplicate_rule
+RULE_PREFER_STEAM = 0   # Esconde o atalho e junta as tags/artes dele na entrada Steam
+RULE_KEEP_BOTH = 1      # Mantém as duas entradas, com as mesmas artes
+RULE_HIDE_SHORTCUT = 2  # Apenas esconde o atalho
+
+# Campos derivados, refeitos a cada passada: as tags e artes juntadas de duplicados ficam
+# separadas das do próprio jogo, que continuam sendo as da Steam / do shortcuts.vdf
+MERGED_TAGS = "merged_tags"     # [tag, ...] que o jogo não tem
+# SHARED_ART ({campo: caminho}) fica em pathroots, que também resolve esses caminhos
+
+
+def get_duplicate_rule():
+    try:
+        return int(xbmcaddon.Addon().getSetting('duplicate_rule') or RULE_PREFER_STEAM)
+    except ValueError:
+        return RULE_PREFER_STEAM
+
+
+def normalize_name(name):
+    """
+    Chave de comparação do nome: sem acentos, símbolos (™, ®, :) e diferenças de caixa/espaços.
+    """
+    name = re.sub('[\u2122\u00ae\u00a9]', '', str(name or ''))
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return " ".join(re.sub(r'[^a-z0-9]+', ' ', name.lower()).split())
+
+
+def _shortcut_appid(game):
+    """
+    Appid Steam para o qual o atalho aponta, quando o .url resolveu um id curto (ex.: 730).
+    Os ids de atalho (rungameid) são sempre maiores que 32 bits.
+    """
+    appid = str(game.get("appid", ""))
+    return appid if appid.isdigit() and int(appid) < 1 << 32 else None
+
+
+def _merge_tags(target, tags):
+    if not isinstance(tags, dict) or not tags:
+        return
+    own = target.get("tags")
+    existing = set(own.values()) if isinstance(own, dict) else set()
+    merged = target.setdefault(MERGED_TAGS, [])
+    for tag in tags.values():
+        if tag not in existing and tag not in merged:
+            merged.append(tag)
+    if not merged:
+        del target[MERGED_TAGS]
+
+
+def _share_art(target, source):
+    """
+    Artes de `source` para os campos que faltam em `target`, sem resolvê-las de novo.
+    """
+    shared = target.get(SHARED_ART, {})
+    for field in ART_FIELDS:
+        if not target.get(field) and not shared.get(field) and source.get(field):
+            shared[field] = source[field]
+    if shared:
+        target[SHARED_ART] = shared
+
+
+def with_merged(game):
+    """
+    O jogo como aparece nas listagens, widgets e estatísticas: com as tags e artes juntadas
+    de duplicados. Retorna o próprio jogo quando não há nada juntado.
+    """
+    merged_tags = game.get(MERGED_TAGS)
+    shared_art = game.get(SHARED_ART)
+    if not merged_tags and not shared_art:
+        return game
+    view = dict(game, **(shared_art or {}))
+    view.pop(MERGED_TAGS, None)
+    view.pop(SHARED_ART, None)
+    if merged_tags:
+        tags = game.get("tags")
+        view["tags"] = dict(tags) if isinstance(tags, dict) else ({"0": tags} if tags else {})
+        index = 0
+        for tag in merged_tags:
+            if tag in view["tags"].values():
+                continue
+            while str(index) in view["tags"]:
+                index += 1
+            view["tags"][str(index)] = tag
+    return view
+
+
+def is_visible(game):
+    return not game.get("duplicate_of")
+
+
+def index_steam_games(steam_catalog):
+    """
+    Índices dos jogos Steam por appid e por nome normalizado, para find_steam_game.
+    """
+    by_appid = {}
+    by_name = {}
+    for game in (steam_catalog or {}).values():
+        by_appid.setdefault(str(game.get("appid")), game)
+        by_name.setdefault(normalize_name(game.get("appName")), game)
+    return by_appid, by_name
+
+
+def find_steam_game(steam_index, game, name_key=None):
+    """
+    Jogo Steam do qual o atalho `game` é duplicado (pelo appid do .url ou pelo nome), ou None.
+    """
+    by_appid, by_name = steam_index
+    name_key = normalize_name(game.get("appName")) if name_key is None else name_key
+    return by_appid.get(_shortcut_appid(game)) or (by_name.get(name_key) if name_key else None)
+
+
+def merge_duplicates(steam_catalog, non_steam_catalog, rule=None):
+    """
+    Passada linear sobre os dois catálogos (dicionários id -> jogo), indexando os jogos Steam
+    por appid e por nome normalizado. Atalhos duplicados recebem "duplicate_of" e deixam de
+    aparecer nas listagens, conforme a regra; nada é removido do catálogo, e o que é juntado
+    fica só nos campos derivados (MERGED_TAGS, SHARED_ART), para que a passada possa ser
+    refeita quando a regra ou um dos catálogos mudar.
+    Retorna o número de duplicados encontrados.
+    """
+    rule = get_duplicate_rule() if rule is None else rule
+    for game in [*(steam_catalog or {}).values(), *(non_steam_catalog or {}).values()]:
+        game.pop(MERGED_TAGS, None)
+        game.pop(SHARED_ART, None)
+
+    steam_index = index_steam_games(steam_catalog)
+
+    shortcuts_by_id = {}
+    shortcuts_by_name = {}
+    duplicates = 0
+    for game in (non_steam_catalog or {}).values():
+        game.pop("duplicate_of", None)
+        name_key = normalize_name(game.get("appName"))
+        appid = str(game.get("appid", ""))
+
+        steam_game = find_steam_game(steam_index, game, name_key)
+        if steam_game:
+            duplicates += 1
+            if rule == RULE_KEEP_BOTH:
+                shared = {field: steam_game[field] for field in ART_FIELDS if steam_game.get(field)}
+                if shared:
+                    game[SHARED_ART] = shared
+                continue
+            game["duplicate_of"] = f"steam:{steam_game.get('appid')}"
+            if rule == RULE_PREFER_STEAM:
+                _merge_tags(steam_game, game.get("tags"))
+                _share_art(steam_game, game)
+            continue
+
+        # O mesmo atalho repetido no shortcuts.vdf
+        first = (appid and shortcuts_by_id.get(appid)) or (name_key and shortcuts_by_name.get(name_key))
+        if first and rule != RULE_KEEP_BOTH:
+            duplicates += 1
+            game["duplicate_of"] = f"non_steam:{first.get('appid')}"
+            if rule == RULE_PREFER_STEAM:
+                _merge_tags(first, game.get("tags"))
+                _share_art(first, game)
+            continue
+        if appid:
+            shortcuts_by_id.setdefault(appid, game)
+        if name_key:
+            shortcuts_by_name.setdefault(name_key, game)
+
+    return duplicates
+
+
+def load_catalog_file(path, file_name, kind):
+    """
+    Lê um catálogo gravado (dicionário id -> jogo, com os caminhos das artes completos), ou
+    None se ele não existir.
+    """
+    return load_rooted_catalog(path, file_name, kind)[0]
+
+
+def dedupe_catalogs(path, catalogs, file_names, metrics=None):
+    """
+    Aplica merge_duplicates aos catálogos de uma sincronização. O catálogo que não foi
+    sincronizado agora é lido do disco e devolvido junto, pois a passada pode alterá-lo
+    (tags e artes juntadas). Retorna {arquivo: {tipo: catálogo}} pronto para save_catalogs.
+    """
+    catalogs = dict(catalogs)
+    for kind in ("steam", "non_steam"):
+        if kind not in catalogs:
+            loaded = load_catalog_file(path, file_names[kind], kind)
+            if loaded is not None:
+                catalogs[kind] = loaded
+
+    duplicates = merge_duplicates(catalogs.get("steam"), catalogs.get("non_steam"))
+    if metrics:
+        metrics.add("duplicates", duplicates)
+    return {file_names[kind]: {kind: catalog} for kind, catalog in catalogs.items()}
+
+
+def commit_catalogs(path, catalogs, file_names, roots, metrics=None):
+    """
+    dedupe_catalogs seguido de save_catalogs, com a trava CATALOGS_LOCK. O catálogo que não
+    foi sincronizado agora é lido já com a trava, então uma sincronização nunca grava por cima
+    do catálogo recém-gravado pela outra. Retorna (catálogos, bytes gravados por arquivo),
+    como dedupe_catalogs e save_catalogs.
+    """
+    result = {}
+
+    def commit():
+        with metrics.phase("dedup") if metrics else contextlib.nullcontext():
+            result["catalogs"] = dedupe_catalogs(path, catalogs, file_names, metrics)
+        with metrics.phase("serialization") if metrics else contextlib.nullcontext():
+            result["written"] = save_catalogs(path, root_catalogs(result["catalogs"], roots))
+
+    if run_exclusive([CATALOGS_LOCK], commit) == "timeout":
+        raise OSError("Tempo esgotado aguardando a gravação dos catálogos")
+    return result["catalogs"], result["written"]
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# Validação das artes lendo apenas o cabeçalho das imagens
+
+from .utils import *
+from .cachemanager import CacheManager
+
+import json
+import math
+import os
+import struct
+import threading
+import xbmcaddon
+import xbmcvfs
+
+IMAGE_PROBE_CACHE_FILE = '_image_probe_cache.json'
+IMAGE_HEADER_SIZE = 512
+# Trecho final procurado pelo marcador de fim (FFD9 / IEND); alguns editores gravam
+# preenchimento ou metadados depois dele
+IMAGE_TRAILER_SIZE = 4096
+# Muda quando a validação muda, descartando os resultados gravados pela versão anterior
+IMAGE_PROBE_VERSION = 2
+
+# Proporção (largura / altura) esperada para cada campo de arte do catálogo
+SLOT_ASPECT = {
+    'capsule': 2 / 3,        # poster
+    'hero': 16 / 9,          # fanart
+    'banner': 758 / 140,     # banner do Kodi
+    'header': 460 / 215,
+}
+
+EXTENSION_FORMATS = {
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.png': 'png',
+    '.gif': 'gif',
+    '.bmp': 'bmp',
+    '.webp': 'webp',
+}
+
+_cache_lock = threading.Lock()
+
+
+def _probe_jpeg(f, size):
+    """
+    Percorre os segmentos do JPEG até o marcador SOF, lendo só os cabeçalhos dos segmentos.
+    """
+    pos = 2
+    while pos + 9 < size:
+        f.seek(pos)
+        segment = f.read(9)
+        if len(segment) < 4 or segment[0] != 0xFF:
+            return None
+        marker = segment[1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        length = struct.unpack('>H', segment[2:4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if len(segment) < 9:
+                return None
+            height, width = struct.unpack('>HH', segment[5:9])
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def probe_image_header(path):
+    """
+    Identifica formato e dimensões de uma imagem lendo apenas o início (e o trecho final,
+    para detectar arquivos truncados). Retorna (formato, largura, altura) ou None se o
+    arquivo estiver vazio, truncado ou não for uma imagem conhecida.
+    """
+    try:
+        size = os.path.getsize(path)
+        if size < 24:
+            return None
+        with open(path, 'rb') as f:
+            header = f.read(IMAGE_HEADER_SIZE)
+
+            if header[:8] == b'\x89PNG\r\n\x1a\n' and header[12:16] == b'IHDR':
+                width, height = struct.unpack('>II', header[16:24])
+                f.seek(-min(size, IMAGE_TRAILER_SIZE), os.SEEK_END)
+                if b'IEND' not in f.read():
+                    return None
+                return 'png', width, height
+
+            if header[:3] == b'\xff\xd8\xff':
+                dimensions = _probe_jpeg(f, size)
+                if not dimensions:
+                    return None
+                f.seek(-min(size, IMAGE_TRAILER_SIZE), os.SEEK_END)
+                if b'\xff\xd9' not in f.read():
+                    return None
+                return ('jpeg',) + dimensions
+
+            if header[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', header[6:10])
+                return 'gif', width, height
+
+            if header[:2] == b'BM':
+                width, height = struct.unpack('<ii', header[18:26])
+                return 'bmp', width, abs(height)
+
+            if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+                chunk = header[12:16]
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', header[26:30])
+                    return 'webp', width & 0x3FFF, height & 0x3FFF
+                if chunk == b'VP8L':
+                    bits = struct.unpack('<I', header[21:25])[0]
+                    return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b'VP8X':
+                    width = int.from_bytes(header[24:27], 'little') + 1
+                    height = int.from_bytes(header[27:30], 'little') + 1
+                    return 'webp', width, height
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+class ImageProber:
+    """
+    Valida as artes candidatas e escolhe a melhor para cada campo pela proporção.
+    Os resultados ficam em cache em addon_data, indexados por caminho + mtime + tamanho.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.cache_path = os.path.join(get_addon_data_dir(), IMAGE_PROBE_CACHE_FILE)
+        self.cache = self._load()
+        self.updates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        cache = load_json(self.cache_path, {})
+        return cache if cache.get("_version") == IMAGE_PROBE_VERSION else {}
+
+    def probe(self, path):
+        """
+        Retorna (formato, largura, altura) da imagem, ou None se ela for inválida.
+        """
+        real_path = xbmcvfs.translatePath(path)
+        try:
+            stat = os.stat(real_path)
+        except OSError:
+            return None
+
+        key = [int(stat.st_mtime), stat.st_size]
+        cached = self.cache.get(real_path)
+        hit = bool(cached) and cached[:2] == key
+        if self.metrics:
+            self.metrics.cache("image_probe", hit)
+        if hit:
+            self.hits += 1
+            info = tuple(cached[2]) if cached[2] else None
+            if not info and self.metrics:
+                self.metrics.add("art_rejected")
+            return info
+
+        self.misses += 1
+        info = probe_image_header(real_path)
+        if info:
+            expected = EXTENSION_FORMATS.get(os.path.splitext(real_path)[1].lower())
+            if expected and expected != info[0]:
+                kodi_log(f"Arte com extensão incorreta ignorada: {real_path} ({info[0]})")
+                info = None
+        if not info and self.metrics:
+            self.metrics.add("art_rejected")
+        entry = key + [list(info) if info else None]
+        self.cache[real_path] = entry
+        self.updates[real_path] = entry
+        return info
+
+    def choose(self, paths, slot):
+        """
+        Escolhe, entre os candidatos válidos, o de proporção mais próxima da esperada para o
+        campo. Em caso de empate vale a ordem dos candidatos (prioridade original).
+        """
+        best_path = None
+        best_score = None
+        target = SLOT_ASPECT.get(slot)
+        for path in paths:
+            info = self.probe(path)
+            if not info or not info[1] or not info[2]:
+                continue
+            if target is None:
+                return path
+            score = abs(math.log((info[1] / info[2]) / target))
+            if best_score is None or score < best_score - 1e-6:
+                best_path, best_score = path, score
+        return best_path
+
+    def save(self):
+        """
+        Grava as novas entradas, mesclando com o que outras etapas já tenham gravado.
+        """
+        cache_manager = CacheManager()
+        cache_manager.count('probe', self.hits, self.misses)
+        self.hits = self.misses = 0
+        if self.updates:
+            with _cache_lock:
+                cache = self._load()
+                cache.update(self.updates)
+                cache["_version"] = IMAGE_PROBE_VERSION
+                try:
+                    write_file_atomic(self.cache_path, json.dumps(cache, separators=(',', ':')).encode('utf-8'))
+                except OSError as e:
+                    kodi_log(f"Falha ao salvar o cache de imagens: {str(e)}")
+            self.updates = {}
+        cache_manager.record('probe', self.cache_path)
+        cache_manager.save()
+
+
+def get_image_prober(metrics=None):
+    """
+    Retorna um ImageProber, ou None se a validação das artes estiver desativada.
+    """
+    if xbmcaddon.Addon().getSetting('validate_art') == 'false':
+        return None
+    return ImageProber(metrics)
+
+
+def pick_art(prober, paths, slot):
+    """
+    Escolhe a arte do campo entre os candidatos (em ordem de prioridade). Sem validação,
+    mantém o comportamento original: o primeiro candidato encontrado.
+    """
+    if prober is None:
+        return paths[0] if paths else None
+    return prober.choose(paths, slot)
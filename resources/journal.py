@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Diário de checkpoints das sincronizações, para retomar execuções interrompidas
+
+from .utils import *
+
+import json
+import os
+import time
+
+SYNC_JOURNAL_BATCH = 50
+# Diários mais antigos que isso são descartados: as artes podem ter mudado desde então
+SYNC_JOURNAL_MAX_AGE = 24 * 3600
+
+
+class SyncJournal:
+    """
+    Registra em addon_data (_sync_<origem>.journal, uma linha JSON por lote) os jogos já
+    processados por uma sincronização. Se ela for cancelada ou o Kodi for fechado, a próxima
+    execução reaproveita os jogos do último lote gravado em vez de processá-los de novo.
+    """
+
+    def __init__(self, source, fingerprint):
+        path = get_addon_data_dir()
+        self.path = os.path.join(path, f'_sync_{source}.journal')
+        self.fingerprint = str(fingerprint)
+        self.done = {}
+        self.pending = {}
+        self.resumed = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get("fingerprint") != self.fingerprint or \
+                        time.time() - header.get("started", 0) > SYNC_JOURNAL_MAX_AGE:
+                    raise ValueError("diário de outra sincronização")
+                for line in f:
+                    try:
+                        self.done.update(json.loads(line))
+                    except ValueError:
+                        # Último lote incompleto (gravação interrompida)
+                        break
+        except (OSError, ValueError):
+            self.done = {}
+            self.discard()
+            return
+        if self.done:
+            kodi_log(f"Retomando sincronização: {len(self.done)} jogos já processados em {self.path}")
+
+    def get(self, key, signature):
+        """
+        Resultado gravado para `key`, se a entrada de origem (signature) não mudou.
+        """
+        entry = self.done.get(str(key))
+        if entry and entry[0] == signature:
+            self.resumed += 1
+            return entry[1]
+        return None
+
+    def add(self, key, signature, result):
+        self.pending[str(key)] = [signature, result]
+        if len(self.pending) >= SYNC_JOURNAL_BATCH:
+            self.flush()
+
+    def flush(self):
+        """
+        Grava o lote pendente. A linha é escrita de uma vez, então um lote só conta depois de
+        gravado por inteiro.
+        """
+        if not self.pending:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write(json.dumps({"fingerprint": self.fingerprint, "started": int(time.time())}) + "\n")
+                f.write(json.dumps(self.pending, ensure_ascii=False, separators=(',', ':')) + "\n")
+        except OSError as e:
+            kodi_log(f"Falha ao gravar o diário da sincronização: {str(e)}")
+            return
+        self.done.update(self.pending)
+        self.pending = {}
+
+    def discard(self):
+        """
+        Remove o diário depois que o catálogo completo foi gravado.
+        """
+        self.pending = {}
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def merge_partial_catalog(previous, partial):
+    """
+    Junta os jogos concluídos por uma sincronização cancelada ao catálogo gravado antes:
+    jogos processados substituem os de mesmo appid e os novos entram no final; os que a
+    sincronização não alcançou ficam como estavam. Retorna um novo catálogo.
+    """
+    games = list((previous or {}).values())
+    position = {str(game.get("appid")): index for index, game in enumerate(games)}
+    for game in partial.values():
+        key = str(game.get("appid"))
+        if key in position:
+            games[position[key]] = game
+        else:
+            position[key] = len(games)
+            games.append(game)
+    return {str(index): game for index, game in enumerate(games)}
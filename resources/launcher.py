@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# Execução dos jogos através do cliente Steam
+
+from .utils import *
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import xbmcaddon
+
+STEAM_EXE_DEFAULTS = {
+    'windows': "C:\\Program Files (x86)\\Steam\\steam.exe",
+    'linux': "steam",
+    'macos': "/Applications/Steam.app/Contents/MacOS/steam_osx",
+}
+
+LAUNCH_LOG_MAX_LINES = 200
+
+
+class GameLauncher:
+    """
+    Inicia jogos via steam://rungameid/ sem bloquear o plugin.
+    Se o cliente Steam já estiver em execução, a URL é entregue ao handler do sistema, que
+    repassa o pedido à instância ativa. Caso contrário o executável da Steam configurado para
+    o sistema operacional é iniciado desacoplado do processo do Kodi.
+    `steam_running` força o resultado de is_steam_running() (True/False), por exemplo para
+    iniciar um executável de teste numa máquina em que a Steam está aberta.
+    """
+
+    def __init__(self, steam_exe=None, log_path=None, steam_running=None):
+        self.platform = self.get_platform()
+        self.steam_exe = steam_exe or self.get_steam_exe(self.platform)
+        self.steam_running = steam_running
+        self.log_path = log_path or os.path.join(get_addon_data_dir(), 'launch_times.log')
+
+    @staticmethod
+    def get_platform():
+        if sys.platform.startswith('win'):
+            return 'windows'
+        if sys.platform == 'darwin':
+            return 'macos'
+        return 'linux'
+
+    @staticmethod
+    def get_steam_exe(platform):
+        """
+        Obtém o executável da Steam configurado para o sistema operacional atual.
+        """
+        steam_exe = xbmcaddon.Addon(id='plugin.program.steamgames').getSetting(f'steam_exe_{platform}')
+        return steam_exe or STEAM_EXE_DEFAULTS[platform]
+
+    def is_steam_running(self):
+        """
+        Verifica se há um cliente Steam ativo para receber a URL.
+        """
+        if self.steam_running is not None:
+            return self.steam_running
+        if self.platform == 'windows':
+            try:
+                import winreg
+                with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam\ActiveProcess") as key:
+                    pid, _ = winreg.QueryValueEx(key, "pid")
+                    return bool(pid)
+            except OSError:
+                return False
+
+        pid_file = os.path.expanduser(os.path.join('~', '.steam', 'steam.pid'))
+        try:
+            with open(pid_file, 'r') as f:
+                pid = int(f.read().strip())
+            os.kill(pid, 0)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def build_command(self, url):
+        """
+        Monta o comando (sem shell) que entrega a URL à Steam.
+        Retorna a tupla (modo, comando).
+        """
+        if self.is_steam_running():
+            if self.platform == 'windows':
+                return 'handoff', None
+            opener = 'open' if self.platform == 'macos' else shutil.which('xdg-open')
+            if opener:
+                return 'handoff', [opener, url]
+        return 'exec', [self.steam_exe, url]
+
+    @staticmethod
+    def popen_detached(command):
+        kwargs = {
+            'stdin': subprocess.DEVNULL,
+            'stdout': subprocess.DEVNULL,
+            'stderr': subprocess.DEVNULL,
+            'close_fds': True,
+        }
+        if sys.platform.startswith('win'):
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            kwargs['cwd'] = os.path.dirname(command[0]) or None
+        else:
+            kwargs['start_new_session'] = True
+        return subprocess.Popen(command, **kwargs)
+
+    def launch(self, appid):
+        """
+        Inicia o jogo e retorna imediatamente, registrando o tempo até o retorno da chamada.
+        """
+        url = f"steam://rungameid/{appid}"
+        start = time.perf_counter()
+        mode, command = self.build_command(url)
+
+        kodi_log(f"Executando ({mode}): {command or url}")
+        if command is None:
+            os.startfile(url)
+        else:
+            self.popen_detached(command)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.record_timing(appid, mode, elapsed_ms)
+        return elapsed_ms
+
+    def record_timing(self, appid, mode, elapsed_ms):
+        """
+        Acrescenta o tempo de retorno da execução ao log, mantendo apenas as últimas entradas.
+        """
+        entry = json.dumps({
+            "time": int(time.time()),
+            "appid": str(appid),
+            "mode": mode,
+            "elapsed_ms": round(elapsed_ms, 2),
+        }, separators=(',', ':'))
+        kodi_log(f"Tempo de execução: {entry}")
+
+        try:
+            lines = []
+            if os.path.exists(self.log_path):
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+            lines.append(entry)
+            write_file_atomic(self.log_path, ('\n'.join(lines[-LAUNCH_LOG_MAX_LINES:]) + '\n').encode('utf-8'))
+        except OSError as e:
+            kodi_log(f"Falha ao gravar o log de execução: {str(e)}")
@@ -5,6 +5,20 @@
 from .utils import *
 from .steam import *
 from .nonsteam import NonSteam
+from .launcher import GameLauncher
+from .collections_editor import CollectionsSession
+from .metrics import SyncMetrics, load_sync_history
+from .profiler import profile_call
+from .widgets import get_widget_items, update_widgets
+from .playtime import load_history, get_weekly_totals, get_game_trends, format_playtime
+from .stats import load_library_stats, source_label
+from .synclock import run_coalesced, run_exclusive
+from .syncall import SyncAll, SyncProfiles
+from .journal import SyncJournal
+from .cachemanager import schedule_cache_eviction, load_cache_stats
+from .pathroots import get_path_roots, load_rooted_catalog
+from .dedup import with_merged
+from .routecache import get_route_key, load_route, save_route, invalidate_route_cache
 
 import os
 import json
@@ -23,17 +37,35 @@ class Main:
         # Inicializa as configurações e módulos
         self.settings = PluginSettings()
         self.non_steam = NonSteam() 
-        self.steam_games_path = "special://userdata/addon_data/plugin.program.steamgames/steam_games.json"
-        self.non_steam_games_path = "special://userdata/addon_data/plugin.program.steamgames/non_steam_games.json"
-        self.json_dir = xbmcvfs.translatePath('special://userdata/addon_data/plugin.program.steamgames/')
+        self.steam_games_path = ADDON_DATA_PATH + "steam_games.json"
+        self.non_steam_games_path = ADDON_DATA_PATH + "non_steam_games.json"
+        self.json_dir = get_addon_data_dir()
+        self.profile_filter = self.settings.listing_profile
 
     def run_plugin(self, args):
         """
-        Ponto de entrada do plugin. Gerencia as ações baseadas nos argumentos.
+        Ponto de entrada do plugin. Com &cprofile=1 na URL (ou a opção de perfil ativa nas
+        configurações) a rota é executada sob o cProfile.
+        """
+        query = args[2] if len(args) > 2 else ""
+        params = parse_qs(query[1:]) if query.startswith("?") else {}
+        if self.settings.cprofile or params.get('cprofile', [''])[0] == '1':
+            return profile_call(self.route, args, route=query, keep=self.settings.cprofile_keep)
+        return self.route(args)
+
+    def route(self, args):
+        """
+        Gerencia as ações baseadas nos argumentos.
         """
         params = parse_qs(args[2][1:]) if len(args) > 2 and "?" in args[2] else {}
         action = params.get('action', ['list'])[0]
         tag = params.get('tag', [None])[0]
+
+        # Perfil exibido nas listagens, &account=N (0 = todos os perfis, sem jogos repetidos)
+        try:
+            self.profile_filter = int(params.get('account', [self.settings.listing_profile])[0] or 0)
+        except ValueError:
+            self.profile_filter = 0
         
         steam_games_json = os.path.join(self.json_dir, "steam_games.json")
         
@@ -44,8 +76,16 @@ class Main:
         if action == 'sync_steam_games':
             self.sync_steam_games()
 
+        elif action == 'sync_all':
+            self.sync_all()
+            kodi_refresh_container()
+
+        elif action == 'sync_profiles':
+            self.sync_profiles()
+            kodi_refresh_container()
+
         elif action == 'sync_nonsteam_games':
-            self.non_steam.sync_non_steam_games()  # Chama a função de sincronização de jogos Non-Steam
+            self.sync_non_steam_games()  # Chama a função de sincronização de jogos Non-Steam
             kodi_refresh_container()
         
         elif action == "play":
@@ -68,14 +108,48 @@ class Main:
         elif action == 'list_games_by_tag':
             if tag:
                 self.show_games_by_tag(tag) 
+
+        elif action == 'sync_stats':
+            self.show_sync_stats()
+
+        elif action == 'widget':
+            self.show_widget(params.get('type', ['recently_played'])[0])
+
+        elif action == 'playtime_trends':
+            self.show_playtime_trends(params.get('appid', [None])[0])
+
+        elif action == 'stats':
+            self.show_library_stats()
         
         else:
             self.show_games_by_tags()                
              
+    def get_context_menu(self):
+        """
+        Menu de contexto comum a todos os itens do plugin.
+        """
+        return [
+            ("Atualizar Tudo",              f"RunPlugin(plugin://plugin.program.steamgames?action=sync_all)"),
+            ("Atualizar Todos os Perfis",   f"RunPlugin(plugin://plugin.program.steamgames?action=sync_profiles)"),
+            ("Atualizar Jogos Steam",       f"RunPlugin(plugin://plugin.program.steamgames?action=sync_steam_games)"),
+            ("Atualizar Jogos Non-Steam",   f"RunPlugin(plugin://plugin.program.steamgames?action=sync_nonsteam_games)"),
+            ("Atualizar Collections",       f"RunPlugin(plugin://plugin.program.steamgames?action=collections)"),
+            ("Estatísticas de Sincronização", f"Container.Update(plugin://plugin.program.steamgames?action=sync_stats)"),
+            ("Tempo de Jogo por Semana",    f"Container.Update(plugin://plugin.program.steamgames?action=playtime_trends)"),
+            ("Estatísticas da Biblioteca",  f"Container.Update(plugin://plugin.program.steamgames?action=stats)"),
+            ('Settings',                    f'RunPlugin(plugin://plugin.program.steamgames?action=settings)')
+        ]
+
+    def get_profile_query(self):
+        return f"&account={self.profile_filter}" if self.profile_filter else ""
+
     def show_all_games(self):
         """
         Lista todos os jogos Steam e Non-Steam em uma única tela.
         """
+        self.show_cached_route("list_all_games", self.build_all_games_items)
+
+    def build_all_games_items(self):
         steam_games = self.load_steam_games()  # Carrega jogos Steam
         nonsteam_games = self.load_non_steam_games()  # Carrega jogos Non-Steam
 
@@ -92,7 +166,7 @@ class Main:
                     "poster": game.get("capsule", ""),
                     "clearlogo": game.get("logo", ""),
                     "fanart": game.get("hero", ""),
-                    "banner": game.get("hero", ""),
+                    "banner": game.get("banner") or game.get("hero", ""),
                     "tags": []
                 } for game in steam_games
             ])
@@ -115,74 +189,117 @@ class Main:
         # Ordena os jogos em ordem alfabética pelo nome
         all_games = sorted(all_games, key=lambda game: game["appName"].lower())
 
-        # Renderiza cada jogo no Kodi
-        for game in all_games:
-            list_item = xbmcgui.ListItem(label=game["appName"])
-            list_item.setArt({
-                "icon": xbmcvfs.translatePath(game["icon"]),
-                "poster": xbmcvfs.translatePath(game["poster"]),
-                "clearlogo": xbmcvfs.translatePath(game["clearlogo"]),
-                "fanart": xbmcvfs.translatePath(game["fanart"]),
-                "banner": xbmcvfs.translatePath(game["banner"]) if game["banner"] else ""
-            })
-            
-            list_item.setInfo("video", {
-                "title": game["appName"],
-                "genre": ", ".join(game["tags"]),
-                "plot": f"Origem: {game['source']}"
-            })
-            
-            # Adiciona o menu de contexto
-            context_menu = [
-                ("Atualizar Jogos Steam",       f"RunPlugin(plugin://plugin.program.steamgames?action=sync_steam_games)"),
-                ("Atualizar Jogos Non-Steam",   f"RunPlugin(plugin://plugin.program.steamgames?action=sync_nonsteam_games)"),
-                ("Atualizar Collections",       f"RunPlugin(plugin://plugin.program.steamgames?action=collections)"),
-                ('Settings',                    f'RunPlugin(plugin://plugin.program.steamgames?action=settings)')
-            ]
+        return [
+            {
+                "label": game["appName"],
+                "art": {
+                    "icon": xbmcvfs.translatePath(game["icon"]),
+                    "poster": xbmcvfs.translatePath(game["poster"]),
+                    "clearlogo": xbmcvfs.translatePath(game["clearlogo"]),
+                    "fanart": xbmcvfs.translatePath(game["fanart"]),
+                    "banner": xbmcvfs.translatePath(game["banner"]) if game["banner"] else ""
+                },
+                "info": {
+                    "title": game["appName"],
+                    "genre": ", ".join(game["tags"]),
+                    "plot": f"Origem: {game['source']}"
+                },
+                # URL para executar o jogo
+                "url": f"plugin://plugin.program.steamgames/?action=play&appid={game['appid']}",
+                "isFolder": False
+            } for game in all_games
+        ]
+
+    def show_cached_route(self, route, build, *args):
+        """
+        Exibe a listagem da rota a partir do cache (routecache), montando-a com build(*args)
+        quando não houver uma versão válida para os catálogos e configurações atuais.
+        """
+        profiles = self.get_listing_profiles()
+        catalog_files = [file_name for profile in profiles
+                         for file_name in (profile.steam_catalog, profile.non_steam_catalog)]
+        # As raízes entram na chave para que uma pasta movida passe pelo load_catalog (rebase)
+        settings = [self.profile_filter, [get_path_roots(profile.steam_grid) for profile in profiles]]
+        key = get_route_key(catalog_files, settings)
+        route = f"{route}{self.get_profile_query()}"
+
+        items = load_route(route, key)
+        if items is None:
+            items = build(*args)
+            save_route(route, key, items)
+        self.render_items(items)
+
+    def render_items(self, items):
+        """
+        Entrega ao Kodi os itens já montados ({label, art, info, url, isFolder}).
+        """
+        handle = int(sys.argv[1])
+        context_menu = self.get_context_menu()
+        for item in items:
+            list_item = xbmcgui.ListItem(label=item["label"])
+            list_item.setArt(item["art"])
+            list_item.setInfo("video", item["info"])
             list_item.addContextMenuItems(context_menu)
-
-            # URL para executar o jogo
-            url = f"plugin://plugin.program.steamgames/?action=play&appid={game['appid']}"
-            xbmcplugin.addDirectoryItem(
-                handle=int(sys.argv[1]),
-                url=url,
-                listitem=list_item,
-                isFolder=False
-            )
+            xbmcplugin.addDirectoryItem(handle=handle, url=item["url"], listitem=list_item, isFolder=item["isFolder"])
 
         # Finaliza o diretório
-        xbmcplugin.endOfDirectory(handle=int(sys.argv[1]))
+        xbmcplugin.endOfDirectory(handle=handle)
 
-    def load_non_steam_games(self):
+    def get_listing_profiles(self):
         """
-        Carrega os jogos Non-Steam do arquivo JSON.
+        Perfis exibidos nas listagens: o perfil escolhido ou todos.
         """
-        nonsteam_games_json = xbmcvfs.translatePath(self.non_steam_games_path)
-        if not xbmcvfs.exists(nonsteam_games_json):
-            xbmcgui.Dialog().ok("Erro", "Nenhum jogo Non-Steam encontrado!")
-            return []
+        profile = self.settings.get_profile(self.profile_filter)
+        return [profile] if profile else self.settings.profiles
 
-        with open(nonsteam_games_json, "r", encoding="utf-8") as f:
-            data = json.load(f)
+    def load_catalog(self, kind):
+        """
+        Carrega o catálogo ("steam" ou "non_steam") dos perfis exibidos. Com mais de um perfil,
+        jogos presentes em vários catálogos aparecem uma única vez. Se uma pasta de artes mudou
+        de lugar nas configurações, o catálogo passa a apontar para ela (ver pathroots).
+        """
+        games = []
+        seen = set()
+        found = False
+        profiles = self.get_listing_profiles()
+        for profile in profiles:
+            file_name = profile.steam_catalog if kind == "steam" else profile.non_steam_catalog
+            catalog, rebased = load_rooted_catalog(self.json_dir, file_name, kind, get_path_roots(profile.steam_grid))
+            if catalog is None:
+                continue
+            found = True
+            if rebased:
+                # Os widgets guardam os caminhos completos
+                update_widgets(profile.source(kind), catalog.values())
+
+            # Acessa os jogos na chave "steam" / "non_steam"
+            for game in catalog.values():
+                # Atalhos marcados como duplicados na sincronização (ver dedup)
+                if game.get("duplicate_of"):
+                    continue
+                if len(profiles) > 1:
+                    key = str(game.get("appid"))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                games.append(with_merged(game))
+
+        if not found:
+            xbmcgui.Dialog().ok("Erro", "Nenhum jogo Steam encontrado!" if kind == "steam" else "Nenhum jogo Non-Steam encontrado!")
+        return games
 
-        # Acessa os jogos na chave "non_steam"
-        return list(data.get("non_steam", {}).values())
+    def load_non_steam_games(self):
+        """
+        Carrega os jogos Non-Steam do arquivo JSON.
+        """
+        return self.load_catalog("non_steam")
 
 
     def load_steam_games(self):
         """
         Carrega os jogos Steam do arquivo JSON.
         """
-        steam_games_json = xbmcvfs.translatePath(self.steam_games_path)
-        if not xbmcvfs.exists(steam_games_json):
-            xbmcgui.Dialog().ok("Erro", "Nenhum jogo Steam encontrado!")
-            return []
-
-        with open(steam_games_json, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Acessa os jogos na chave "steam"
-        return list(data.get("steam", {}).values())
+        return self.load_catalog("steam")
      
     def get_custom_art(self, path, folder_name, art_type):
         """
@@ -222,22 +339,255 @@ class Main:
     
     def sync_steam_games(self):
         """
-        Chama a sincronização de jogos da Steam.
+        Chama a sincronização de jogos da Steam. Pedidos feitos enquanto outra sincronização
+        Steam está em andamento aguardam o resultado dela em vez de iniciar outra.
         """
-        
+        status = run_coalesced("steam", self.run_steam_sync)
+        invalidate_route_cache()
+        schedule_cache_eviction()
+        return status
+
+    def sync_non_steam_games(self):
+        """
+        Chama a sincronização de jogos Non-Steam, com a mesma trava da sincronização Steam.
+        """
+        status = run_coalesced("non_steam", self.non_steam.sync_non_steam_games)
+        invalidate_route_cache()
+        schedule_cache_eviction()
+        return status
+
+    def sync_all(self):
+        """
+        Sincroniza Steam e Non-Steam ao mesmo tempo, gravando os dois catálogos juntos no final.
+        Segura as travas das duas sincronizações enquanto roda.
+        """
+        status = run_coalesced("all", run_exclusive, ["steam", "non_steam"], self.run_sync_all)
+        invalidate_route_cache()
+        schedule_cache_eviction()
+        return status
+
+    def sync_profiles(self):
+        """
+        Sincroniza todos os perfis configurados ao mesmo tempo, cada um no seu catálogo.
+        """
+        names = [profile.source(kind) for profile in self.settings.profiles for kind in ("steam", "non_steam")]
+        status = run_coalesced("profiles", run_exclusive, names, self.run_sync_profiles)
+        invalidate_route_cache()
+        schedule_cache_eviction()
+        return status
+
+    def run_sync_profiles(self):
+        return SyncProfiles(self.settings, self.non_steam).run()
+
+    def run_sync_all(self):
+        return SyncAll(self.settings, self.non_steam).run()
+
+    def run_steam_sync(self):
+        """
+        Busca os jogos na Steam e salva o catálogo. Retorna o status da execução.
+        """
+        metrics = SyncMetrics("steam")
+
         # Instancia a classe SteamAPI e tenta buscar os jogos
         steam_api = SteamAPI(self.settings.steam_user_id, self.settings.steam_api_key)
-        games = steam_api.get_owned_games()
+        journal = SyncJournal("steam", self.settings.steam_user_id)
+        partial = []
+        games = steam_api.get_owned_games(metrics, journal=journal, partial=partial)
 
         if games:
             # Se os jogos forem obtidos, instanciar o GameSaver e salvar
             game_saver = GameSaver()
-            game_saver.save_games(games)
+            game_saver.save_games(games, metrics)
+            journal.discard()
+            metrics.save()
+        elif games is None and partial:
+            # Cancelada: grava o que já foi concluído; o diário fica para a próxima execução
+            GameSaver().save_games(partial, metrics, partial=True)
+            metrics.save("cancelled")
+        else:
+            metrics.save("cancelled" if games is None else "empty")
+        return metrics.status
+
+    def show_widget(self, widget_type):
+        """
+        Lista de widget (recently_played, most_played, recently_added) lida do cache top-K.
+        """
+        for game in get_widget_items(widget_type):
+            list_item = xbmcgui.ListItem(label=game["appName"])
+            list_item.setArt({
+                "icon": xbmcvfs.translatePath(game["icon"]),
+                "poster": xbmcvfs.translatePath(game["poster"]),
+                "clearlogo": xbmcvfs.translatePath(game["clearlogo"]),
+                "fanart": xbmcvfs.translatePath(game["fanart"]),
+            })
+
+            plot = f"Último acesso: {format_last_play_time(game['LastPlayTime'])}" if game["LastPlayTime"] else ""
+            if game["playtime"]:
+                plot += f"\nTempo de jogo: {game['playtime'] // 60}h {game['playtime'] % 60}min"
+            list_item.setInfo("video", {
+                "title": game["appName"],
+                "plot": plot.strip()
+            })
+
+            url = f"plugin://plugin.program.steamgames/?action=play&appid={game['appid']}"
+            xbmcplugin.addDirectoryItem(
+                handle=int(sys.argv[1]),
+                url=url,
+                listitem=list_item,
+                isFolder=False
+            )
+
+        xbmcplugin.endOfDirectory(handle=int(sys.argv[1]))
+
+    def show_playtime_trends(self, appid=None):
+        """
+        Tendências de tempo de jogo a partir do histórico (snapshot + log recente).
+        Sem appid: total por semana e os jogos mais jogados no período. Com appid: as semanas do jogo.
+        """
+        history = load_history()
+        handle = int(sys.argv[1])
+
+        if appid:
+            weekly = get_game_trends(history).get(appid, [])
+            name = history["names"].get(appid, appid)
+            rows = [(week, minutes) for (week, _), minutes in zip(get_weekly_totals(history), weekly)]
+            for week, minutes in rows:
+                list_item = xbmcgui.ListItem(label=f"{week}  {format_playtime(minutes)}")
+                list_item.setInfo("video", {"title": name, "plot": f"{name}\n{week}: {format_playtime(minutes)}"})
+                xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+            xbmcplugin.endOfDirectory(handle=handle)
+            return
+
+        weekly_totals = get_weekly_totals(history)
+        plot = "\n".join(f"{week}: {format_playtime(minutes)}" for week, minutes in weekly_totals)
+        total = sum(minutes for _, minutes in weekly_totals)
+        list_item = xbmcgui.ListItem(label=f"Últimas {len(weekly_totals)} semanas: {format_playtime(total)}")
+        list_item.setInfo("video", {"title": "Tempo de jogo por semana", "plot": plot})
+        list_item.addContextMenuItems(self.get_context_menu())
+        xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+        trends = get_game_trends(history)
+        for game_appid, weekly in sorted(trends.items(), key=lambda item: -sum(item[1])):
+            name = history["names"].get(game_appid, game_appid)
+            label = f"{name}  {format_playtime(sum(weekly))}"
+            list_item = xbmcgui.ListItem(label=label)
+            list_item.setInfo("video", {
+                "title": name,
+                "plot": "\n".join(f"{week}: {format_playtime(minutes)}"
+                                   for (week, _), minutes in zip(weekly_totals, weekly) if minutes)
+            })
+            list_item.addContextMenuItems(self.get_context_menu())
+            xbmcplugin.addDirectoryItem(
+                handle=handle,
+                url=f"plugin://plugin.program.steamgames/?action=playtime_trends&appid={game_appid}",
+                listitem=list_item,
+                isFolder=True
+            )
+
+        xbmcplugin.endOfDirectory(handle=handle)
+
+    def show_library_stats(self):
+        """
+        Resumo da biblioteca lido do arquivo pré-calculado nas sincronizações.
+        """
+        summary = load_library_stats()
+        handle = int(sys.argv[1])
+        if not summary:
+            kodi_notify_warn("Nenhuma sincronização registrada ainda.")
+            xbmcplugin.endOfDirectory(handle=handle)
+            return
+
+        totals = summary["totals"]
+        sources = summary["sources"]
+        updated = datetime.datetime.fromtimestamp(summary.get("updated", 0)).strftime('%Y-%m-%d %H:%M')
+        rows = [
+            (f"Jogos: {totals['games']}",
+             "\n".join(f"{source_label(name)}: {stats['games']}" for name, stats in sources.items())),
+            (f"Instalados: {totals['installed']} de {totals['games']}",
+             "\n".join(f"{source_label(name)}: {stats['installed']} de {stats['games']}" for name, stats in sources.items())),
+            (f"Tempo total de jogo: {format_playtime(totals['playtime'])}",
+             "\n".join(f"{source_label(name)}: {format_playtime(stats['playtime'])}" for name, stats in sources.items())),
+            (f"Média por jogo jogado: {format_playtime(totals['average_playtime'])}",
+             f"{totals['played']} jogos com tempo registrado"),
+            (f"Tags: {totals['tag_count']}",
+             "\n".join(f"{tag}: {count} jogos" for tag, count in totals["tags_by_games"])),
+            ("Tags mais jogadas: " + (", ".join(tag for tag, _ in totals["tags_by_playtime"][:3]) or "-"),
+             "\n".join(f"{tag}: {format_playtime(minutes)}" for tag, minutes in totals["tags_by_playtime"])),
+        ]
+
+        for label, plot in rows:
+            list_item = xbmcgui.ListItem(label=label)
+            list_item.setInfo("video", {"title": label, "plot": f"{plot}\n\nAtualizado em {updated}"})
+            list_item.addContextMenuItems(self.get_context_menu())
+            xbmcplugin.addDirectoryItem(handle=handle, url="", listitem=list_item, isFolder=False)
+
+        xbmcplugin.endOfDirectory(handle=handle)
+
+    def show_sync_stats(self, limit=20):
+        """
+        Lista as últimas sincronizações com a duração de cada fase e os contadores registrados.
+        """
+        history = load_sync_history()[-limit:]
+        self.add_cache_stats_item()
+
+        for run in reversed(history):
+            started = datetime.datetime.fromtimestamp(run.get("started", 0)).strftime('%Y-%m-%d %H:%M')
+            counters = run.get("counters", {})
+            source = "Steam" if run.get("source") == "steam" else "Non-Steam"
+            label = f"{started}  {source}  {counters.get('games', 0)} jogos  {run.get('duration', 0):.1f}s"
+            if run.get("status") != "ok":
+                label += f"  [{run.get('status')}]"
+
+            plot_lines = ["Fases:"]
+            plot_lines += [f"  {name}: {value:.3f}s" for name, value in run.get("phases", {}).items()]
+            plot_lines.append("Contadores:")
+            plot_lines += [f"  {name}: {value}" for name, value in sorted(counters.items())]
+            cache = run.get("cache", {})
+            if cache:
+                plot_lines.append("Cache:")
+                plot_lines += [f"  {name}: {int(values['hit_rate'] * 100)}% ({values['hits']}/{values['hits'] + values['misses']})"
+                               for name, values in cache.items()]
+
+            list_item = xbmcgui.ListItem(label=label)
+            list_item.setInfo("video", {"title": label, "plot": "\n".join(plot_lines)})
+            list_item.addContextMenuItems(self.get_context_menu())
+            xbmcplugin.addDirectoryItem(
+                handle=int(sys.argv[1]),
+                url="plugin://plugin.program.steamgames/?action=sync_stats",
+                listitem=list_item,
+                isFolder=False
+            )
+
+        xbmcplugin.endOfDirectory(handle=int(sys.argv[1]))
              
+    def add_cache_stats_item(self):
+        """
+        Item com o uso dos caches em addon_data e os contadores de acertos, falhas e remoções.
+        """
+        stats, global_budget, evicted_at = load_cache_stats()
+        total = sum(values["size"] for values in stats.values())
+        label = f"Caches: {total / 1048576:.1f} de {global_budget // 1048576} MB"
+
+        plot_lines = []
+        for category, values in stats.items():
+            plot_lines.append(f"{category}: {values['files']} arquivos, "
+                              f"{values['size'] / 1048576:.1f} de {values['budget'] // 1048576} MB")
+            plot_lines.append(f"  acertos: {values['hits']}  falhas: {values['misses']}  removidos: {values['evictions']}")
+        if evicted_at:
+            plot_lines.append("Última limpeza: " + datetime.datetime.fromtimestamp(evicted_at).strftime('%Y-%m-%d %H:%M'))
+
+        list_item = xbmcgui.ListItem(label=label)
+        list_item.setInfo("video", {"title": label, "plot": "\n".join(plot_lines)})
+        list_item.addContextMenuItems(self.get_context_menu())
+        xbmcplugin.addDirectoryItem(handle=int(sys.argv[1]), url="", listitem=list_item, isFolder=False)
+
     def show_games_by_tags(self):
         """
         Exibe os jogos Steam e Non-Steam em pastas unificadas por tags na interface Kodi.
         """
+        self.show_cached_route("tags", self.build_tag_folder_items)
+
+    def build_tag_folder_items(self):
         steam_games = self.load_steam_games()
         non_steam_games = self.load_non_steam_games()
 
@@ -270,62 +620,37 @@ class Main:
                     grouped_games[tag_name].append(game)
 
         # Criar pastas para cada tag
+        items = []
         for tag_name, games in sorted(grouped_games.items()):
-            arts = self.get_art_for_folder(tag_name)
-            tag_item = xbmcgui.ListItem(label=tag_name)
-            tag_item.setArt(arts)
-            tag_item.setInfo("video", {"title": tag_name, "genre": "Jogos"})
-
-            # Adicionar menu de contexto à pasta
-            context_menu = [
-                ("Atualizar Jogos Steam",       f"RunPlugin(plugin://plugin.program.steamgames?action=sync_steam_games)"),
-                ("Atualizar Jogos Non-Steam",   f"RunPlugin(plugin://plugin.program.steamgames?action=sync_nonsteam_games)"),
-                ("Atualizar Collections",       f"RunPlugin(plugin://plugin.program.steamgames?action=collections)"),
-                ('Settings',                    f'RunPlugin(plugin://plugin.program.steamgames?action=settings)')
-            ]
-            tag_item.addContextMenuItems(context_menu)
-
-            # URL para abrir a pasta de jogos com esta tag
-            tag_url = f"plugin://plugin.program.steamgames/?action=list_games_by_tag&tag={tag_name}"
-            xbmcplugin.addDirectoryItem(
-                handle=int(sys.argv[1]),
-                url=tag_url,
-                listitem=tag_item,
-                isFolder=True
-            )
+            items.append({
+                "label": tag_name,
+                "art": self.get_art_for_folder(tag_name),
+                "info": {"title": tag_name, "genre": "Jogos"},
+                # URL para abrir a pasta de jogos com esta tag
+                "url": f"plugin://plugin.program.steamgames/?action=list_games_by_tag&tag={tag_name}{self.get_profile_query()}",
+                "isFolder": True
+            })
 
         # Adicionar a pasta "Steam", se houver jogos sem tags
         if uncategorized_games:
             folder_name = "Steam"
-            arts = self.get_art_for_folder(folder_name)
-            uncategorized_item = xbmcgui.ListItem(label=folder_name)
-            uncategorized_item.setArt(arts)
-            uncategorized_item.setInfo("video", {"title": folder_name, "genre": "Jogos"})
-
-            # Adicionar menu de contexto à pasta
-            context_menu = [
-                ("Atualizar Jogos Steam",       f"RunPlugin(plugin://plugin.program.steamgames?action=sync_steam_games)"),
-                ("Atualizar Jogos Non-Steam",   f"RunPlugin(plugin://plugin.program.steamgames?action=sync_nonsteam_games)"),
-                ("Atualizar Collections",       f"RunPlugin(plugin://plugin.program.steamgames?action=collections)"),
-                ('Settings',                    f'RunPlugin(plugin://plugin.program.steamgames?action=settings)')
-            ]
-            uncategorized_item.addContextMenuItems(context_menu)
-
-            uncategorized_url = "plugin://plugin.program.steamgames/?action=list_games_by_tag&tag=uncategorized"
-            xbmcplugin.addDirectoryItem(
-                handle=int(sys.argv[1]),
-                url=uncategorized_url,
-                listitem=uncategorized_item,
-                isFolder=True
-            )
+            items.append({
+                "label": folder_name,
+                "art": self.get_art_for_folder(folder_name),
+                "info": {"title": folder_name, "genre": "Jogos"},
+                "url": f"plugin://plugin.program.steamgames/?action=list_games_by_tag&tag=uncategorized{self.get_profile_query()}",
+                "isFolder": True
+            })
 
-        # Finaliza o diretório
-        xbmcplugin.endOfDirectory(handle=int(sys.argv[1]))
+        return items
 
     def show_games_by_tag(self, tag):
         """
         Lista os jogos Steam e Non-Steam de uma tag específica.
         """
+        self.show_cached_route(f"list_games_by_tag&tag={tag}", self.build_tag_items, tag)
+
+    def build_tag_items(self, tag):
         steam_games = self.load_steam_games()
         non_steam_games = self.load_non_steam_games()
 
@@ -344,39 +669,25 @@ class Main:
         # Ordena os jogos em ordem alfabética pelo nome
         filtered_games = sorted(filtered_games, key=lambda game: game.get("appName", "").lower())
 
-        for game in filtered_games:
-            list_item = xbmcgui.ListItem(label=game.get("appName", "Sem Nome"))
-            list_item.setArt({
-                "icon": xbmcvfs.translatePath(game.get("icon", "")),
-                "poster": xbmcvfs.translatePath(game.get("capsule", "")),
-                "clearlogo": xbmcvfs.translatePath(game.get("logo", "")),
-                "fanart": xbmcvfs.translatePath(game.get("hero", "")),
-            })
-            list_item.setInfo("video", {
-                "title": game.get("appName", "Sem Nome"),
-                "genre": ", ".join(game.get('tags', {}).values() if isinstance(game.get("tags"), dict) else [game.get("tags")]),
-                "plot": f"Último acesso: {game.get('LastPlayTime', 0)}"
-            })
-            
-            # Adicionar menu de contexto à pasta
-            context_menu = [
-                ("Atualizar Jogos Steam",       f"RunPlugin(plugin://plugin.program.steamgames?action=sync_steam_games)"),
-                ("Atualizar Jogos Non-Steam",   f"RunPlugin(plugin://plugin.program.steamgames?action=sync_nonsteam_games)"),
-                ("Atualizar Collections",       f"RunPlugin(plugin://plugin.program.steamgames?action=collections)"),
-                ('Settings',                    f'RunPlugin(plugin://plugin.program.steamgames?action=settings)')
-            ]
-            list_item.addContextMenuItems(context_menu)
-
-            # URL para executar o jogo
-            url = f"plugin://plugin.program.steamgames/?action=play&appid={game['appid']}"
-            xbmcplugin.addDirectoryItem(
-                handle=int(sys.argv[1]),
-                url=url,
-                listitem=list_item,
-                isFolder=False
-            )
-
-        xbmcplugin.endOfDirectory(handle=int(sys.argv[1]))
+        return [
+            {
+                "label": game.get("appName", "Sem Nome"),
+                "art": {
+                    "icon": xbmcvfs.translatePath(game.get("icon", "")),
+                    "poster": xbmcvfs.translatePath(game.get("capsule", "")),
+                    "clearlogo": xbmcvfs.translatePath(game.get("logo", "")),
+                    "fanart": xbmcvfs.translatePath(game.get("hero", "")),
+                },
+                "info": {
+                    "title": game.get("appName", "Sem Nome"),
+                    "genre": ", ".join(game.get('tags', {}).values() if isinstance(game.get("tags"), dict) else [game.get("tags")]),
+                    "plot": f"Último acesso: {game.get('LastPlayTime', 0)}"
+                },
+                # URL para executar o jogo
+                "url": f"plugin://plugin.program.steamgames/?action=play&appid={game['appid']}",
+                "isFolder": False
+            } for game in filtered_games
+        ]
 
     def saveShortcutsJson(self):
         """
@@ -433,24 +744,38 @@ class Main:
             # Exibe a notificação de sucesso
             kodi_notify("Coleções Processadas!")
 
-            # Ler o arquivo JSON em loop
-            while True:
-                if not os.path.exists(json_path):
-                    kodi_notify_warn(f"Arquivo de Coleção não encontrado: {json_path}")
-                    return
+            if not os.path.exists(json_path):
+                kodi_notify_warn(f"Arquivo de Coleção não encontrado: {json_path}")
+                return
 
-                with open(json_path, 'r', encoding='utf-8') as file:
-                    data = json.load(file)
+            # Lê o arquivo JSON uma única vez; as edições ficam em memória até o commit
+            session = CollectionsSession(json_path)
+            undo_label = "[Desfazer última edição]"
 
+            while True:
                 # Montar a lista de opções (nome: tags)
-                options = [f"{name}: {', '.join(tags)}" for name, tags in data.items()]
+                options = session.options()
+                offset = 1 if session.dirty else 0
+                if offset:
+                    options.insert(0, undo_label)
                 selected = xbmcgui.Dialog().multiselect("Selecione os jogos para editar a coleção", options)
                 
                 # Verificar se o usuário clicou em "Cancelar"
                 if selected is None:
+                    if session.dirty and kodi_dialog_yesno("Salvar as alterações pendentes nas coleções?"):
+                        session.commit()
+                    else:
+                        session.rollback()
                     return  # Sai da função sem executar nada
+
+                if offset and 0 in selected:
+                    session.undo()
+                    continue
                 
                 if not selected:
+                    # Grava as edições pendentes antes de gerar o shortcuts.vdf
+                    session.commit()
+
                     # Se nada for selecionado, executa outro arquivo .exe
                     kodi_notify("Coleções Atualizadas com sucesso!")
                     
@@ -482,17 +807,16 @@ class Main:
                         kodi_notify_warn("Arquivo shortcuts_updated.vdf não encontrado!")
                         kodi_log("Arquivo shortcuts_updated.vdf não encontrado!")
                     
-                    self.non_steam.sync_non_steam_games()  # Chama a função de sincronização de jogos Non-Steam
+                    self.sync_non_steam_games()  # Chama a função de sincronização de jogos Non-Steam
                     kodi_refresh_container()
 
                     return
 
                 # Obter os jogos selecionados
-                selected_games = [list(data.keys())[i] for i in selected]
-                selected_tags = [data[game] for game in selected_games]
+                selected_games = session.games_at(i - offset for i in selected)
 
                 # Criar uma lista de tags para editar
-                combined_tags = list(set(tag for tags in selected_tags for tag in tags))
+                combined_tags = session.combined_tags(selected_games)
 
                 # Mostrar para o usuário as tags atuais para todos os jogos selecionados
                 new_tags = xbmcgui.Dialog().input(
@@ -501,17 +825,13 @@ class Main:
                     type=xbmcgui.INPUT_ALPHANUM
                 )
 
-                if new_tags is not None:
+                # Dialog().input retorna "" quando o usuário cancela
+                if new_tags:
                     # Separar as tags por vírgula e atualizar todos os jogos selecionados
-                    new_tags_list = [tag.strip() for tag in new_tags.split(',')]
-
-                    # Atualizar os jogos selecionados
-                    for game in selected_games:
-                        data[game] = new_tags_list
+                    new_tags_list = [tag.strip() for tag in new_tags.split(',') if tag.strip()]
 
-                    # Salvar o arquivo atualizado
-                    with open(json_path, 'w', encoding='utf-8') as file:
-                        json.dump(data, file, ensure_ascii=False, indent=2)
+                    # Atualizar os jogos selecionados (gravado em disco apenas no commit)
+                    session.set_tags(selected_games, new_tags_list)
 
                     kodi_notify("Coleções para os jogos selecionados foram atualizados!")
                     
@@ -524,19 +844,10 @@ class Main:
     
     def play_game(self, appid):
         """
-        Simula a execução de um jogo com base no appid.
+        Inicia o jogo com base no appid sem bloquear o plugin.
         """
         try:
-            # Comando para executar o Steam com o appid
-            steam_command = f'steam.exe steam://rungameid/{appid}'
-
-            # Executa o comando
-            kodi_log(f"Executando: {steam_command}")
-            subprocess.run(steam_command, shell=True, cwd="C:\\Program Files (x86)\\Steam")
-
-            # Notifica o usuário sobre o início do jogo
-            # kodi_dialog_OK("Iniciar Jogo", f"Iniciando o jogo com ID: {appid}")
+            GameLauncher().launch(appid)
         except Exception as e:
             # Tratamento de erros e exibição de mensagem
             kodi_dialog_OK(f"Não foi possível iniciar o jogo. Detalhes: {str(e)}")
-    
\ No newline at end of file
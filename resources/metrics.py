@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Métricas das sincronizações Steam e Non-Steam
+
+from .utils import *
+
+import collections
+import contextlib
+import json
+import os
+import time
+
+SYNC_HISTORY_FILE = '_sync_history.json'
+SYNC_HISTORY_MAX = 50
+
+
+class SyncMetrics:
+    """
+    Acumula as métricas de uma sincronização: duração de cada fase, contadores (jogos,
+    acessos ao sistema de arquivos, bytes lidos e gravados) e acertos/falhas de cache.
+    Ao final, save() acrescenta a execução a um histórico limitado em addon_data.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.phases = collections.OrderedDict()
+        self.counters = collections.Counter()
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self.status = "ok"
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Mede uma fase. Fases com o mesmo nome são somadas (útil dentro de laços).
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add(self, name, value=1):
+        self.counters[name] += value
+
+    def cache(self, name, hit):
+        if hit:
+            self.hits[name] += 1
+        else:
+            self.misses[name] += 1
+
+    def to_dict(self):
+        cache = {}
+        for name in sorted(set(self.hits) | set(self.misses)):
+            total = self.hits[name] + self.misses[name]
+            cache[name] = {
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+                "hit_rate": round(self.hits[name] / total, 3) if total else 0.0
+            }
+        return {
+            "source": self.source,
+            "started": int(self.started),
+            "duration": round(time.perf_counter() - self._start, 3),
+            "status": self.status,
+            "phases": {name: round(value, 3) for name, value in self.phases.items()},
+            "counters": dict(self.counters),
+            "cache": cache
+        }
+
+    def save(self, status=None):
+        """
+        Acrescenta esta execução ao histórico, mantendo apenas as SYNC_HISTORY_MAX mais recentes.
+        """
+        if status:
+            self.status = status
+        path = get_addon_data_dir()
+        history = load_sync_history()
+        history.append(self.to_dict())
+        try:
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            write_file_atomic(os.path.join(path, SYNC_HISTORY_FILE),
+                              json.dumps(history[-SYNC_HISTORY_MAX:], separators=(',', ':')).encode('utf-8'))
+        except OSError as e:
+            kodi_log(f"Falha ao salvar as métricas da sincronização: {str(e)}")
+        save_timestamp(path)
+
+
+def load_sync_history():
+    """
+    Retorna o histórico de sincronizações, da mais antiga para a mais recente.
+    """
+    return load_json(os.path.join(get_addon_data_dir(), SYNC_HISTORY_FILE), [])
@@ -1,19 +1,36 @@
 from .utils import *
+from .metrics import SyncMetrics
+from .widgets import update_widgets
+from .artindex import art_exists
+from .imageprobe import get_image_prober, pick_art
+from .artcache import downscale_catalog_art
+from .stats import update_library_stats, get_installed_appids
+from .dedup import commit_catalogs, load_catalog_file, index_steam_games, find_steam_game, ART_FIELDS
+from .journal import SyncJournal, merge_partial_catalog
+from .pathroots import get_path_roots
 
 import os
 import json
 import configparser
 import struct
+import zlib
 import xbmcaddon
 import xbmcgui
-import xbmcvfs
 import time
 
+# Campos de um atalho gravados no diário da sincronização
+JOURNAL_FIELDS = ART_FIELDS + ('appid',)
+# Campos preenchidos por resolve_grid_assets
+GRID_ART_FIELDS = ('capsule', 'logo', 'hero', 'header', 'icon')
+
+
 class NonSteam:
     """
     Classe para sincronização e manipulação de jogos Non-Steam.
     """
 
+    VALID_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
+
     @staticmethod
     def read_url_from_shortcut(file_path):
         """
@@ -25,6 +42,57 @@ class NonSteam:
             return config['InternetShortcut'].get('URL')
         return None
         
+    @staticmethod
+    def get_shortcut_field(shortcut_data, name, default=""):
+        """
+        Lê um campo do atalho ignorando maiúsculas/minúsculas (a Steam grava 'AppName' ou 'appname'
+        dependendo da versão).
+        """
+        if name in shortcut_data:
+            return shortcut_data[name]
+        lowered = name.lower()
+        for key, value in shortcut_data.items():
+            if key.lower() == lowered:
+                return value
+        return default
+
+    @staticmethod
+    def get_shortcut_ids(shortcut_data):
+        """
+        Calcula os ids usados pela Steam para um atalho Non-Steam.
+        O id curto (usado nos nomes das imagens do grid) é o 'appid' gravado no shortcuts.vdf
+        ou, em versões antigas, crc32(exe + appName) com o bit mais alto ligado.
+        O rungameid de 64 bits é (id curto << 32) | 0x02000000.
+        Retorna a tupla (rungameid, grid_id) como strings, ou ("", "") se não for possível calcular.
+        """
+        short_id = NonSteam.get_shortcut_field(shortcut_data, 'appid', 0)
+        if not short_id:
+            exe = NonSteam.get_shortcut_field(shortcut_data, 'exe')
+            app_name = NonSteam.get_shortcut_field(shortcut_data, 'appName')
+            if not exe:
+                return "", ""
+            short_id = zlib.crc32((exe + app_name).encode('utf-8')) | 0x80000000
+
+        short_id &= 0xFFFFFFFF
+        rungameid = (short_id << 32) | 0x02000000
+        return str(rungameid), str(short_id)
+
+    @staticmethod
+    def index_url_shortcuts(non_steam_url_path):
+        """
+        Indexa a pasta de atalhos .url com uma única leitura do diretório.
+        Retorna um dicionário {nome do jogo em minúsculas: caminho do .url}.
+        """
+        url_index = {}
+        if not non_steam_url_path or not os.path.isdir(non_steam_url_path):
+            return url_index
+        with os.scandir(non_steam_url_path) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if ext.lower() == '.url' and entry.is_file():
+                    url_index[name.lower()] = entry.path
+        return url_index
+
     @staticmethod
     def get_steam_grid_path():
         """
@@ -36,142 +104,266 @@ class NonSteam:
         
 
     @staticmethod
-    def get_valid_image_extension(file_path):
+    def get_grid_candidates(file_path):
         """
-        Verifica as extensões de imagem mais comuns e retorna a extensão válida para cada tipo de arte.
-        Para cada tipo de arte (poster, logo, hero, header), verifica a existência da extensão.
-        Retorna uma tupla contendo a extensão para cada tipo de arte.
+        Lista, para cada tipo de arte (capsule, logo, hero, header), os arquivos existentes no
+        Steam Grid em ordem de prioridade das extensões.
         """
-        valid_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
-        
-        # Inicializa os valores de cada tipo de arte
-        poster_ext = None
-        logo_ext = None
-        hero_ext = None
-        header_ext = None
-
-        for ext in valid_extensions:
-            # Verifica cada tipo de arte separadamente
-            if os.path.exists(f"{file_path}p{ext}"):
-                poster_ext = ext
-            if os.path.exists(f"{file_path}_logo{ext}"):
-                logo_ext = ext    
-            if os.path.exists(f"{file_path}_hero{ext}"):
-                hero_ext = ext    
-            if os.path.exists(f"{file_path}{ext}"):
-                header_ext = ext
-        
-        return poster_ext, logo_ext, hero_ext, header_ext  # Retorna as extensões encontradas
-    
-    def sync_non_steam_games(self):
+        directory, base_name = os.path.split(file_path)
+        patterns = {
+            'capsule': f"{base_name}p",
+            'logo': f"{base_name}_logo",
+            'hero': f"{base_name}_hero",
+            'header': base_name,
+        }
+
+        # Consulta o índice do diretório em vez de verificar cada arquivo no disco
+        candidates = {}
+        for slot, name in patterns.items():
+            candidates[slot] = [
+                os.path.join(directory, f"{name}{ext}") for ext in NonSteam.VALID_IMAGE_EXTENSIONS
+                if art_exists(directory, f"{name}{ext}")
+            ]
+        return candidates
+
+    def resolve_grid_assets(self, game_data, steam_grid, grid_id, metrics, prober=None):
         """
-        Sincroniza jogos Non-Steam a partir de atalhos e arquivos .url, exibindo barra de progresso.
-        Gera um JSON com a estrutura padronizada solicitada, incluindo a padronização dos campos de arte.
+        Preenche os campos de arte do jogo com as imagens do Steam Grid.
+        Com o prober, imagens corrompidas são descartadas e vence a de melhor proporção.
         """
-        addon = xbmcaddon.Addon()
-        shortcuts_vdf_path = addon.getSetting('shortcuts_vdf')
-        non_steam_url_path = addon.getSetting('non-steam_url')
+        candidates = self.get_grid_candidates(os.path.join(steam_grid, str(grid_id)))
+        metrics.add("art_lookups", 4 * len(self.VALID_IMAGE_EXTENSIONS))
+        metrics.cache("steam_grid", any(candidates.values()))
 
-        # Verifica se os caminhos configurados existem
-        if not os.path.exists(shortcuts_vdf_path):
-            xbmcgui.Dialog().ok("Erro", f"Arquivo não encontrado: {shortcuts_vdf_path}")
-            return
+        for slot, paths in candidates.items():
+            if prober is None:
+                # Comportamento original: vale a última extensão encontrada
+                paths = paths[-1:]
+            art = pick_art(prober, paths, slot)
+            if art:
+                game_data[slot] = art
 
-        if not os.path.isdir(non_steam_url_path):
-            xbmcgui.Dialog().ok("Erro", f"Diretório não encontrado: {non_steam_url_path}")
-            return
+        # Define o caminho do ícone como o mesmo que header, se aplicável (ou pode ser customizado)
+        game_data['icon'] = game_data['header']
 
-        try:
-            # Lê e processa o arquivo shortcuts.vdf
-            shortcuts = self.parse_shortcuts(shortcuts_vdf_path)
+    @staticmethod
+    def get_sync_paths():
+        """
+        Obtém os caminhos do shortcuts.vdf e da pasta de atalhos .url a partir das configurações.
+        """
+        addon = xbmcaddon.Addon()
+        return addon.getSetting('shortcuts_vdf'), addon.getSetting('non-steam_url')
 
-            # Prepare a barra de progresso
-            dialog_progress = xbmcgui.DialogProgress()
-            dialog_progress.create("Sincronizando Jogos", "Iniciando...")
+    def build_non_steam_games(self, shortcuts_vdf_path, non_steam_url_path, metrics, dialog_progress, steam_grid=None,
+                              journal=None, partial=None, steam_catalog=None):
+        """
+        Lê o shortcuts.vdf e monta o catálogo Non-Steam, sem gravá-lo.
+        Retorna None se a operação for cancelada pelo dialog_progress. Com um SyncJournal, os
+        atalhos processados são registrados por lote e os de uma execução interrompida são
+        reaproveitados. Atalhos de jogos que estão em `steam_catalog` usam as artes já
+        resolvidas para a entrada Steam (ver resolve_game).
+        """
+        if non_steam_url_path and not os.path.isdir(non_steam_url_path):
+            kodi_log(f"Diretório de atalhos .url não encontrado: {non_steam_url_path}")
 
-            total_shortcuts = len(shortcuts.get('shortcuts', {}))
-            processed_count = 0
+        # Lê e processa o arquivo shortcuts.vdf
+        with metrics.phase("vdf_parsing"):
+            shortcuts = self.parse_shortcuts(shortcuts_vdf_path)
+        metrics.add("bytes_read", os.path.getsize(shortcuts_vdf_path))
 
-            # Nova estrutura no formato solicitado
-            non_steam_games = {}
+        total_shortcuts = len(shortcuts.get('shortcuts', {}))
+        metrics.add("games", total_shortcuts)
 
-            # Obtém o diretório Steam Grid
+        # Obtém o diretório Steam Grid
+        if steam_grid is None:
             steam_grid = self.get_steam_grid_path()
 
-            # Processa cada jogo e organiza no formato solicitado
-            for idx, (shortcut_id, shortcut_data) in enumerate(shortcuts.get('shortcuts', {}).items()):
-                app_name = shortcut_data.get('appName', '')
-
-                # Inicializa os campos do jogo
-                game_data = {
-                    "appid": shortcut_data.get('appid', ""),
-                    "appName": app_name,
-                    "LastPlayTime": shortcut_data.get('LastPlayTime', ""),
-                    "capsule": "",  # Antes "poster"
-                    "icon": "",  # Novo campo
-                    "logo": "",
-                    "hero": "",
-                    "header": "",
-                    "tags": shortcut_data.get('tags', {})
-                }
-
-                # Atualiza caminhos de imagens com base no Steam Grid
-                if steam_grid:
-                    appid = shortcut_data.get('appid', '')
-                    poster_ext, logo_ext, hero_ext, header_ext = self.get_valid_image_extension(os.path.join(steam_grid, str(appid)))
-
-                    if poster_ext:
-                        game_data['capsule'] = os.path.join(steam_grid, f"{appid}p{poster_ext}")  # Renomeado de poster para capsule
-                    if logo_ext:
-                        game_data['logo'] = os.path.join(steam_grid, f"{appid}_logo{logo_ext}")
-                    if hero_ext:
-                        game_data['hero'] = os.path.join(steam_grid, f"{appid}_hero{hero_ext}")
-                    if header_ext:
-                        game_data['header'] = os.path.join(steam_grid, f"{appid}{header_ext}")
-                    
-                    # Define o caminho do ícone como o mesmo que header, se aplicável (ou pode ser customizado)
-                    game_data['icon'] = game_data['header']
-
-                # Obtém o appid de arquivos .url, caso não exista no atalho
-                url_file_path = os.path.join(non_steam_url_path, f"{app_name}.url")
-                if os.path.exists(url_file_path):
-                    url = self.read_url_from_shortcut(url_file_path)
-                    if url and "steam://rungameid/" in url:
-                        appid_value = url.split("steam://rungameid/")[-1]
-                        game_data['appid'] = appid_value
-
-                # Adiciona o jogo ao dicionário final
-                non_steam_games[str(idx)] = game_data
-
-                # Atualiza a barra de progresso com o nome do jogo
-                processed_count += 1
-                dialog_progress.update(
-                    int((processed_count / total_shortcuts) * 100),
-                    f"Processando: {app_name}"
-                )
+        # Atalhos .url são usados apenas como alternativa quando o id não pode ser calculado
+        with metrics.phase("url_index"):
+            url_index = self.index_url_shortcuts(non_steam_url_path)
 
+        prober = get_image_prober(metrics)
+        try:
+            return self._build_games(shortcuts, url_index, steam_grid, metrics, dialog_progress, prober, journal, partial,
+                                     index_steam_games(steam_catalog))
+        finally:
+            if prober:
+                prober.save()
+            if journal:
+                metrics.add("resumed", journal.resumed)
+                journal.flush()
+
+    def resolve_game(self, game_data, app_name, rungameid, grid_id, steam_grid, url_index, resolved_art, metrics, prober,
+                     steam_index=None):
+        """
+        Resolve, se preciso, o appid pelo atalho .url e as artes do Steam Grid.
+        """
+        # Obtém o appid de arquivos .url, caso não tenha sido possível calculá-lo
+        url_file_path = url_index.get(app_name.lower()) if not rungameid else None
+        if not rungameid:
+            metrics.cache("url_shortcuts", bool(url_file_path))
+        if url_file_path:
+            url = self.read_url_from_shortcut(url_file_path)
+            if url and "steam://rungameid/" in url:
+                appid_value = url.split("steam://rungameid/")[-1]
+                game_data['appid'] = appid_value
+
+        # Atalho de um jogo que também está no catálogo Steam: fica com as artes já resolvidas
+        # para a entrada Steam. O Steam Grid do atalho só é consultado se faltar alguma, que
+        # ele pode completar na entrada Steam (ver dedup.merge_duplicates)
+        steam_game = find_steam_game(steam_index, game_data) if steam_index else None
+        if steam_game:
+            shared = all(steam_game.get(field) for field in GRID_ART_FIELDS)
+            metrics.cache("steam_art", shared)
+            if shared:
+                game_data.update({field: steam_game[field] for field in GRID_ART_FIELDS})
+                return
+
+        # Atalhos repetidos (mesmo id) compartilham a mesma resolução de artes
+        if steam_grid and grid_id and grid_id in resolved_art:
+            game_data.update(resolved_art[grid_id])
+        elif steam_grid and grid_id:
+            with metrics.phase("asset_resolution"):
+                self.resolve_grid_assets(game_data, steam_grid, grid_id, metrics, prober)
+            resolved_art[grid_id] = {field: game_data[field] for field in ART_FIELDS if field in game_data}
+
+    def _build_games(self, shortcuts, url_index, steam_grid, metrics, dialog_progress, prober, journal, partial,
+                     steam_index=None):
+        """
+        Monta o dicionário de jogos a partir dos atalhos lidos. Retorna None se cancelado; os
+        jogos concluídos até o cancelamento ficam em `partial`, se informado.
+        """
+        non_steam_games = {}
+        total_shortcuts = len(shortcuts.get('shortcuts', {}))
+        processed_count = 0
+        resolved_art = {}
+
+        # Processa cada jogo e organiza no formato solicitado
+        for idx, (shortcut_id, shortcut_data) in enumerate(shortcuts.get('shortcuts', {}).items()):
+            app_name = self.get_shortcut_field(shortcut_data, 'appName')
+            rungameid, grid_id = self.get_shortcut_ids(shortcut_data)
+
+            # Inicializa os campos do jogo
+            game_data = {
+                "appid": rungameid,
+                "appName": app_name,
+                "LastPlayTime": shortcut_data.get('LastPlayTime', ""),
+                "capsule": "",  # Antes "poster"
+                "icon": "",  # Novo campo
+                "logo": "",
+                "hero": "",
+                "header": "",
+                "tags": shortcut_data.get('tags', {})
+            }
+
+            # Atalho já processado por uma execução interrompida (ver SyncJournal)
+            signature = f"{rungameid}|{app_name}"
+            resumed = journal.get(idx, signature) if journal else None
+            if resumed is not None:
+                game_data.update(resumed)
+                metrics.cache("journal", True)
+            else:
+                self.resolve_game(game_data, app_name, rungameid, grid_id, steam_grid, url_index, resolved_art,
+                                  metrics, prober, steam_index)
+                if journal:
+                    metrics.cache("journal", False)
+                    journal.add(idx, signature, {field: game_data[field] for field in JOURNAL_FIELDS if field in game_data})
+
+            # Adiciona o jogo ao dicionário final
+            non_steam_games[str(idx)] = game_data
+            if partial is not None:
+                partial[str(idx)] = game_data
+
+            # Atualiza a barra de progresso com o nome do jogo
+            processed_count += 1
+            dialog_progress.update(
+                int((processed_count / total_shortcuts) * 100),
+                f"Processando: {app_name}"
+            )
+
+            if resumed is None:
                 time.sleep(0.2)  # Simula processamento para melhor UX
 
-                # Verifica se o usuário cancelou a operação
-                if dialog_progress.iscanceled():
-                    xbmcgui.Dialog().ok("Cancelado", "A sincronização foi cancelada.")
-                    return
+            # Verifica se o usuário cancelou a operação
+            if dialog_progress.iscanceled():
+                return None
 
-            dialog_progress.close()
+        return non_steam_games
+
+    def sync_non_steam_games(self, metrics=None):
+        """
+        Sincroniza jogos Non-Steam a partir de atalhos e arquivos .url, exibindo barra de progresso.
+        Gera um JSON com a estrutura padronizada solicitada, incluindo a padronização dos campos de arte.
+        Retorna o status da execução ("ok", "cancelled" ou "error").
+        """
+        metrics = metrics or SyncMetrics("non_steam")
+        shortcuts_vdf_path, non_steam_url_path = self.get_sync_paths()
+
+        # Verifica se os caminhos configurados existem
+        if not os.path.exists(shortcuts_vdf_path):
+            xbmcgui.Dialog().ok("Erro", f"Arquivo não encontrado: {shortcuts_vdf_path}")
+            return "error"
+
+        try:
+            # Prepare a barra de progresso
+            dialog_progress = xbmcgui.DialogProgress()
+            dialog_progress.create("Sincronizando Jogos", "Iniciando...")
 
             # Define o caminho para salvar o arquivo JSON
-            special_path = xbmcvfs.translatePath('special://userdata/addon_data/plugin.program.steamgames/')
+            special_path = get_addon_data_dir()
+
+            journal = SyncJournal("non_steam", shortcuts_vdf_path)
+            partial = {}
+            non_steam_games = self.build_non_steam_games(
+                shortcuts_vdf_path, non_steam_url_path, metrics, dialog_progress, journal=journal, partial=partial,
+                steam_catalog=load_catalog_file(special_path, 'steam_games.json', 'steam'))
+            if non_steam_games is not None:
+                downscale_catalog_art(non_steam_games, metrics, dialog_progress)
+            dialog_progress.close()
+
             updated_output_path = os.path.join(special_path, 'non_steam_games.json')
 
-            # Salva o JSON estruturado
-            with open(updated_output_path, 'w', encoding='utf-8') as f:
-                json.dump({"non_steam": non_steam_games}, f, indent=4, ensure_ascii=False)
+            cancelled = non_steam_games is None
+            if cancelled:
+                if not partial:
+                    xbmcgui.Dialog().ok("Cancelado", "A sincronização foi cancelada.")
+                    metrics.save("cancelled")
+                    return metrics.status
+                # Grava os atalhos já concluídos por cima do catálogo anterior
+                non_steam_games = merge_partial_catalog(
+                    load_catalog_file(special_path, 'non_steam_games.json', 'non_steam'), partial)
+
+            # Salva o JSON estruturado (apenas se o conteúdo mudou)
+            file_names = {"steam": "steam_games.json", "non_steam": "non_steam_games.json"}
+            catalogs, written = commit_catalogs(special_path, {"non_steam": non_steam_games}, file_names,
+                                                get_path_roots(), metrics)
+            metrics.add("bytes_written", written["non_steam_games.json"])
+
+            with metrics.phase("widgets"):
+                update_widgets("non_steam", non_steam_games.values())
+                if written.get("steam_games.json"):
+                    update_widgets("steam", catalogs["steam_games.json"]["steam"].values())
+            with metrics.phase("stats"):
+                update_library_stats("non_steam", non_steam_games.values())
+                if written.get("steam_games.json"):
+                    update_library_stats("steam", catalogs["steam_games.json"]["steam"].values(), get_installed_appids())
+            if cancelled:
+                metrics.save("cancelled")
+                xbmcgui.Dialog().ok("Cancelado", f"A sincronização foi cancelada.\n{len(partial)} jogos já processados foram salvos "
+                                                 "e serão reaproveitados na próxima sincronização.")
+                return metrics.status
+
+            journal.discard()
+            metrics.save()
 
             # Exibe o diálogo de sucesso após o término do processo
             xbmcgui.Dialog().ok("Sucesso", f"Jogos Non-Steam atualizados com sucesso!\nArquivo gerado em: {updated_output_path}")
+            return metrics.status
 
         except Exception as e:
+            metrics.save("error")
             xbmcgui.Dialog().ok("Erro", f"Erro ao processar o arquivo: {str(e)}")
+            return metrics.status
 
 
 
@@ -207,21 +399,40 @@ class NonSteam:
             res.append(infile.read(len(peek)))
 
     @staticmethod
-    def _read_dict(infile):
+    def _read_float(infile):
+        return struct.unpack("f", infile.read(4))[0]
+
+    @staticmethod
+    def _read_signed_long(infile):
+        return struct.unpack("q", infile.read(8))[0]
+
+    @staticmethod
+    def _read_dict(infile, keys=None):
+        """
+        Decodifica um dicionário VDF binário (shortcuts.vdf ou seção do appinfo.vdf).
+        :param keys: Tabela de strings do appinfo.vdf v29, onde os nomes são índices uint32.
+        """
         res = {}
         while True:
             dtype = infile.read(1)
-            if dtype == b'\x08':  # End of dictionary
+            if dtype in (b'\x08', b'\x0b', b''):  # End of dictionary
                 break
-            name = NonSteam._read_str(infile)
+            if keys is None:
+                name = NonSteam._read_str(infile)
+            else:
+                name = keys[NonSteam._read_int(infile)]
             if dtype == b'\x00':
-                value = NonSteam._read_dict(infile)
+                value = NonSteam._read_dict(infile, keys)
             elif dtype == b'\x01':
                 value = NonSteam._read_str(infile)
             elif dtype == b'\x02':
                 value = NonSteam._read_int(infile)
+            elif dtype == b'\x03':
+                value = NonSteam._read_float(infile)
             elif dtype == b'\x07':
                 value = NonSteam._read_long(infile)
+            elif dtype == b'\x0a':
+                value = NonSteam._read_signed_long(infile)
             else:
                 raise ValueError("Tipo desconhecido")
             res[name] = value
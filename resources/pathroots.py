@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Caminhos das artes do catálogo relativos a raízes nomeadas
+
+from .utils import *
+from .synclock import CATALOGS_LOCK, SyncLock
+
+import copy
+import json
+import os
+import random
+import xbmcaddon
+import xbmcvfs
+
+# Raízes conhecidas. Os campos de arte gravados como "@<raiz>/<caminho relativo>" continuam
+# válidos quando a pasta muda de lugar: basta trocar a raiz no cabeçalho do catálogo.
+ROOT_NAMES = ('library_cache', 'steam_grid', 'nfo', 'assets')
+ROOT_MARK = '@'
+# Quantos arquivos de cada raiz são conferidos antes de aceitar uma nova pasta
+ROOT_SAMPLE_SIZE = 8
+ROOT_SAMPLE_MIN_RATIO = 0.75
+
+ART_FIELDS = ('capsule', 'hero', 'logo', 'header', 'icon', 'banner')
+# {campo: caminho} das artes emprestadas de um jogo duplicado (ver dedup.merge_duplicates)
+SHARED_ART = "shared_art"
+
+
+def _normalize_root(path):
+    if not path:
+        return ''
+    path = xbmcvfs.translatePath(path)
+    return os.path.normpath(path) + os.sep
+
+
+def get_path_roots(steam_grid=None):
+    """
+    Raízes atuais, pelas configurações. `steam_grid` é a pasta Grid do perfil (a do perfil
+    principal quando não informada).
+    """
+    addon = xbmcaddon.Addon()
+    roots = {
+        'library_cache': addon.getSetting('library_cache'),
+        'steam_grid': addon.getSetting('steam_grid') if steam_grid is None else steam_grid,
+        'nfo': addon.getSetting('nfo_files'),
+        'assets': ADDON_DATA_PATH + 'assets/',
+    }
+    return {name: _normalize_root(path) for name, path in roots.items() if path}
+
+
+def to_rooted(value, roots):
+    """
+    "@raiz/caminho" para um caminho dentro de uma das raízes; outros valores ficam como estão.
+    """
+    if not value or value.startswith(ROOT_MARK):
+        return value
+    path = os.path.normpath(xbmcvfs.translatePath(value))
+    best = None
+    for name, root in roots.items():
+        if os.path.normcase(path).startswith(os.path.normcase(root)) and (best is None or len(root) > len(roots[best])):
+            best = name
+    if best is None:
+        return value
+    return f"{ROOT_MARK}{best}/" + path[len(roots[best]):].replace(os.sep, '/')
+
+
+def from_rooted(value, roots):
+    """
+    Caminho completo de um valor "@raiz/caminho". Raízes desconhecidas deixam o valor como está.
+    """
+    if not value or not value.startswith(ROOT_MARK):
+        return value
+    name, _, relative = value[1:].partition('/')
+    root = roots.get(name)
+    if not root:
+        return value
+    return os.path.join(root, *relative.split('/'))
+
+
+def root_catalog(catalog, roots):
+    """
+    Cópia do catálogo com os campos de arte relativos às raízes. Os jogos são copiados só
+    quando algum campo muda, e o catálogo em memória continua com os caminhos completos.
+    """
+    rooted = {}
+    for key, game in catalog.items():
+        changes = {field: to_rooted(game[field], roots) for field in ART_FIELDS if game.get(field)}
+        changes = {field: value for field, value in changes.items() if value != game[field]}
+        if game.get(SHARED_ART):
+            shared = {field: to_rooted(value, roots) for field, value in game[SHARED_ART].items()}
+            if shared != game[SHARED_ART]:
+                changes[SHARED_ART] = shared
+        rooted[key] = dict(game, **changes) if changes else game
+    return rooted
+
+
+def root_catalogs(catalogs, roots):
+    """
+    Prepara {arquivo: {tipo: catálogo}} para save_catalogs, gravando as raízes no cabeçalho.
+    """
+    files = {}
+    for file_name, content in catalogs.items():
+        files[file_name] = {kind: root_catalog(catalog, roots) for kind, catalog in content.items()}
+        files[file_name]["roots"] = roots
+    return files
+
+
+def resolve_catalog(catalog, roots):
+    """
+    Troca, no próprio catálogo, os valores "@raiz/caminho" pelos caminhos completos.
+    """
+    for game in catalog.values():
+        for art in (game, game.get(SHARED_ART) or {}):
+            for field in ART_FIELDS:
+                value = art.get(field)
+                if value and value.startswith(ROOT_MARK):
+                    art[field] = from_rooted(value, roots)
+    return catalog
+
+
+def sample_root(catalog, name, root, size=ROOT_SAMPLE_SIZE):
+    """
+    Confere se `root` tem os arquivos esperados, por uma amostra dos valores da raiz `name`.
+    Retorna (encontrados, conferidos).
+    """
+    prefix = f"{ROOT_MARK}{name}/"
+    values = [game[field] for game in catalog.values() for field in ART_FIELDS
+              if isinstance(game.get(field), str) and game[field].startswith(prefix)]
+    sample = random.sample(values, min(size, len(values)))
+    found = sum(1 for value in sample if os.path.exists(from_rooted(value, {name: root})))
+    return found, len(sample)
+
+
+def rebase_roots(data, kind, roots):
+    """
+    Compara as raízes gravadas no catálogo com as atuais. Cada raiz alterada é aceita se a
+    amostra for encontrada na nova pasta; as recusadas ficam com a pasta antiga e são
+    lembradas, para não serem conferidas de novo a cada listagem.
+    Retorna True se o cabeçalho mudou e o arquivo deve ser regravado.
+    """
+    stored = data.get("roots")
+    if stored is None:
+        return False
+    rejected = data.get("rejected_roots", {})
+    changed = False
+    for name, root in roots.items():
+        if stored.get(name) == root or rejected.get(name) == root:
+            continue
+        if name in stored:
+            found, checked = sample_root(data.get(kind, {}), name, root)
+            if checked and found < checked * ROOT_SAMPLE_MIN_RATIO:
+                kodi_log(f"Raiz '{name}' não aceita: {found} de {checked} arquivos encontrados em {root}")
+                kodi_notify_warn(f"Artes não encontradas na nova pasta ({name}). Sincronize novamente.")
+                rejected[name] = root
+                data["rejected_roots"] = rejected
+                changed = True
+                continue
+            kodi_log(f"Raiz '{name}' movida: {stored[name]} -> {root} ({found} de {checked} arquivos conferidos)")
+        stored[name] = root
+        rejected.pop(name, None)
+        changed = True
+    return changed
+
+
+def _header(data):
+    return data.get("roots"), data.get("rejected_roots")
+
+
+def rewrite_roots(path, file_name, old_header, data):
+    """
+    Grava o novo cabeçalho de raízes de `data` no catálogo com a trava CATALOGS_LOCK, a de quem
+    grava catálogos, e não com a da sincronização: uma sincronização pedida agora não pode se
+    juntar a esta "execução" (run_coalesced). O arquivo é relido já com a trava e só é regravado
+    se o cabeçalho ainda for `old_header`; se a trava estiver ocupada, nada é gravado e a
+    próxima listagem ou sincronização grava as raízes atuais. Retorna True se o arquivo foi
+    regravado.
+    """
+    lock = SyncLock(CATALOGS_LOCK)
+    if not lock.acquire():
+        return False
+    status = "error"
+    try:
+        current = load_json(os.path.join(path, file_name), None)
+        if current is None or _header(current) != old_header:
+            status = "ok"
+            return False
+        current["roots"] = data["roots"]
+        if data.get("rejected_roots"):
+            current["rejected_roots"] = data["rejected_roots"]
+        else:
+            current.pop("rejected_roots", None)
+        save_catalogs(path, {file_name: current})
+        status = "ok"
+        return True
+    except OSError as e:
+        kodi_log(f"Falha ao regravar as raízes do catálogo: {str(e)}")
+        return False
+    finally:
+        lock.release(status)
+
+
+def load_rooted_catalog(path, file_name, kind, roots=None):
+    """
+    Lê um catálogo e devolve (jogos com caminhos completos, rebase). Com `roots`, as raízes
+    gravadas são comparadas com as atuais (rebase_roots) e os caminhos já saem resolvidos
+    pelas novas pastas; só o cabeçalho é regravado (rewrite_roots), sem refazer nenhum jogo.
+    rebase indica que alguma raiz mudou.
+    Retorna (None, False) se o arquivo não existir.
+    """
+    file_path = os.path.join(path, file_name)
+    if not os.path.exists(file_path):
+        return None, False
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None, False
+
+    old_header = copy.deepcopy(_header(data))
+    rebased = roots is not None and rebase_roots(data, kind, roots)
+    if rebased:
+        rewrite_roots(path, file_name, old_header, data)
+    return resolve_catalog(data.get(kind, {}), data.get("roots") or {}), rebased
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# Histórico de tempo de jogo (log somente de acréscimos + snapshot compactado)
+
+from .utils import *
+
+import datetime
+import json
+import os
+import time
+import uuid
+
+PLAYTIME_LOG_FILE = '_playtime_log.jsonl'
+PLAYTIME_SNAPSHOT_FILE = '_playtime_snapshot.json'
+# O log é compactado no snapshot quando passa deste tamanho, o que limita o que é lido
+PLAYTIME_COMPACT_BYTES = 256 * 1024
+PLAYTIME_TREND_WEEKS = 12
+PLAYTIME_KEEP_WEEKS = 104
+
+
+def week_key(timestamp):
+    year, week, _ = datetime.date.fromtimestamp(timestamp).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def format_playtime(minutes):
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}h {minutes:02d}min" if hours else f"{minutes}min"
+
+
+def _read_log(path, folded=None):
+    """
+    Lê as entradas do log: [timestamp, origem, appid, nome, playtime, último acesso, delta].
+    A primeira linha identifica o log ({"log_id": ...}); se ele for o mesmo já incorporado ao
+    snapshot (folded = {"log_id", "offset"}), só as entradas depois do offset são lidas.
+    Linhas incompletas (ex.: gravação interrompida) são ignoradas.
+    Retorna (log_id, entradas, tamanho lido em bytes).
+    """
+    entries = []
+    log_id = None
+    if not os.path.exists(path):
+        return log_id, entries, 0
+    with open(path, 'rb') as f:
+        first = f.readline()
+        try:
+            header = json.loads(first)
+        except ValueError:
+            header = None
+        if isinstance(header, dict):
+            log_id = header.get("log_id")
+            if folded and log_id and folded.get("log_id") == log_id:
+                f.seek(max(folded.get("offset", 0), len(first)))
+        else:
+            f.seek(0)
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return log_id, entries, f.tell()
+
+
+def _apply_entry(snapshot, entry):
+    timestamp, source, appid, name, playtime, last_played, delta = entry
+    snapshot["totals"].setdefault(source, {})[appid] = [playtime, last_played]
+    snapshot["names"][appid] = name
+    week = snapshot["weeks"].setdefault(week_key(last_played or timestamp), {})
+    week[appid] = week.get(appid, 0) + delta
+
+
+def load_history():
+    """
+    Retorna o histórico atual: o snapshot compactado com o log pendente aplicado por cima.
+    Só o log desde a última compactação é lido, não o histórico completo.
+    """
+    path = get_addon_data_dir()
+    snapshot = load_json(os.path.join(path, PLAYTIME_SNAPSHOT_FILE), {})
+    snapshot.setdefault("totals", {})
+    snapshot.setdefault("names", {})
+    snapshot.setdefault("weeks", {})
+    log_id, entries, offset = _read_log(os.path.join(path, PLAYTIME_LOG_FILE), snapshot.get("folded"))
+    for entry in entries:
+        _apply_entry(snapshot, entry)
+    if log_id:
+        snapshot["folded"] = {"log_id": log_id, "offset": offset}
+    return snapshot
+
+
+def compact_history(snapshot=None):
+    """
+    Incorpora o log ao snapshot e recomeça o log vazio. Semanas mais antigas que
+    PLAYTIME_KEEP_WEEKS são descartadas. O snapshot guarda até onde o log foi incorporado
+    ("folded"), então uma queda entre gravar o snapshot e apagar o log não conta as
+    entradas duas vezes.
+    """
+    path = get_addon_data_dir()
+    snapshot = snapshot or load_history()
+    now = time.time()
+    oldest = week_key(now - 7 * 86400 * PLAYTIME_KEEP_WEEKS)
+    snapshot["weeks"] = {key: values for key, values in snapshot["weeks"].items() if key >= oldest}
+    snapshot["compacted"] = int(now)
+    write_file_atomic(os.path.join(path, PLAYTIME_SNAPSHOT_FILE),
+                      json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    log_path = os.path.join(path, PLAYTIME_LOG_FILE)
+    if os.path.exists(log_path):
+        os.remove(log_path)
+
+
+def record_playtime(source, games):
+    """
+    Acrescenta ao log apenas os jogos cujo tempo de jogo mudou desde a última sincronização
+    da origem. Na primeira sincronização a origem só é registrada como base, sem deltas.
+    Retorna o número de entradas gravadas.
+    """
+    try:
+        return _record_playtime(source, games)
+    except OSError as e:
+        kodi_log(f"Falha ao registrar o histórico de tempo de jogo: {str(e)}")
+        return 0
+
+
+def _record_playtime(source, games):
+    path = get_addon_data_dir()
+    log_path = os.path.join(path, PLAYTIME_LOG_FILE)
+    history = load_history()
+    now = int(time.time())
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    if source not in history["totals"]:
+        baseline = history["totals"].setdefault(source, {})
+        for game in games:
+            appid = str(game.get("appid", ""))
+            baseline[appid] = [to_int(game.get("playtime")), to_int(game.get("LastPlayTime"))]
+            history["names"][appid] = game.get("appName", "")
+        compact_history(history)
+        return 0
+
+    previous = history["totals"][source]
+    lines = []
+    for game in games:
+        appid = str(game.get("appid", ""))
+        playtime = to_int(game.get("playtime"))
+        if appid in previous and previous[appid][0] == playtime:
+            continue
+        old_playtime = previous[appid][0] if appid in previous else playtime
+        entry = [now, source, appid, game.get("appName", ""), playtime,
+                 to_int(game.get("LastPlayTime")), max(playtime - old_playtime, 0)]
+        lines.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+
+    if lines:
+        new_log = not os.path.exists(log_path)
+        with open(log_path, 'a', encoding='utf-8') as f:
+            if new_log:
+                f.write(json.dumps({"log_id": uuid.uuid4().hex}) + "\n")
+            f.write("\n".join(lines) + "\n")
+
+    if os.path.exists(log_path) and os.path.getsize(log_path) > PLAYTIME_COMPACT_BYTES:
+        compact_history()
+    return len(lines)
+
+
+def get_weekly_totals(history, weeks=PLAYTIME_TREND_WEEKS):
+    """
+    Retorna [(semana, minutos)] das últimas `weeks` semanas, da mais recente para a mais antiga.
+    """
+    today = time.time()
+    keys = [week_key(today - 7 * 86400 * i) for i in range(weeks)]
+    return [(key, sum(history["weeks"].get(key, {}).values())) for key in keys]
+
+
+def get_game_trends(history, weeks=PLAYTIME_TREND_WEEKS):
+    """
+    Retorna {appid: [minutos por semana, da mais recente para a mais antiga]} dos jogos
+    jogados nas últimas `weeks` semanas.
+    """
+    today = time.time()
+    keys = [week_key(today - 7 * 86400 * i) for i in range(weeks)]
+    trends = {}
+    for index, key in enumerate(keys):
+        for appid, minutes in history["weeks"].get(key, {}).items():
+            if minutes:
+                trends.setdefault(appid, [0] * weeks)[index] += minutes
+    return trends
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Captura de perfil (cProfile) das rotas do plugin
+
+from .utils import *
+from .cachemanager import CacheManager
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+
+PROFILE_TOP_N = 40
+
+
+def get_cprofiles_dir():
+    # cprofiles, não profiles: "perfil" no addon são os perfis de conta Steam
+    return os.path.join(get_addon_data_dir(), 'cprofiles', '')
+
+
+def prune_cprofiles(profiles_dir, keep):
+    """
+    Remove os perfis mais antigos, mantendo apenas os `keep` mais recentes (.prof e .txt).
+    """
+    stamps = sorted({os.path.splitext(name)[0] for name in os.listdir(profiles_dir)
+                     if name.endswith('.prof') or name.endswith('.txt')})
+    for stamp in stamps[:max(len(stamps) - keep, 0)]:
+        for ext in ('.prof', '.txt'):
+            path = os.path.join(profiles_dir, stamp + ext)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def profile_call(func, *args, route='', keep=10, top_n=PROFILE_TOP_N):
+    """
+    Executa func(*args) sob o cProfile e grava em addon_data/cprofiles um arquivo .prof com
+    data e hora no nome, mais um resumo em texto das `top_n` funções por tempo acumulado.
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        try:
+            profiles_dir = get_cprofiles_dir()
+            if not os.path.isdir(profiles_dir):
+                os.makedirs(profiles_dir)
+
+            action = re.sub(r'[^A-Za-z0-9_]+', '_', route).strip('_') or 'list'
+            stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{int(time.time() * 1000) % 1000:03d}-{action[:40]}'
+            profiler.dump_stats(os.path.join(profiles_dir, stamp + '.prof'))
+
+            summary = io.StringIO()
+            summary.write(f'Rota: {route}\nTempo total: {elapsed * 1000:.1f} ms\n\n')
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(top_n)
+            with open(os.path.join(profiles_dir, stamp + '.txt'), 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+
+            cache_manager = CacheManager()
+            for ext in ('.prof', '.txt'):
+                cache_manager.record('cprofiles', os.path.join(profiles_dir, stamp + ext))
+            cache_manager.save()
+
+            prune_cprofiles(profiles_dir, keep)
+            kodi_log(f"Perfil gravado: {stamp}.prof ({elapsed * 1000:.1f} ms)")
+        except OSError as e:
+            kodi_log(f"Falha ao gravar o perfil: {str(e)}")
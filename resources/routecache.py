@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Cache das listagens já montadas (rótulos, artes, informações e URLs de cada item)
+
+from .utils import *
+from .cachemanager import CacheManager
+
+import hashlib
+import json
+import os
+import shutil
+import xbmcaddon
+import xbmcvfs
+
+ROUTE_CACHE_DIR = '_routes'
+# Pastas de arte das pastas de tags (ver Main.get_art_for_folder)
+FOLDER_ART_SETTINGS = ('poster_path', 'icons_path', 'banners_path', 'fanarts_path', 'clearlogos_path')
+
+
+def get_route_cache_dir():
+    return os.path.join(get_addon_data_dir(), ROUTE_CACHE_DIR)
+
+
+def _folder_mtime(path):
+    """
+    Maior mtime entre a pasta e os arquivos dentro dela, numa única listagem (scandir). O mtime
+    da pasta cobre imagens adicionadas, removidas ou renomeadas; o dos arquivos, imagens
+    regravadas no lugar, que não mudam o da pasta.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    mtime = max(mtime, entry.stat().st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        return 0
+    return mtime
+
+
+def get_folder_art_stamps(addon=None):
+    """
+    [pasta, mtime] de cada pasta de arte configurada (ver _folder_mtime).
+    """
+    addon = addon or xbmcaddon.Addon()
+    stamps = []
+    for setting_id in FOLDER_ART_SETTINGS:
+        path = addon.getSetting(setting_id)
+        stamps.append([path, _folder_mtime(xbmcvfs.translatePath(path)) if path else 0])
+    return stamps
+
+
+def get_route_key(catalog_files, settings):
+    """
+    Chave de validade de uma listagem: hash do conteúdo dos catálogos listados (ver
+    get_catalog_hash), configurações que mudam o resultado e o estado das pastas de arte.
+    """
+    path = get_addon_data_dir()
+    versions = load_catalog_versions(path)
+    state = [
+        [get_catalog_hash(path, file_name, versions) for file_name in catalog_files],
+        settings,
+        get_folder_art_stamps(),
+    ]
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _route_path(route):
+    return os.path.join(get_route_cache_dir(), hashlib.sha1(route.encode('utf-8')).hexdigest()[:20] + '.json')
+
+
+def load_route(route, key):
+    """
+    Itens gravados para a rota, ou None se não houver ou se a chave não bater.
+    """
+    path = _route_path(route)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("key") != key:
+        return None
+    CacheManager().log_access('routes', path, True)
+    return cached["items"]
+
+
+def save_route(route, key, items):
+    path = _route_path(route)
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        write_file_atomic(path, json.dumps({"key": key, "route": route, "items": items},
+                                           ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        CacheManager().log_access('routes', path, False)
+    except OSError as e:
+        kodi_log(f"Falha ao salvar o cache da listagem: {str(e)}")
+
+
+def invalidate_route_cache():
+    """
+    Descarta todas as listagens gravadas. As chaves já mudam com os catálogos; isto remove
+    de uma vez os arquivos que deixaram de valer.
+    """
+    shutil.rmtree(get_route_cache_dir(), ignore_errors=True)
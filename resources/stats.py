@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Resumo pré-calculado da biblioteca (totais por origem, tag e tempo de jogo)
+
+from .utils import *
+from .artindex import get_dir_index
+from .dedup import with_merged
+
+import json
+import os
+import re
+import time
+import xbmcaddon
+
+LIBRARY_STATS_FILE = '_library_stats.json'
+STATS_TOP_TAGS = 10
+
+
+def _game_tags(game):
+    tags = game.get("tags") or {}
+    return list(tags.values()) if isinstance(tags, dict) else [tags]
+
+
+def get_steamapps_dirs(library_cache=None):
+    """
+    Pastas steamapps da instalação: a principal (ao lado de appcache/librarycache) e as
+    bibliotecas extras listadas em libraryfolders.vdf.
+    """
+    if library_cache is None:
+        library_cache = xbmcaddon.Addon().getSetting('library_cache')
+    if not library_cache:
+        return []
+    steamapps = os.path.join(os.path.dirname(os.path.dirname(os.path.normpath(library_cache))), 'steamapps')
+    dirs = [steamapps]
+    try:
+        with open(os.path.join(steamapps, 'libraryfolders.vdf'), 'r', encoding='utf-8', errors='replace') as f:
+            for path in re.findall(r'"path"\s+"([^"]+)"', f.read()):
+                folder = os.path.join(path.replace('\\\\', '\\'), 'steamapps')
+                if os.path.normcase(folder) != os.path.normcase(steamapps):
+                    dirs.append(folder)
+    except OSError:
+        pass
+    return dirs
+
+
+def get_installed_appids(library_cache=None):
+    """
+    Appids instalados, pelos arquivos appmanifest_<appid>.acf (uma leitura de cada pasta).
+    """
+    installed = set()
+    for directory in get_steamapps_dirs(library_cache):
+        for name in get_dir_index(directory):
+            if name.startswith('appmanifest_') and name.endswith('.acf'):
+                installed.add(name[len('appmanifest_'):-len('.acf')])
+    return installed
+
+
+def compute_source_stats(games, installed=None):
+    """
+    Agregados de uma origem. Com installed=None todos os jogos contam como instalados
+    (atalhos Non-Steam apontam para jogos locais).
+    """
+    stats = {"games": 0, "installed": 0, "played": 0, "playtime": 0, "tags": {}}
+    for game in games:
+        if game.get("duplicate_of"):
+            continue
+        playtime = to_int(game.get("playtime"))
+        stats["games"] += 1
+        stats["playtime"] += playtime
+        if playtime:
+            stats["played"] += 1
+        if installed is None or str(game.get("appid")) in installed:
+            stats["installed"] += 1
+        for tag in _game_tags(with_merged(game)):
+            if not tag:
+                continue
+            tag_stats = stats["tags"].setdefault(tag, [0, 0])
+            tag_stats[0] += 1
+            tag_stats[1] += playtime
+    return stats
+
+
+def _combine(sources):
+    totals = {"games": 0, "installed": 0, "played": 0, "playtime": 0, "tags": {}}
+    for stats in sources.values():
+        for field in ("games", "installed", "played", "playtime"):
+            totals[field] += stats[field]
+        for tag, (count, playtime) in stats["tags"].items():
+            tag_stats = totals["tags"].setdefault(tag, [0, 0])
+            tag_stats[0] += count
+            tag_stats[1] += playtime
+
+    tags = totals.pop("tags")
+    totals["average_playtime"] = totals["playtime"] // totals["played"] if totals["played"] else 0
+    totals["tags_by_games"] = sorted(([tag, count] for tag, (count, _) in tags.items()),
+                                     key=lambda item: -item[1])[:STATS_TOP_TAGS]
+    totals["tags_by_playtime"] = sorted(([tag, playtime] for tag, (_, playtime) in tags.items() if playtime),
+                                        key=lambda item: -item[1])[:STATS_TOP_TAGS]
+    totals["tag_count"] = len(tags)
+    return totals
+
+
+def update_library_stats(source, games, installed=None):
+    """
+    Atualiza, ao final de uma sincronização, apenas a parte da origem `source` no resumo e
+    recalcula os totais a partir das partes já gravadas, sem reler os catálogos.
+    """
+    path = get_addon_data_dir()
+    stats_path = os.path.join(path, LIBRARY_STATS_FILE)
+    summary = load_json(stats_path, {})
+    sources = summary.get("sources", {})
+    sources[source] = compute_source_stats(games, installed)
+
+    summary = {"updated": int(time.time()), "sources": sources, "totals": _combine(sources)}
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        write_file_atomic(stats_path, json.dumps(summary, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    except OSError as e:
+        kodi_log(f"Falha ao salvar o resumo da biblioteca: {str(e)}")
+
+
+def load_library_stats():
+    return load_json(os.path.join(get_addon_data_dir(), LIBRARY_STATS_FILE), {})
+
+
+def source_label(source):
+    """
+    Nome de exibição de uma origem ("steam", "non_steam_p2"...).
+    """
+    match = re.match(r'(non_steam|steam)(?:_p(\d+))?$', source)
+    kind, profile = match.groups() if match else (source, None)
+    label = "Non-Steam" if kind == "non_steam" else "Steam"
+    return f"{label} (Perfil {profile})" if profile else label
@@ -1,8 +1,20 @@
 from .utils import *
+from .metrics import SyncMetrics
+from .widgets import update_widgets
+from .playtime import record_playtime
+from .stats import update_library_stats, get_installed_appids
+from .artindex import art_exists
+from .imageprobe import get_image_prober, pick_art
+from .artcache import downscale_catalog_art
+from .dedup import commit_catalogs, load_catalog_file
+from .journal import merge_partial_catalog
+from .pathroots import get_path_roots
+from .appinfo import AppInfo
 
 import os
 import json
 import requests
+import struct
 import time
 import xbmc
 import xbmcaddon
@@ -10,6 +22,48 @@ import xbmcgui
 import xbmcvfs
 
 
+MAX_PROFILES = 4
+
+# Campos do GetOwnedGames usados pelo addon; o resto é descartado assim que cada jogo chega
+OWNED_GAME_FIELDS = ('appid', 'name', 'playtime_forever', 'rtime_last_played')
+OWNED_GAMES_CHUNK_SIZE = 64 * 1024
+
+# Campos preenchidos por resolve_game_assets, gravados no diário da sincronização
+RESOLVED_GAME_FIELDS = ('capsule', 'hero', 'logo', 'header', 'icon', 'banner', 'tags')
+
+
+class SteamProfile:
+    """
+    Conta Steam configurada no addon. O perfil 1 usa as configurações originais e grava nos
+    catálogos steam_games.json/non_steam_games.json; os demais gravam em catálogos próprios.
+    """
+    def __init__(self, number, name, steam_user_id, steam_api_key, steam_grid, shortcuts_vdf):
+        self.number = number
+        self.name = name or f"Perfil {number}"
+        self.steam_user_id = steam_user_id
+        self.steam_api_key = steam_api_key
+        self.steam_grid = steam_grid
+        self.shortcuts_vdf = shortcuts_vdf
+
+    @property
+    def suffix(self):
+        return "" if self.number == 1 else f"_p{self.number}"
+
+    @property
+    def steam_catalog(self):
+        return f"steam_games{self.suffix}.json"
+
+    @property
+    def non_steam_catalog(self):
+        return f"non_steam_games{self.suffix}.json"
+
+    def source(self, kind):
+        """
+        Nome da origem ("steam"/"non_steam") deste perfil, usado em travas, métricas e widgets.
+        """
+        return f"{kind}{self.suffix}"
+
+
 class PluginSettings:
     def __init__(self):
         self.addon = xbmcaddon.Addon(id='plugin.program.steamgames')
@@ -17,6 +71,16 @@ class PluginSettings:
         self.nfo_path = self.addon.getSetting('nfo_files')
         self.steam_user_id = self.addon.getSetting('steam_user_id')
         self.steam_api_key = self.addon.getSetting('steam_api_key')
+        self.profiles = self.load_profiles()
+        try:
+            self.listing_profile = int(self.addon.getSetting('listing_profile') or 0)
+        except ValueError:
+            self.listing_profile = 0
+        self.cprofile = self.addon.getSetting('cprofile') == 'true'
+        try:
+            self.cprofile_keep = int(self.addon.getSetting('cprofile_keep') or 10)
+        except ValueError:
+            self.cprofile_keep = 10
 
         if not self.steam_user_id or not self.steam_api_key:
             self.show_error("Erro: Steam User ID ou API Key não configurados corretamente.")
@@ -26,22 +90,68 @@ class PluginSettings:
             self.show_error("Erro: Caminho do Library Cache inválido ou não configurado.")
             sys.exit(1)
 
+    def load_profiles(self):
+        """
+        Lista os perfis configurados: o perfil principal e os perfis extras com User ID preenchido.
+        """
+        profiles = [SteamProfile(
+            1,
+            self.addon.getSetting('profile1_name'),
+            self.steam_user_id,
+            self.steam_api_key,
+            self.addon.getSetting('steam_grid'),
+            self.addon.getSetting('shortcuts_vdf')
+        )]
+        for number in range(2, MAX_PROFILES + 1):
+            steam_user_id = self.addon.getSetting(f'profile{number}_steam_user_id')
+            if not steam_user_id:
+                continue
+            profiles.append(SteamProfile(
+                number,
+                self.addon.getSetting(f'profile{number}_name'),
+                steam_user_id,
+                self.addon.getSetting(f'profile{number}_steam_api_key') or self.steam_api_key,
+                self.addon.getSetting(f'profile{number}_steam_grid'),
+                self.addon.getSetting(f'profile{number}_shortcuts_vdf')
+            ))
+        return profiles
+
+    def get_profile(self, number):
+        for profile in self.profiles:
+            if profile.number == number:
+                return profile
+        return None
+
     def show_error(self, message):
         dialog = xbmcgui.Dialog()
         dialog.notification("Erro", message, xbmcgui.NOTIFICATION_ERROR, 5000)
 
 class SteamAPI:
-    def __init__(self, steam_user_id, steam_api_key):
+    def __init__(self, steam_user_id, steam_api_key, steam_grid=None):
         self.addon = xbmcaddon.Addon(id='plugin.program.steamgames')
         self.library_cache = self.addon.getSetting('library_cache')
-        self.steam_grid = self.addon.getSetting('steam_grid')
+        self.steam_grid = self.addon.getSetting('steam_grid') if steam_grid is None else steam_grid
         self.steam_user_id = steam_user_id
         self.steam_api_key = steam_api_key
         self.api_url_owned_games = "http://api.steampowered.com/IPlayerService/GetOwnedGames/v1/"
-        self.assets_dir = xbmcvfs.translatePath('special://userdata/addon_data/plugin.program.steamgames/assets/')
-        self.json_dir = xbmcvfs.translatePath('special://userdata/addon_data/plugin.program.steamgames/')
+        self.assets_dir = os.path.join(get_addon_data_dir(), 'assets', '')
+        self.json_dir = get_addon_data_dir()
+        self.metrics = SyncMetrics("steam")
+        self.prober = None
+        self.appinfo = None
 
-    def get_owned_games(self):
+    def get_owned_games(self, metrics=None, dialog_progress=None, journal=None, partial=None):
+        """
+        Busca os jogos da conta e resolve as artes de cada um. Retorna None se falhar ou for
+        cancelado. Um dialog_progress externo pode ser passado (ex.: sincronização conjunta).
+        Com um SyncJournal, os jogos resolvidos são registrados por lote e os de uma execução
+        interrompida são reaproveitados; os concluídos antes de um cancelamento ficam na
+        lista `partial`, se informada.
+        """
+        metrics = metrics or SyncMetrics("steam")
+        self.metrics = metrics
+        self.prober = get_image_prober(metrics)
+        self.appinfo = AppInfo()
         params = {
             'steamid': self.steam_user_id,
             'key': self.steam_api_key,
@@ -49,92 +159,157 @@ class SteamAPI:
             'include_appinfo': 'true'
         }
 
-        dialog_progress = xbmcgui.DialogProgress()
-        dialog_progress.create("Buscando jogos", "Por favor, aguarde enquanto buscamos os jogos...")
+        if dialog_progress is None:
+            dialog_progress = xbmcgui.DialogProgress()
+            dialog_progress.create("Buscando jogos", "Por favor, aguarde enquanto buscamos os jogos...")
 
         try:
-            response = requests.get(self.api_url_owned_games, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            if 'response' in data and 'games' in data['response']:
-                games = data['response']['games']
-                total_games = len(games)
-
-                for i, game in enumerate(games):
-                    game_name = game.get('name', f"Game_{game['appid']}")
-                    game['name'] = game_name
-                    
+            games = []
+            for i, (game, total_games) in enumerate(self.iter_owned_games(params, metrics)):
+                # Sem nome na resposta da API (ex.: app removido da loja), usa o do appinfo.vdf
+                game_name = game.get('name') or self.get_app_common(game['appid']).get('name') or f"Game_{game['appid']}"
+                game['name'] = game_name
+
+                resumed = journal.get(game['appid'], game_name) if journal else None
+                if resumed is None:
                     time.sleep(0.2)
-                    
-                    dialog_progress.update(int((i / total_games) * 100),
-                                           f"Atualizando sua lista de jogos: {game_name} {i + 1} de {total_games}")
-
-                    # Obter imagens do diretório library_cache
-                    appid = game['appid']
-                    image_paths = self.get_images_from_library_cache(appid)
-
-                    # Definir os valores de capsule, hero, logo, header, icon com os valores encontrados em library_cache
-                    game['capsule'] = image_paths.get('capsule', None)
-                    game['hero'] = image_paths.get('hero', None)
-                    game['logo'] = image_paths.get('logo', None)
-                    game['header'] = image_paths.get('header', None)
-                    game['icon'] = image_paths.get('icon', None)
-                    game['tags'] = {}
-
-                    # Agora substituir os valores com imagens do steam_grid, se encontradas
-                    steam_grid_images = self.get_steam_grid_images(appid)
-                    game['capsule'] = steam_grid_images.get('steam_grid_p', game.get('capsule', None))
-                    game['hero'] = steam_grid_images.get('steam_grid__hero', game.get('hero', None))
-                    game['logo'] = steam_grid_images.get('steam_grid__logo', game.get('logo', None))
-
-                    # Caso a imagem no steam_grid não seja encontrada, o valor original de library_cache é mantido
-                    if not steam_grid_images.get('steam_grid_p'):
-                        game['capsule'] = game.get('capsule', None)
-                    if not steam_grid_images.get('steam_grid__hero'):
-                        game['hero'] = game.get('hero', None)
-                    if not steam_grid_images.get('steam_grid__logo'):
-                        game['logo'] = game.get('logo', None)
-
-                    if dialog_progress.iscanceled():
-                        dialog_progress.close()
-                        return None
-
-                dialog_progress.close()
-                return games
-            else:
-                raise ValueError("A resposta da Steam não contém jogos válidos.")
+                
+                dialog_progress.update(int((i / total_games) * 100) if total_games else 0,
+                                       f"Atualizando sua lista de jogos: {game_name} {i + 1} de {total_games or '?'}")
+
+                if resumed is not None:
+                    game.update(resumed)
+                    metrics.cache("journal", True)
+                else:
+                    with metrics.phase("asset_resolution"):
+                        self.resolve_game_assets(game)
+                    if journal:
+                        metrics.cache("journal", False)
+                        journal.add(game['appid'], game_name, {field: game[field] for field in RESOLVED_GAME_FIELDS})
+                games.append(game)
+                if partial is not None:
+                    partial.append(game)
+
+                if dialog_progress.iscanceled():
+                    dialog_progress.close()
+                    return None
+
+            metrics.add("games", len(games))
+            dialog_progress.close()
+            return games
+        except ValueError:
+            dialog_progress.close()
+            raise ValueError("A resposta da Steam não contém jogos válidos.")
         except requests.exceptions.RequestException as e:
             dialog = xbmcgui.Dialog()
             dialog.notification("Erro", f"Falha na requisição: {str(e)}", xbmcgui.NOTIFICATION_ERROR, 5000)
             dialog_progress.close()
             return None
+        finally:
+            if self.appinfo:
+                self.appinfo.close()
+            if self.prober:
+                self.prober.save()
+            if journal:
+                metrics.add("resumed", journal.resumed)
+                journal.flush()
+
+    def iter_owned_games(self, params, metrics):
+        """
+        Lê a resposta do GetOwnedGames em partes e gera cada jogo assim que ele chega, já
+        reduzido aos campos de OWNED_GAME_FIELDS, junto com o total informado em game_count.
+        A resposta completa nunca fica inteira na memória.
+        """
+        header = {"game_count": 0}
+
+        def read_game_count(prefix):
+            match = re.search(r'"game_count"\s*:\s*(\d+)', prefix)
+            if match:
+                header["game_count"] = int(match.group(1))
+
+        def read_chunks(response):
+            for chunk in response.iter_content(chunk_size=OWNED_GAMES_CHUNK_SIZE):
+                metrics.add("bytes_read", len(chunk))
+                yield chunk
+
+        with metrics.phase("api_fetch"):
+            response = requests.get(self.api_url_owned_games, params=params, stream=True)
+            response.raise_for_status()
+
+        with response:
+            items = iter_json_array_items(read_chunks(response), 'games', read_game_count)
+            while True:
+                with metrics.phase("api_fetch"):
+                    game = next(items, None)
+                if game is None:
+                    return
+                yield {field: game[field] for field in OWNED_GAME_FIELDS if field in game}, header["game_count"]
+
+    def resolve_game_assets(self, game):
+        """
+        Preenche os campos de arte do jogo com as imagens do steam_grid e do library_cache.
+        As imagens do steam_grid têm prioridade; com a validação ativa, arquivos corrompidos
+        são descartados e vence o candidato de proporção mais adequada ao campo.
+        """
+        appid = game['appid']
+        library_images = self.get_images_from_library_cache(appid)
+        steam_grid_images = self.get_steam_grid_images(appid)
+
+        candidates = {
+            'capsule': steam_grid_images['p'] + library_images['capsule'],
+            'hero': steam_grid_images['_hero'] + library_images['hero'],
+            'logo': steam_grid_images['_logo'] + library_images['logo'],
+            'header': library_images['header'],
+            'icon': library_images['icon'],
+        }
+        for slot, paths in candidates.items():
+            art = pick_art(self.prober, paths, slot)
+            game[slot] = self.to_special_path(art) if art else None
+
+        # Banner: hero ou header, o que tiver a proporção mais próxima
+        banner = pick_art(self.prober, [p for p in (game['hero'], game['header']) if p], 'banner')
+        game['banner'] = banner
+        game['tags'] = {}
+
+    def get_app_common(self, appid):
+        """
+        Bloco 'common' do appinfo.vdf local (nome, tipo...), ou {} se o arquivo não estiver
+        disponível ou não tiver o app.
+        """
+        if self.appinfo is None:
+            return {}
+        try:
+            common = self.appinfo.get_common(appid)
+        except (OSError, ValueError, struct.error) as e:
+            kodi_log(f"appinfo.vdf ignorado: {str(e)}")
+            self.appinfo.close()
+            self.appinfo = None
+            return {}
+        self.metrics.cache("appinfo", bool(common))
+        return common
 
     def get_steam_grid_images(self, appid):
         """Procura imagens na pasta steam_grid que correspondam ao appid."""
-        
-        # Obtém o caminho configurado para a pasta steam_grid
         image_types = ['p', '_logo', '_hero']
-        image_paths = {}
+        image_paths = {image_type: [] for image_type in image_types}
+
+        if not self.steam_grid:
+            return image_paths
 
         for image_type in image_types:
-            file_path = os.path.join(self.steam_grid, f"{appid}{image_type}.jpg")
-            
-            if xbmcvfs.exists(file_path):
-                image_paths[f"steam_grid_{image_type}"] = self.to_special_path(file_path)
-            
-            else:
-                # Verificar outras extensões comuns
-                for ext in ['.png', '.jpeg', '.bmp', '.gif']:
-                    alternate_path = file_path.replace('.jpg', ext)
-                    if xbmcvfs.exists(alternate_path):
-                        image_paths[f"steam_grid_{image_type}"] = self.to_special_path(alternate_path)
+            # Verifica .jpg e depois as outras extensões comuns, consultando o índice do diretório
+            for ext in ['.jpg', '.png', '.jpeg', '.bmp', '.gif']:
+                file_name = f"{appid}{image_type}{ext}"
+                self.metrics.add("art_lookups")
+                if art_exists(self.steam_grid, file_name):
+                    image_paths[image_type].append(os.path.join(self.steam_grid, file_name))
+                    if self.prober is None:
                         break
 
         return image_paths
 
     def get_images_from_library_cache(self, appid):
-        """Busca as imagens de um jogo no diretório Library Cache, caso não encontre na steam_grid."""
+        """Busca as imagens de um jogo no diretório Library Cache."""
         image_types = {
             "header": f"{appid}_header.jpg",
             "capsule": f"{appid}_library_600x900.jpg",
@@ -145,11 +320,13 @@ class SteamAPI:
 
         image_paths = {}
         for image_type, filename in image_types.items():
-            file_path_cache = os.path.join(self.library_cache, filename)
-            if xbmcvfs.exists(file_path_cache):
-                image_paths[image_type] = self.to_special_path(file_path_cache)
+            self.metrics.add("art_lookups")
+            if art_exists(self.library_cache, filename):
+                image_paths[image_type] = [os.path.join(self.library_cache, filename)]
+                self.metrics.cache("library_cache", True)
             else:
-                image_paths[image_type] = None
+                image_paths[image_type] = []
+                self.metrics.cache("library_cache", False)
 
         return image_paths
 
@@ -159,19 +336,54 @@ class SteamAPI:
 
 class GameSaver:
     def __init__(self):
-        self.save_json_path = xbmcvfs.translatePath('special://userdata/addon_data/plugin.program.steamgames/')
+        self.save_json_path = get_addon_data_dir()
 
-    def save_games(self, games):
+    def save_games(self, games, metrics=None, partial=False):
         """
         Salva os jogos Steam em um arquivo JSON, completando os dados com informações dos arquivos NFO.
+        Com partial=True (sincronização cancelada), os jogos são gravados por cima do catálogo anterior.
         """
         if not games:
             return
 
+        metrics = metrics or SyncMetrics("steam")
+
         if not xbmcvfs.exists(self.save_json_path):
             xbmcvfs.mkdirs(self.save_json_path)
 
-        file_path = os.path.join(self.save_json_path, "steam_games.json")
+        steam_games = self.build_catalog(games, metrics)
+        if partial:
+            steam_games = merge_partial_catalog(
+                load_catalog_file(self.save_json_path, "steam_games.json", "steam"), steam_games)
+        downscale_catalog_art(steam_games, metrics)
+
+        # Salva o JSON atualizado (apenas se o conteúdo mudou)
+        file_names = {"steam": "steam_games.json", "non_steam": "non_steam_games.json"}
+        catalogs, written = commit_catalogs(self.save_json_path, {"steam": steam_games}, file_names,
+                                            get_path_roots(), metrics)
+        metrics.add("bytes_written", written["steam_games.json"])
+
+        with metrics.phase("widgets"):
+            update_widgets("steam", steam_games.values())
+            if written.get("non_steam_games.json"):
+                update_widgets("non_steam", catalogs["non_steam_games.json"]["non_steam"].values())
+        with metrics.phase("playtime_log"):
+            metrics.add("playtime_changes", record_playtime("steam", steam_games.values()))
+        with metrics.phase("stats"):
+            update_library_stats("steam", steam_games.values(), get_installed_appids())
+            if written.get("non_steam_games.json"):
+                update_library_stats("non_steam", catalogs["non_steam_games.json"]["non_steam"].values())
+
+        if partial:
+            xbmcgui.Dialog().notification("Cancelado", f"{len(games)} jogos Steam já processados foram salvos.",
+                                          xbmcgui.NOTIFICATION_WARNING, 5000)
+        else:
+            xbmcgui.Dialog().notification("Sucesso", "Jogos Steam salvos com sucesso.", xbmcgui.NOTIFICATION_INFO, 5000)
+
+    def build_catalog(self, games, metrics):
+        """
+        Monta o catálogo Steam a partir dos jogos da API, completando com os dados dos NFOs.
+        """
         nfo_path = PluginSettings().nfo_path  # Obtém o caminho configurado para os NFOs
 
         steam_games = {}
@@ -180,27 +392,28 @@ class GameSaver:
                 "appid": game.get("appid"),
                 "appName": game.get("name", ""),
                 "LastPlayTime": game.get("rtime_last_played", ""),
+                "playtime": game.get("playtime_forever", 0),
                 "capsule": game.get("capsule"),
                 "icon": game.get("icon"),
                 "hero": game.get("hero"),
                 "logo": game.get("logo"),
                 "header": game.get("header"),
+                "banner": game.get("banner"),
                 "tags": game.get("tags", {})
             }
 
             # Verifica e lê o arquivo .nfo correspondente
             if nfo_path:
-                nfo_file = os.path.join(nfo_path, f"{game_data['appName']}.nfo")
-                nfo_data = read_nfo_data(nfo_file)
-                game_data.update(nfo_data)
+                with metrics.phase("nfo_parsing"):
+                    nfo_file = os.path.join(nfo_path, f"{game_data['appName']}.nfo")
+                    nfo_data = read_nfo_data(nfo_file)
+                    game_data.update(nfo_data)
+                metrics.add("fs_probes")
+                metrics.cache("nfo", bool(nfo_data))
 
             steam_games[str(idx)] = game_data
 
-        # Salva o JSON atualizado
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump({"steam": steam_games}, f, ensure_ascii=False, indent=4)
-
-        xbmcgui.Dialog().notification("Sucesso", "Jogos Steam salvos com sucesso.", xbmcgui.NOTIFICATION_INFO, 5000)
+        return steam_games
 
 
 
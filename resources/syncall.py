@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# Sincronização conjunta Steam + Non-Steam
+
+from .utils import *
+from .steam import SteamAPI, GameSaver
+from .metrics import SyncMetrics
+from .widgets import update_widgets
+from .playtime import record_playtime
+from .stats import update_library_stats, get_installed_appids
+from .artcache import downscale_catalog_art
+from .dedup import commit_catalogs, load_catalog_file
+from .journal import SyncJournal, merge_partial_catalog
+from .pathroots import get_path_roots
+
+import os
+import threading
+import xbmc
+import xbmcgui
+
+
+class StageProgress:
+    """
+    Substitui o DialogProgress dentro de uma etapa que roda em outra thread: guarda o
+    percentual e a mensagem para o diálogo único e consulta o token de cancelamento comum.
+    """
+
+    def __init__(self, name, cancel_event):
+        self.name = name
+        self.cancel_event = cancel_event
+        self.percent = 0
+        self.message = ""
+
+    def update(self, percent, message=""):
+        self.percent = percent
+        self.message = message
+
+    def iscanceled(self):
+        return self.cancel_event.is_set()
+
+    def close(self):
+        self.percent = 100
+
+
+class SyncAll:
+    """
+    Executa as sincronizações Steam (rede) e Non-Steam (disco) ao mesmo tempo, com um único
+    diálogo de progresso e cancelamento compartilhado. Os dois catálogos e os índices derivados
+    são gravados juntos, uma única vez, ao final.
+    """
+
+    def __init__(self, settings, non_steam, profile=None, cancel_event=None):
+        self.settings = settings
+        self.non_steam = non_steam
+        self.profile = profile or settings.profiles[0]
+        self.cancel_event = cancel_event or threading.Event()
+        self.catalogs = {}
+        self.partial = {}
+        self.journals = {}
+        self.errors = {}
+        self.threads = []
+        label = "" if self.profile.number == 1 else f"{self.profile.name} "
+        self.metrics = {
+            "steam": SyncMetrics(self.profile.source("steam")),
+            "non_steam": SyncMetrics(self.profile.source("non_steam")),
+        }
+        self.progress = {
+            "steam": StageProgress(f"{label}Steam", self.cancel_event),
+            "non_steam": StageProgress(f"{label}Non-Steam", self.cancel_event),
+        }
+
+    def run_steam_stage(self):
+        metrics = self.metrics["steam"]
+        steam_api = SteamAPI(self.profile.steam_user_id, self.profile.steam_api_key, self.profile.steam_grid)
+        journal = self.journals["steam"] = SyncJournal(self.profile.source("steam"), self.profile.steam_user_id)
+        partial = []
+        games = steam_api.get_owned_games(metrics, self.progress["steam"], journal, partial)
+        if games is None:
+            if not self.cancel_event.is_set():
+                self.errors["steam"] = "Falha ao buscar os jogos Steam."
+            elif partial:
+                self.partial["steam"] = GameSaver().build_catalog(partial, metrics)
+            return
+        catalog = GameSaver().build_catalog(games, metrics)
+        downscale_catalog_art(catalog, metrics, self.progress["steam"])
+        self.catalogs["steam"] = catalog
+
+    def run_non_steam_stage(self):
+        metrics = self.metrics["non_steam"]
+        non_steam_url_path = self.non_steam.get_sync_paths()[1]
+        shortcuts_vdf_path = self.profile.shortcuts_vdf
+        if not shortcuts_vdf_path and self.profile.number != 1:
+            # Perfil sem atalhos Non-Steam configurados
+            self.metrics.pop("non_steam")
+            return
+        if not os.path.exists(shortcuts_vdf_path):
+            self.errors["non_steam"] = f"Arquivo não encontrado: {shortcuts_vdf_path}"
+            return
+        journal = self.journals["non_steam"] = SyncJournal(self.profile.source("non_steam"), shortcuts_vdf_path)
+        partial = {}
+        # O catálogo Steam gravado antes, para os atalhos de jogos Steam usarem as mesmas artes
+        path = get_addon_data_dir()
+        steam_catalog = load_catalog_file(path, self.profile.steam_catalog, "steam")
+        games = self.non_steam.build_non_steam_games(
+            shortcuts_vdf_path, non_steam_url_path, metrics, self.progress["non_steam"], self.profile.steam_grid,
+            journal, partial, steam_catalog)
+        if games is not None:
+            downscale_catalog_art(games, metrics, self.progress["non_steam"])
+            self.catalogs["non_steam"] = games
+        elif partial and self.cancel_event.is_set():
+            self.partial["non_steam"] = partial
+
+    def _run_stage(self, name, stage):
+        try:
+            stage()
+        except Exception as e:
+            self.errors[name] = str(e)
+            kodi_log(f"Erro na sincronização {name}: {str(e)}")
+        finally:
+            self.progress[name].close()
+
+    def start(self):
+        self.threads = [
+            threading.Thread(target=self._run_stage, args=("steam", self.run_steam_stage), daemon=True),
+            threading.Thread(target=self._run_stage, args=("non_steam", self.run_non_steam_stage), daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def run(self):
+        """
+        Executa as duas etapas e grava o resultado. Retorna o status geral.
+        """
+        self.start()
+        wait_stages(self.threads, list(self.progress.values()), self.cancel_event)
+        status = self.finish()
+        notify_sync_status(status, self.errors.values())
+        return status
+
+    def finish(self):
+        """
+        Grava o resultado das etapas já concluídas e registra as métricas. Retorna o status.
+        """
+        if self.cancel_event.is_set():
+            # Grava o que já foi concluído; o diário das etapas interrompidas fica para a
+            # próxima execução retomar de onde parou
+            self.commit_partial()
+            for metrics in self.metrics.values():
+                metrics.save("cancelled")
+            return "cancelled"
+
+        self.commit()
+
+        for name, metrics in self.metrics.items():
+            metrics.save("error" if name in self.errors else "ok")
+        if self.errors:
+            return "partial" if self.catalogs else "error"
+        return "ok"
+
+    def commit_partial(self):
+        """
+        Junta os jogos concluídos pelas etapas canceladas aos catálogos gravados antes e grava
+        tudo junto com as etapas que chegaram a terminar.
+        """
+        path = get_addon_data_dir()
+        for name, partial in self.partial.items():
+            file_name = self.profile.steam_catalog if name == "steam" else self.profile.non_steam_catalog
+            self.catalogs[name] = merge_partial_catalog(load_catalog_file(path, file_name, name), partial)
+        self.commit()
+
+    def commit(self):
+        """
+        Grava juntos os catálogos das etapas que terminaram e atualiza os índices derivados.
+        """
+        if not self.catalogs:
+            return
+        path = get_addon_data_dir()
+        file_names = {"steam": self.profile.steam_catalog, "non_steam": self.profile.non_steam_catalog}
+
+        catalogs, written = commit_catalogs(path, self.catalogs, file_names, get_path_roots(self.profile.steam_grid),
+                                            self.metrics[next(iter(self.catalogs))])
+
+        for name, file_name in file_names.items():
+            if file_name not in catalogs:
+                continue
+            catalog = catalogs[file_name][name]
+            synced = name in self.catalogs
+            # O outro catálogo só é reprocessado se a passada de duplicados o alterou
+            if not synced and not written[file_name]:
+                continue
+            metrics = self.metrics[name] if synced else self.metrics[next(iter(self.catalogs))]
+            if synced:
+                metrics.add("bytes_written", written[file_name])
+            with metrics.phase("widgets"):
+                update_widgets(self.profile.source(name), catalog.values())
+            if name == "steam" and synced:
+                with metrics.phase("playtime_log"):
+                    metrics.add("playtime_changes", record_playtime(self.profile.source(name), catalog.values()))
+            with metrics.phase("stats"):
+                installed = get_installed_appids() if name == "steam" else None
+                update_library_stats(self.profile.source(name), catalog.values(), installed)
+
+        for name in self.catalogs:
+            if name not in self.partial and name in self.journals:
+                self.journals[name].discard()
+
+
+def wait_stages(threads, stages, cancel_event, heading="Sincronizando Tudo"):
+    """
+    Mostra um único diálogo de progresso para todas as etapas enquanto as threads rodam.
+    Cancelar o diálogo sinaliza o token de cancelamento compartilhado.
+    """
+    dialog_progress = xbmcgui.DialogProgress()
+    dialog_progress.create(heading, "Iniciando...")
+    while any(thread.is_alive() for thread in threads):
+        dialog_progress.update(
+            int(sum(stage.percent for stage in stages) / len(stages)),
+            "\n".join(f"{stage.name}: {stage.percent}% {stage.message}" for stage in stages)
+        )
+        if dialog_progress.iscanceled():
+            cancel_event.set()
+        xbmc.sleep(200)
+    for thread in threads:
+        thread.join()
+    dialog_progress.close()
+
+
+def notify_sync_status(status, errors=()):
+    if status == "cancelled":
+        kodi_notify_warn("A sincronização foi cancelada.")
+    elif status == "ok":
+        kodi_notify("Jogos Steam e Non-Steam atualizados com sucesso!")
+    else:
+        kodi_notify_warn(" / ".join(errors) or "Falha na sincronização.")
+
+
+class SyncProfiles:
+    """
+    Sincroniza todos os perfis configurados ao mesmo tempo, cada um no seu próprio catálogo.
+    Os diretórios de arte compartilhados são lidos uma única vez (ver artindex).
+    """
+
+    def __init__(self, settings, non_steam):
+        self.cancel_event = threading.Event()
+        self.runs = [SyncAll(settings, non_steam, profile, self.cancel_event) for profile in settings.profiles]
+
+    def run(self):
+        for sync in self.runs:
+            sync.start()
+        wait_stages(
+            [thread for sync in self.runs for thread in sync.threads],
+            [stage for sync in self.runs for stage in sync.progress.values()],
+            self.cancel_event,
+            "Sincronizando Perfis"
+        )
+        statuses = [sync.finish() for sync in self.runs]
+        errors = [error for sync in self.runs for error in sync.errors.values()]
+
+        if "cancelled" in statuses:
+            status = "cancelled"
+        elif all(s == "ok" for s in statuses):
+            status = "ok"
+        else:
+            status = "partial" if any(sync.catalogs for sync in self.runs) else "error"
+        notify_sync_status(status, errors)
+        return status
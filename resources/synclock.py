@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# Trava entre invocações do plugin para as sincronizações
+
+from .utils import *
+
+import json
+import os
+import threading
+import time
+import uuid
+import xbmc
+
+# As invocações do plugin rodam dentro do mesmo processo do Kodi, então o pid não serve para
+# saber se o dono da trava ainda está vivo. O dono renova o mtime do arquivo periodicamente e
+# uma trava sem renovação há mais de SYNC_LOCK_STALE segundos é considerada abandonada.
+SYNC_LOCK_HEARTBEAT = 5
+SYNC_LOCK_STALE = 60
+SYNC_WAIT_TIMEOUT = 3600
+
+# Trava de quem grava os catálogos: a passada de duplicados das sincronizações (uma Steam e uma
+# Non-Steam podem rodar ao mesmo tempo e as duas regravam os dois arquivos) e a troca das
+# raízes feita pelas listagens. Nunca é usada com run_coalesced, que junta quem chega à
+# execução em andamento.
+CATALOGS_LOCK = "catalogs"
+
+
+class SyncLock:
+    """
+    Trava baseada em arquivo em addon_data, uma por tipo de sincronização. O arquivo é criado
+    já com o dono gravado (ver acquire), então quem o encontra sempre lê um dono completo.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        path = get_addon_data_dir()
+        self.lock_path = os.path.join(path, f'_sync_{name}.lock')
+        self.result_path = os.path.join(path, f'_sync_{name}.result')
+        self.run_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def read_owner(self):
+        try:
+            with open(self.lock_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_stale(self):
+        try:
+            return time.time() - os.path.getmtime(self.lock_path) > SYNC_LOCK_STALE
+        except OSError:
+            return False
+
+    def acquire(self):
+        """
+        Tenta obter a trava. Retorna True se esta invocação passou a ser a dona.
+        """
+        directory = os.path.dirname(self.lock_path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        run_id = uuid.uuid4().hex
+        # O dono é gravado num arquivo temporário e ligado no lugar da trava: o link falha se
+        # ela já existir, como o O_EXCL, e nunca há uma trava vazia, que faria quem aguarda
+        # (wait) não saber de qual execução é o resultado
+        owner_path = write_temp_file(self.lock_path, json.dumps(
+            {"run_id": run_id, "started": int(time.time())}).encode('utf-8'))
+        try:
+            for _ in range(2):
+                try:
+                    os.link(owner_path, self.lock_path)
+                    break
+                except FileExistsError:
+                    stale_owner = self.read_owner()
+                    if not self.is_stale():
+                        return False
+                    self._take_over(stale_owner)
+            else:
+                return False
+        finally:
+            remove_file_quietly(owner_path)
+
+        self.run_id = run_id
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+        return True
+        return False
+
+    def _take_over(self, stale_owner):
+        """
+        Remove uma trava abandonada sem apagar a de outra invocação que a tenha tomado antes:
+        o arquivo é renomeado para um nome único e só é descartado se ainda for o mesmo que
+        foi visto abandonado; senão é devolvido.
+        """
+        aside = f"{self.lock_path}.{uuid.uuid4().hex}"
+        try:
+            os.rename(self.lock_path, aside)
+        except OSError:
+            # Outra invocação já removeu ou renomeou a trava
+            return
+        try:
+            with open(aside, 'r', encoding='utf-8') as f:
+                owner = json.load(f)
+        except (OSError, ValueError):
+            owner = None
+        try:
+            fresh = time.time() - os.path.getmtime(aside) <= SYNC_LOCK_STALE
+        except OSError:
+            fresh = False
+        if fresh or (owner or {}).get("run_id") != (stale_owner or {}).get("run_id"):
+            try:
+                # link falha se outra trava já tiver sido criada no lugar
+                os.link(aside, self.lock_path)
+            except OSError:
+                pass
+        else:
+            kodi_log(f"Removendo trava abandonada: {self.lock_path}")
+        try:
+            os.remove(aside)
+        except OSError:
+            pass
+
+    def _heartbeat(self):
+        while not self._stop.wait(SYNC_LOCK_HEARTBEAT):
+            try:
+                os.utime(self.lock_path)
+            except OSError:
+                # A trava pode estar momentaneamente renomeada por _take_over
+                continue
+
+    def release(self, status):
+        """
+        Registra o resultado da execução para quem estiver aguardando e libera a trava.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        try:
+            write_file_atomic(self.result_path, json.dumps({
+                "run_id": self.run_id,
+                "status": status,
+                "finished": int(time.time())
+            }).encode('utf-8'))
+        except OSError as e:
+            kodi_log(f"Falha ao registrar o resultado da sincronização: {str(e)}")
+        # Só remove a trava se ela ainda for desta execução
+        if (self.read_owner() or {}).get("run_id") == self.run_id:
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+
+    def wait(self, timeout=SYNC_WAIT_TIMEOUT):
+        """
+        Aguarda a execução em andamento terminar e retorna o status registrado por ela.
+        """
+        owner = self.read_owner() or {}
+        run_id = owner.get("run_id")
+        monitor = xbmc.Monitor()
+        deadline = time.time() + timeout
+        while os.path.exists(self.lock_path) and not self.is_stale():
+            if time.time() > deadline or monitor.waitForAbort(0.5):
+                return "timeout"
+
+        try:
+            with open(self.result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return "unknown"
+        if run_id and result.get("run_id") != run_id:
+            return "unknown"
+        return result.get("status", "unknown")
+
+
+def run_coalesced(name, func, *args):
+    """
+    Executa func(*args) com a trava `name`. Se já houver uma execução em andamento, não inicia
+    outra: aguarda a que está rodando e retorna o status dela. func deve retornar o status.
+    """
+    lock = SyncLock(name)
+    if lock.acquire():
+        status = "error"
+        try:
+            status = func(*args) or "ok"
+        finally:
+            lock.release(status)
+        return status
+
+    kodi_notify("Sincronização já em andamento. Aguardando...")
+    status = lock.wait()
+    if status == "ok":
+        kodi_notify("Sincronização em andamento concluída.")
+    else:
+        kodi_notify_warn(f"Sincronização em andamento terminou: {status}")
+    return status
+
+
+def run_exclusive(names, func, *args):
+    """
+    Executa func(*args) segurando todas as travas em `names`. Execuções em andamento de
+    qualquer uma delas são aguardadas antes. func deve retornar o status.
+    """
+    locks = []
+    status = "error"
+    try:
+        for name in names:
+            lock = SyncLock(name)
+            while not lock.acquire():
+                if lock.wait() == "timeout":
+                    return "timeout"
+            locks.append(lock)
+        status = func(*args) or "ok"
+    finally:
+        for lock in reversed(locks):
+            lock.release(status)
+    return status
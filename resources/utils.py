@@ -16,8 +16,10 @@ else:
 # Check what modules are really used and remove not used ones.
 import collections
 import datetime
+import codecs
 import errno
 import fnmatch
+import hashlib
 import io
 import json
 import math
@@ -26,6 +28,7 @@ import re
 import shutil
 import string
 import sys
+import tempfile
 import threading
 import time
 import xml.etree.ElementTree
@@ -138,6 +141,205 @@ def save_timestamp(path):
     except Exception as e:
         kodi_notify_error(f'Error saving timestamp JSON: {str(e)}')
 
+# -------------------------------------------------------------------------------------------------
+# Addon data files
+# -------------------------------------------------------------------------------------------------
+ADDON_DATA_PATH = 'special://userdata/addon_data/plugin.program.steamgames/'
+
+def get_addon_data_dir():
+    return xbmcvfs.translatePath(ADDON_DATA_PATH)
+
+# Reads a JSON state file. Returns `default` if the file is missing or unreadable.
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+# int() for catalog fields, which may be missing, empty or not numeric (returns 0).
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+# -------------------------------------------------------------------------------------------------
+# Catalog files (steam_games.json, non_steam_games.json)
+# -------------------------------------------------------------------------------------------------
+CATALOG_VERSIONS_FILE = '_catalog_versions.json'
+
+def load_catalog_versions(path):
+    return load_json(os.path.join(path, CATALOG_VERSIONS_FILE), {})
+
+# Returns the version number of a catalog file. The number only changes when the catalog
+# content changes, so readers can use it to validate their caches without reading the catalog.
+def get_catalog_version(path, file_name):
+    return load_catalog_versions(path).get(file_name, {}).get('version', 0)
+
+# Returns the content hash of a catalog file for cache keys. The hash recorded by save_catalogs()
+# is trusted only while the file still has the recorded size and mtime; otherwise (version file
+# lost, or a crash between moving the catalog and updating the version file) the file is hashed.
+def get_catalog_hash(path, file_name, versions=None):
+    file_path = os.path.join(path, file_name)
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    entry = (load_catalog_versions(path) if versions is None else versions).get(file_name, {})
+    if entry.get('hash') and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime_ns:
+        return entry['hash']
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# Removes a file, ignoring errors (used to clean up temporary files).
+def remove_file_quietly(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+# Writes `data` to a temporary file with a unique name next to `file_path` and returns its path.
+# Each writer gets its own temporary file, so concurrent writers never write into the same one.
+def write_temp_file(file_path, data):
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(file_path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+    except BaseException:
+        remove_file_quietly(tmp_path)
+        raise
+    return tmp_path
+
+def write_file_atomic(file_path, data):
+    tmp_path = write_temp_file(file_path, data)
+    try:
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        remove_file_quietly(tmp_path)
+        raise
+
+# Serializes a catalog compactly and writes it only if its content changed.
+# The file is written to a temporary file and moved over the old one, so a crash never leaves
+# a truncated catalog behind. Returns the number of bytes written (0 if unchanged).
+def save_catalog(path, file_name, catalog):
+    return save_catalogs(path, {file_name: catalog})[file_name]
+
+# Same as save_catalog() for several catalogs at once. All changed catalogs are serialized and
+# written to temporary files first and only then moved into place, followed by a single update
+# of the version file. Returns a dict {file_name: bytes written}.
+def save_catalogs(path, catalogs):
+    versions = load_catalog_versions(path)
+    pending = []
+    written = {}
+    refreshed = False
+    for file_name, catalog in catalogs.items():
+        data = json.dumps(catalog, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        content_hash = hashlib.sha1(data).hexdigest()
+        file_path = os.path.join(path, file_name)
+        written[file_name] = 0
+
+        if get_catalog_hash(path, file_name, versions) == content_hash:
+            # Unchanged: only brings a stale or missing version record up to date
+            stat = os.stat(file_path)
+            entry = versions.get(file_name, {})
+            if (entry.get('hash'), entry.get('size'), entry.get('mtime')) != (content_hash, stat.st_size, stat.st_mtime_ns):
+                versions[file_name] = {
+                    'hash': content_hash,
+                    'version': entry.get('version', 0) + (0 if entry.get('hash') == content_hash else 1),
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime_ns
+                }
+                refreshed = True
+            continue
+        pending.append((file_name, file_path, data, content_hash))
+
+    if not pending:
+        if refreshed:
+            write_file_atomic(os.path.join(path, CATALOG_VERSIONS_FILE),
+                              json.dumps(versions, separators=(',', ':')).encode('utf-8'))
+        return written
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    temp_paths = []
+    try:
+        for file_name, file_path, data, content_hash in pending:
+            temp_paths.append(write_temp_file(file_path, data))
+    except BaseException:
+        for tmp_path in temp_paths:
+            remove_file_quietly(tmp_path)
+        raise
+    for (file_name, file_path, data, content_hash), tmp_path in zip(pending, temp_paths):
+        os.replace(tmp_path, file_path)
+        versions[file_name] = {
+            'hash': content_hash,
+            'version': versions.get(file_name, {}).get('version', 0) + 1,
+            'size': len(data),
+            'mtime': os.stat(file_path).st_mtime_ns
+        }
+        written[file_name] = len(data)
+
+    write_file_atomic(os.path.join(path, CATALOG_VERSIONS_FILE),
+                      json.dumps(versions, separators=(',', ':')).encode('utf-8'))
+    return written
+
+# Incrementally decodes the objects of the JSON array stored under `key` from an iterable of
+# byte chunks (e.g. response.iter_content()), yielding each item as soon as it is complete.
+# Only the current item is kept in memory. `prefix_callback` receives the text that precedes
+# the array, so small fields that come before it (like "game_count") can be read.
+# Raises ValueError if the key is not found or the JSON is invalid.
+def iter_json_array_items(chunks, key, prefix_callback = None):
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    marker = re.compile(r'"{}"\s*:\s*\['.format(re.escape(key)))
+    buffer = ''
+    in_array = False
+    finished = False
+    chunks = iter(chunks)
+
+    while not finished:
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += utf8.decode(b'', final = True)
+            finished = True
+        else:
+            buffer += utf8.decode(chunk)
+
+        if not in_array:
+            match = marker.search(buffer)
+            if not match:
+                if finished:
+                    raise ValueError('Key "{}" not found in JSON response'.format(key))
+                continue
+            if prefix_callback:
+                prefix_callback(buffer[:match.start()])
+            buffer = buffer[match.end():]
+            in_array = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # Incomplete item: wait for the next chunk
+                if finished:
+                    raise
+                break
+            yield item
+        buffer = buffer[pos:]
+
+    raise ValueError('Unterminated JSON array "{}"'.format(key))
+
 def read_nfo_data(nfo_file):
     """
     Lê um arquivo NFO e retorna os dados estruturados.
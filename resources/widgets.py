@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Listas pré-calculadas para os widgets da tela inicial
+
+from .utils import *
+from .dedup import with_merged
+
+import heapq
+import json
+import os
+import time
+
+WIDGETS_FILE = '_widgets.json'
+WIDGETS_RENDERED_FILE = '_widgets_rendered.json'
+FIRST_SEEN_FILE = '_first_seen.json'
+WIDGET_TOP_K = 25
+WIDGET_TTL = 60
+
+WIDGET_TYPES = {
+    'recently_played': ("Jogados recentemente", 'LastPlayTime'),
+    'most_played': ("Mais jogados", 'playtime'),
+    'recently_added': ("Adicionados recentemente", 'added'),
+}
+
+
+def update_widgets(source, games):
+    """
+    Atualiza as listas top-K de uma origem ("steam" ou "non_steam") ao final da sincronização.
+    Cada lista guarda apenas os campos necessários para renderizar o item.
+    """
+    path = get_addon_data_dir()
+    now = int(time.time())
+
+    # Data em que cada jogo apareceu pela primeira vez, usada em "Adicionados recentemente"
+    first_seen_path = os.path.join(path, FIRST_SEEN_FILE)
+    first_seen = load_json(first_seen_path, {})
+    seen = first_seen.setdefault(source, {})
+
+    entries = []
+    for game in games:
+        if game.get("duplicate_of"):
+            continue
+        game = with_merged(game)
+        appid = str(game.get("appid", ""))
+        entries.append({
+            "appid": appid,
+            "appName": game.get("appName", ""),
+            "source": source,
+            "icon": game.get("icon") or "",
+            "poster": game.get("capsule") or "",
+            "clearlogo": game.get("logo") or "",
+            "fanart": game.get("hero") or "",
+            "LastPlayTime": to_int(game.get("LastPlayTime")),
+            "playtime": to_int(game.get("playtime")),
+            "added": seen.setdefault(appid, now),
+        })
+
+    widgets = load_json(os.path.join(path, WIDGETS_FILE), {})
+    widgets[source] = {
+        widget_type: heapq.nlargest(WIDGET_TOP_K, entries, key=lambda entry, field=field: entry[field])
+        for widget_type, (_, field) in WIDGET_TYPES.items()
+    }
+
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        write_file_atomic(os.path.join(path, WIDGETS_FILE),
+                          json.dumps(widgets, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        write_file_atomic(first_seen_path, json.dumps(first_seen, separators=(',', ':')).encode('utf-8'))
+        invalidate_widgets()
+    except OSError as e:
+        kodi_log(f"Falha ao salvar os widgets: {str(e)}")
+
+
+def get_widget_items(widget_type):
+    """
+    Retorna a lista do widget, já combinando Steam e Non-Steam.
+    O resultado fica válido por WIDGET_TTL segundos ou até a próxima sincronização.
+    """
+    if widget_type not in WIDGET_TYPES:
+        return []
+
+    path = get_addon_data_dir()
+    widgets_path = os.path.join(path, WIDGETS_FILE)
+    rendered_path = os.path.join(path, WIDGETS_RENDERED_FILE)
+    now = time.time()
+
+    rendered = load_json(rendered_path, {})
+    cached = rendered.get(widget_type)
+    if cached and cached.get("expires", 0) > now:
+        return cached["items"]
+
+    widgets = load_json(widgets_path, {})
+    field = WIDGET_TYPES[widget_type][1]
+    candidates = [entry for lists in widgets.values() for entry in lists.get(widget_type, [])]
+    # O mesmo jogo pode vir de mais de um perfil; fica a ocorrência mais bem colocada
+    best = {}
+    for entry in candidates:
+        if entry["appid"] not in best or entry[field] > best[entry["appid"]][field]:
+            best[entry["appid"]] = entry
+    items = heapq.nlargest(WIDGET_TOP_K, best.values(), key=lambda entry: entry[field])
+    if field != 'added':
+        items = [entry for entry in items if entry[field]]
+
+    rendered[widget_type] = {"expires": now + WIDGET_TTL, "items": items}
+    try:
+        write_file_atomic(rendered_path, json.dumps(rendered, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    except OSError as e:
+        kodi_log(f"Falha ao salvar o cache dos widgets: {str(e)}")
+    return items
+
+
+def invalidate_widgets():
+    rendered_path = os.path.join(get_addon_data_dir(), WIDGETS_RENDERED_FILE)
+    if os.path.exists(rendered_path):
+        os.remove(rendered_path)
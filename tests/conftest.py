@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# Os testes importam os módulos do addon com os substitutos do Kodi de tools/kodistubs,
+# os mesmos do tools/headless.py, e um addon_data temporário.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import headless  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def kodi(tmp_path):
+    headless.setup(str(tmp_path / 'userdata'))
+    return tmp_path
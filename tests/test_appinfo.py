@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+
+import pytest
+
+from resources.appinfo import (APPINFO_ENTRY_HEADER, APPINFO_MAGIC_V28, APPINFO_MAGIC_V29, AppInfo)
+
+APPS = {
+    570: {"common": {"name": "Dota 2", "type": "Game", "gameid": 570}},
+    10: {"common": {"name": "Counter-Strike", "type": "Game"}, "extended": {"developer": "Valve"}},
+    228980: {"common": {"name": "Steamworks Common Redistributables", "type": "Tool"}},
+}
+
+
+def vdf_dict(values, keys=None):
+    data = b''
+    for name, value in values.items():
+        key = name.encode('utf-8') + b'\x00' if keys is None else struct.pack('<I', keys.setdefault(name, len(keys)))
+        if isinstance(value, dict):
+            data += b'\x00' + key + vdf_dict(value, keys)
+        elif isinstance(value, int):
+            data += b'\x02' + key + struct.pack('<i', value)
+        else:
+            data += b'\x01' + key + value.encode('utf-8') + b'\x00'
+    return data + b'\x08'
+
+
+def write_appinfo(path, apps, magic=APPINFO_MAGIC_V28):
+    keys = {} if magic == APPINFO_MAGIC_V29 else None
+    entries = b''
+    for appid, section in apps.items():
+        body = b'\x00' * APPINFO_ENTRY_HEADER[magic] + vdf_dict({"appinfo": section}, keys)
+        entries += struct.pack('<II', appid, len(body)) + body
+    entries += struct.pack('<I', 0)
+    if keys is None:
+        data = struct.pack('<II', magic, 1) + entries
+    else:
+        table = struct.pack('<I', len(keys)) + b''.join(name.encode('utf-8') + b'\x00' for name in keys)
+        data = struct.pack('<IIq', magic, 1, 16 + len(entries)) + entries + table
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "appinfo.vdf"), str(tmp_path / "appinfo.idx")
+
+
+@pytest.mark.parametrize("magic", [APPINFO_MAGIC_V28, APPINFO_MAGIC_V29])
+def test_reads_sections(paths, magic):
+    write_appinfo(paths[0], APPS, magic)
+    with AppInfo(*paths) as appinfo:
+        assert appinfo.appids() == sorted(APPS)
+        assert appinfo.get_common(570) == {"name": "Dota 2", "type": "Game", "gameid": 570}
+        assert appinfo.get(10)["extended"] == {"developer": "Valve"}
+        assert 228980 in appinfo
+        assert appinfo.get_common("10")["name"] == "Counter-Strike"
+
+
+def test_missing_app(paths):
+    write_appinfo(paths[0], APPS)
+    with AppInfo(*paths) as appinfo:
+        assert 730 not in appinfo
+        assert appinfo.get(730) is None
+        assert appinfo.get("abc") is None
+        assert appinfo.get_common(730) == {}
+
+
+def test_missing_file(paths):
+    appinfo = AppInfo(*paths)
+    assert appinfo.get_common(570) == {}
+    assert not os.path.exists(paths[1])
+
+
+def test_unsupported_version(paths):
+    write_appinfo(paths[0], APPS)
+    with open(paths[0], 'r+b') as f:
+        f.write(struct.pack('<I', 0x07564426))
+    with pytest.raises(ValueError):
+        AppInfo(*paths).open()
+
+
+def test_index_is_reused(paths, monkeypatch):
+    write_appinfo(paths[0], APPS)
+    with AppInfo(*paths) as appinfo:
+        appinfo.open()
+    assert os.path.exists(paths[1])
+
+    monkeypatch.setattr(AppInfo, "_build_index", lambda self: pytest.fail("índice refeito"))
+    with AppInfo(*paths) as appinfo:
+        assert appinfo.get_common(228980)["type"] == "Tool"
+
+
+def test_index_is_rebuilt_when_file_changes(paths):
+    write_appinfo(paths[0], APPS)
+    with AppInfo(*paths) as appinfo:
+        appinfo.open()
+
+    write_appinfo(paths[0], {**APPS, 730: {"common": {"name": "Counter-Strike 2", "type": "Game"}}})
+    with AppInfo(*paths) as appinfo:
+        assert appinfo.get_common(730)["name"] == "Counter-Strike 2"
+        assert appinfo.get_common(570)["name"] == "Dota 2"
+
+
+def test_damaged_index_is_rebuilt(paths):
+    write_appinfo(paths[0], APPS)
+    with open(paths[1], 'wb') as f:
+        f.write(b'SGAI\x01')
+    with AppInfo(*paths) as appinfo:
+        assert appinfo.get_common(10)["name"] == "Counter-Strike"
+    assert [name for name in os.listdir(os.path.dirname(paths[1])) if name.endswith('.tmp')] == []
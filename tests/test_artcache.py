@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+PIL = pytest.importorskip("PIL.Image")
+
+from resources.artcache import _downscale  # noqa: E402
+
+
+@pytest.fixture
+def art_dir(tmp_path):
+    path = tmp_path / "arte"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def source(art_dir):
+    path = str(art_dir / "capsule.png")
+    PIL.new("RGB", (600, 900), (200, 40, 40)).save(path)
+    return path
+
+
+@pytest.mark.parametrize("name, image_format", [("copia.png", "PNG"), ("copia.jpg", "JPEG")])
+def test_downscale_writes_the_copy_in_place(art_dir, source, name, image_format):
+    dest = str(art_dir / name)
+    assert _downscale(source, dest, (400, 600))
+
+    with PIL.open(dest) as image:
+        assert image.format == image_format
+        assert image.size == (400, 600)
+    assert sorted(os.listdir(art_dir)) == sorted(["capsule.png", name])
+
+
+def test_concurrent_downscales_of_the_same_copy(art_dir, source):
+    dest = str(art_dir / "copia.png")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: _downscale(source, dest, (400, 600)), range(8)))
+
+    assert all(results)
+    with PIL.open(dest) as image:
+        assert image.size == (400, 600)
+    assert sorted(os.listdir(art_dir)) == ["capsule.png", "copia.png"]
+
+
+def test_unreadable_source_leaves_nothing(art_dir):
+    source = art_dir / "quebrada.png"
+    source.write_bytes(b"nao e imagem")
+    assert not _downscale(str(source), str(art_dir / "copia.png"), (400, 600))
+    assert os.listdir(art_dir) == ["quebrada.png"]
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+
+import pytest
+
+import _kodi_stats
+from resources import cachemanager
+from resources.cachemanager import CacheManager, load_cache_stats
+from resources.pathroots import get_path_roots, root_catalogs
+from resources.utils import get_addon_data_dir, save_catalogs
+
+KB = 1000
+
+
+@pytest.fixture(autouse=True)
+def small_budgets(monkeypatch):
+    # Limites em KB em vez de MB: art 1 KB, rotas 16 KB, global 20 KB
+    monkeypatch.setattr(cachemanager, "MB", KB)
+    _kodi_stats.settings['art_cache_budget'] = '1'
+    _kodi_stats.settings['cache_budget'] = '20'
+
+
+def make_files(directory, names, size, age=1000):
+    """
+    Grava os arquivos com último acesso crescente, do primeiro (mais antigo) ao último.
+    """
+    directory = os.path.join(get_addon_data_dir(), directory)
+    os.makedirs(directory, exist_ok=True)
+    now = time.time()
+    paths = []
+    for offset, name in enumerate(names):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        os.utime(path, (now - age + offset, now - age + offset))
+        paths.append(path)
+    return paths
+
+
+def remaining(directory):
+    return sorted(os.listdir(os.path.join(get_addon_data_dir(), directory)))
+
+
+def test_category_budget_evicts_the_oldest():
+    make_files('assets/art_cache', ['a.jpg', 'b.jpg', 'c.jpg', 'd.jpg', 'e.jpg'], 400)
+
+    assert CacheManager().evict() == 3
+    assert remaining('assets/art_cache') == ['d.jpg', 'e.jpg']
+    stats = load_cache_stats()[0]['art']
+    assert (stats['files'], stats['size'], stats['evictions']) == (2, 800, 3)
+
+
+def test_touch_renews_the_last_access():
+    paths = make_files('assets/art_cache', ['a.jpg', 'b.jpg', 'c.jpg'], 400)
+    # Indexa os arquivos (com o mtime como último acesso) sem remover nenhum
+    _kodi_stats.settings['art_cache_budget'] = '10'
+    assert CacheManager().evict() == 0
+    _kodi_stats.settings['art_cache_budget'] = '1'
+
+    manager = CacheManager()
+    manager.touch('art', paths[0])
+    manager.save()
+
+    assert CacheManager().evict() == 1
+    assert remaining('assets/art_cache') == ['a.jpg', 'c.jpg']
+
+
+def test_within_budget_nothing_is_evicted():
+    make_files('assets/art_cache', ['a.jpg', 'b.jpg'], 400)
+    make_files('_routes', ['r1.json', 'r2.json'], 4 * KB)
+
+    assert CacheManager().evict() == 0
+    assert load_cache_stats()[0]['routes']['files'] == 2
+
+
+def test_global_budget_evicts_the_oldest_across_categories():
+    _kodi_stats.settings['art_cache_budget'] = '100'
+    make_files('assets/art_cache', ['a.jpg', 'b.jpg', 'c.jpg'], 3 * KB, age=2000)
+    make_files('_routes', ['r1.json', 'r2.json', 'r3.json'], 3 * KB, age=1000)
+    _kodi_stats.settings['cache_budget'] = '12'
+
+    assert CacheManager().evict() == 2
+    assert remaining('assets/art_cache') == ['c.jpg']
+    assert remaining('_routes') == ['r1.json', 'r2.json', 'r3.json']
+
+
+def test_art_referenced_by_the_catalogs_is_kept():
+    paths = make_files('assets/art_cache', ['a.jpg', 'b.jpg', 'c.jpg', 'd.jpg'], 400)
+    catalog = {"0": {"appid": 10, "appName": "Jogo", "capsule": paths[0]},
+               "1": {"appid": 20, "appName": "Outro", "hero": paths[2]}}
+    save_catalogs(get_addon_data_dir(), root_catalogs({"steam_games.json": {"steam": catalog}}, get_path_roots()))
+
+    # a e c estão no catálogo (gravados como "@assets/..."): saem b e d, mesmo mais novos
+    assert CacheManager().evict() == 2
+    assert remaining('assets/art_cache') == ['a.jpg', 'c.jpg']
+
+    # Acima do limite só com artes usadas: nenhuma é removida
+    _kodi_stats.settings['art_cache_budget'] = '0'
+    assert CacheManager().evict() == 0
+    assert remaining('assets/art_cache') == ['a.jpg', 'c.jpg']
+
+
+def test_files_removed_outside_leave_the_index():
+    paths = make_files('assets/art_cache', ['a.jpg', 'b.jpg'], 400)
+    manager = CacheManager()
+    for path in paths:
+        manager.record('art', path)
+    manager.save()
+    os.remove(paths[0])
+
+    CacheManager().evict()
+    stats = load_cache_stats()[0]['art']
+    assert (stats['files'], stats['size'], stats['evictions']) == (1, 400, 0)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import threading
+import time
+
+import pytest
+
+from resources import dedup
+from resources.dedup import (MERGED_TAGS, RULE_HIDE_SHORTCUT, RULE_KEEP_BOTH, RULE_PREFER_STEAM,
+                             commit_catalogs, load_catalog_file, merge_duplicates, normalize_name, with_merged)
+from resources.pathroots import SHARED_ART
+from resources.utils import get_addon_data_dir, save_catalogs
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Counter-Strike 2", "counter strike 2"),
+    ("Counter Strike™ 2", "counter strike 2"),
+    ("  COUNTER:strike   2® ", "counter strike 2"),
+    ("Pokémon Édition", "pokemon edition"),
+    ("Half-Life©", "half life"),
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+def catalogs():
+    steam = {
+        "730": {"appid": 730, "appName": "Counter-Strike 2", "tags": {"0": "FPS"}, "capsule": "/steam/730.jpg"},
+    }
+    non_steam = {
+        # Mesmo nome que o jogo Steam
+        "a": {"appid": "13000000001", "appName": "Counter Strike™ 2", "tags": {"0": "Shooter"},
+              "capsule": "/grid/a.jpg", "logo": "/grid/a_logo.png"},
+        # Atalho que aponta para o appid Steam
+        "b": {"appid": "730", "appName": "CS", "tags": {"0": "Online"}},
+        # Mesmo atalho repetido
+        "c": {"appid": "13000000003", "appName": "Hades", "tags": {"0": "Roguelike"}},
+        "d": {"appid": "13000000004", "appName": "HADES", "tags": {"0": "Indie"}, "hero": "/grid/d_hero.jpg"},
+    }
+    return steam, non_steam
+
+
+def own_fields(catalog):
+    return {key: {field: value for field, value in game.items() if field not in (MERGED_TAGS, SHARED_ART, "duplicate_of")}
+            for key, game in catalog.items()}
+
+
+def test_prefer_steam():
+    steam, non_steam = catalogs()
+    assert merge_duplicates(steam, non_steam, RULE_PREFER_STEAM) == 3
+    assert non_steam["a"]["duplicate_of"] == "steam:730"
+    assert non_steam["b"]["duplicate_of"] == "steam:730"
+    assert non_steam["d"]["duplicate_of"] == "non_steam:13000000003"
+    assert "duplicate_of" not in non_steam["c"]
+
+    cs = with_merged(steam["730"])
+    assert sorted(cs["tags"].values()) == ["FPS", "Online", "Shooter"]
+    assert cs["capsule"] == "/steam/730.jpg"
+    assert cs["logo"] == "/grid/a_logo.png"
+    hades = with_merged(non_steam["c"])
+    assert sorted(hades["tags"].values()) == ["Indie", "Roguelike"]
+    assert hades["hero"] == "/grid/d_hero.jpg"
+
+
+def test_keep_both():
+    steam, non_steam = catalogs()
+    assert merge_duplicates(steam, non_steam, RULE_KEEP_BOTH) == 2
+    assert not any(game.get("duplicate_of") for game in non_steam.values())
+    assert with_merged(non_steam["a"])["capsule"] == "/steam/730.jpg"
+    assert with_merged(non_steam["a"])["logo"] == "/grid/a_logo.png"
+    assert with_merged(steam["730"]) is steam["730"]
+
+
+def test_hide_shortcut():
+    steam, non_steam = catalogs()
+    assert merge_duplicates(steam, non_steam, RULE_HIDE_SHORTCUT) == 3
+    assert non_steam["a"]["duplicate_of"] == "steam:730"
+    assert non_steam["d"]["duplicate_of"] == "non_steam:13000000003"
+    # Só esconde: nada é juntado no jogo que fica
+    assert with_merged(steam["730"]) is steam["730"]
+    assert with_merged(non_steam["c"]) is non_steam["c"]
+
+
+def test_passes_do_not_change_own_fields():
+    steam, non_steam = catalogs()
+    original = own_fields(steam), own_fields(non_steam)
+    for rule in (RULE_PREFER_STEAM, RULE_PREFER_STEAM, RULE_KEEP_BOTH, RULE_HIDE_SHORTCUT, RULE_PREFER_STEAM):
+        merge_duplicates(steam, non_steam, rule)
+        assert (own_fields(steam), own_fields(non_steam)) == original
+
+
+def test_rule_change_undoes_merge():
+    steam, non_steam = catalogs()
+    merge_duplicates(steam, non_steam, RULE_PREFER_STEAM)
+    merge_duplicates(steam, non_steam, RULE_HIDE_SHORTCUT)
+    assert MERGED_TAGS not in steam["730"] and SHARED_ART not in steam["730"]
+
+
+def test_removed_shortcut_undoes_merge():
+    steam, non_steam = catalogs()
+    merge_duplicates(steam, non_steam, RULE_PREFER_STEAM)
+    del non_steam["a"], non_steam["b"]
+    assert merge_duplicates(steam, non_steam, RULE_PREFER_STEAM) == 1
+    assert with_merged(steam["730"]) is steam["730"]
+
+
+def test_with_merged_does_not_change_game():
+    steam, non_steam = catalogs()
+    merge_duplicates(steam, non_steam, RULE_PREFER_STEAM)
+    before = copy.deepcopy(steam["730"])
+    view = with_merged(steam["730"])
+    assert steam["730"] == before
+    assert MERGED_TAGS not in view and SHARED_ART not in view
+
+
+def test_concurrent_commits_keep_both_catalogs(monkeypatch):
+    path = get_addon_data_dir()
+    file_names = {"steam": "steam_games.json", "non_steam": "non_steam_games.json"}
+    save_catalogs(path, {"steam_games.json": {"steam": {"1": {"appid": 1, "appName": "Antigo Steam"}}},
+                         "non_steam_games.json": {"non_steam": {"0": {"appid": "9", "appName": "Antigo Atalho"}}}})
+
+    # Alarga a janela entre ler o outro catálogo e gravar os dois
+    original = dedup.save_catalogs
+
+    def slow_save(*args):
+        time.sleep(0.2)
+        return original(*args)
+    monkeypatch.setattr(dedup, "save_catalogs", slow_save)
+
+    steam = {"1": {"appid": 1, "appName": "Novo Steam"}}
+    non_steam = {"0": {"appid": "9", "appName": "Novo Atalho"}}
+    threads = [threading.Thread(target=commit_catalogs, args=(path, {"steam": steam}, file_names, {})),
+               threading.Thread(target=commit_catalogs, args=(path, {"non_steam": non_steam}, file_names, {}))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert load_catalog_file(path, "steam_games.json", "steam")["1"]["appName"] == "Novo Steam"
+    assert load_catalog_file(path, "non_steam_games.json", "non_steam")["0"]["appName"] == "Novo Atalho"
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+
+from resources import journal as journal_module
+from resources import nonsteam
+from resources.journal import SYNC_JOURNAL_BATCH, SYNC_JOURNAL_MAX_AGE, SyncJournal, merge_partial_catalog
+from resources.metrics import SyncMetrics
+from resources.nonsteam import NonSteam
+
+TOTAL = 2 * SYNC_JOURNAL_BATCH + 30
+
+
+class CancellingProgress:
+    """
+    Barra de progresso que cancela a sincronização depois de `after` jogos.
+    """
+
+    def __init__(self, after=None):
+        self.after = after
+        self.updates = 0
+
+    def update(self, percent, message=''):
+        self.updates += 1
+
+    def iscanceled(self):
+        return self.after is not None and self.updates >= self.after
+
+
+def shortcuts(count):
+    return {'shortcuts': {str(i): {'appid': 3000000000 + i, 'AppName': f'Jogo {i}', 'Exe': f'"C:\\jogo{i}.exe"'}
+                          for i in range(count)}}
+
+
+def build(monkeypatch, tmp_path, progress):
+    vdf_path = tmp_path / "shortcuts.vdf"
+    vdf_path.write_bytes(b"\0")
+    resolved = []
+
+    def resolve_game(self, game_data, app_name, *args):
+        resolved.append(app_name)
+        game_data["capsule"] = f"/grid/{app_name}.png"
+
+    monkeypatch.setattr(NonSteam, "parse_shortcuts", lambda self, path: shortcuts(TOTAL))
+    monkeypatch.setattr(NonSteam, "resolve_game", resolve_game)
+    monkeypatch.setattr(nonsteam.time, "sleep", lambda seconds: None)
+
+    metrics = SyncMetrics("non_steam")
+    partial = {}
+    games = NonSteam().build_non_steam_games(str(vdf_path), "", metrics, progress, steam_grid="/grid",
+                                             journal=SyncJournal("non_steam", str(vdf_path)), partial=partial)
+    return games, partial, resolved, metrics
+
+
+def test_cancelled_sync_is_resumed_from_the_journal(monkeypatch, tmp_path):
+    cancel_at = SYNC_JOURNAL_BATCH + 20
+    games, partial, resolved, metrics = build(monkeypatch, tmp_path, CancellingProgress(cancel_at))
+    assert games is None
+    assert len(partial) == len(resolved) == cancel_at
+
+    games, partial, resolved, metrics = build(monkeypatch, tmp_path, CancellingProgress())
+    assert len(games) == TOTAL
+    assert resolved == [f'Jogo {i}' for i in range(cancel_at, TOTAL)]
+    assert metrics.counters["resumed"] == metrics.hits["journal"] == cancel_at
+    assert metrics.misses["journal"] == TOTAL - cancel_at
+    assert games["0"]["capsule"] == "/grid/Jogo 0.png"
+
+
+def test_changed_entry_is_processed_again():
+    journal = SyncJournal("non_steam", "shortcuts.vdf")
+    journal.add(0, "1|Jogo", {"capsule": "a.png"})
+    journal.flush()
+
+    journal = SyncJournal("non_steam", "shortcuts.vdf")
+    assert journal.get(0, "1|Jogo renomeado") is None
+    assert journal.get(0, "1|Jogo") == {"capsule": "a.png"}
+    assert journal.resumed == 1
+
+
+def test_other_fingerprint_discards_the_journal():
+    journal = SyncJournal("non_steam", "perfil1/shortcuts.vdf")
+    journal.add(0, "1|Jogo", {"capsule": "a.png"})
+    journal.flush()
+    assert os.path.exists(journal.path)
+
+    journal = SyncJournal("non_steam", "perfil2/shortcuts.vdf")
+    assert journal.done == {}
+    assert not os.path.exists(journal.path)
+
+
+def test_old_journal_expires(monkeypatch):
+    journal = SyncJournal("steam", "12345")
+    journal.add(10, "sig", {"capsule": "a.png"})
+    journal.flush()
+
+    now = time.time()
+    monkeypatch.setattr(journal_module.time, "time", lambda: now + SYNC_JOURNAL_MAX_AGE - 60)
+    assert SyncJournal("steam", "12345").get(10, "sig") == {"capsule": "a.png"}
+
+    monkeypatch.setattr(journal_module.time, "time", lambda: now + SYNC_JOURNAL_MAX_AGE + 60)
+    journal = SyncJournal("steam", "12345")
+    assert journal.get(10, "sig") is None
+    assert not os.path.exists(journal.path)
+
+
+def test_incomplete_last_batch_is_ignored():
+    journal = SyncJournal("steam", "12345")
+    journal.add(1, "a", {"capsule": "1.png"})
+    journal.flush()
+    journal.add(2, "b", {"capsule": "2.png"})
+    journal.flush()
+    with open(journal.path, 'rb+') as f:
+        f.truncate(os.path.getsize(journal.path) - 5)
+
+    journal = SyncJournal("steam", "12345")
+    assert journal.get(1, "a") == {"capsule": "1.png"}
+    assert journal.get(2, "b") is None
+
+
+def test_batches_are_written_as_they_fill():
+    journal = SyncJournal("steam", "12345")
+    for i in range(SYNC_JOURNAL_BATCH):
+        journal.add(i, "sig", {})
+    assert journal.pending == {}
+    assert len(SyncJournal("steam", "12345").done) == SYNC_JOURNAL_BATCH
+
+
+def test_merge_partial_catalog():
+    previous = {"0": {"appid": 1, "capsule": "velho"}, "1": {"appid": 2, "capsule": "velho"}}
+    merged = merge_partial_catalog(previous, {"0": {"appid": 2, "capsule": "novo"}, "1": {"appid": 3}})
+    assert merged == {"0": {"appid": 1, "capsule": "velho"}, "1": {"appid": 2, "capsule": "novo"}, "2": {"appid": 3}}
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from resources import launcher
+from resources.launcher import LAUNCH_LOG_MAX_LINES, GameLauncher
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'), reason="executável de teste em shell script")
+
+
+def make_stub(tmp_path, name="steam"):
+    """
+    Executável que grava os argumentos recebidos, um por linha, e demora a sair.
+    """
+    path = tmp_path / name
+    output = tmp_path / f"{name}.args"
+    path.write_text(f'#!/bin/sh\nprintf "%s\\n" "$@" > "{output}.part"\nmv "{output}.part" "{output}"\nsleep 2\n')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path), output
+
+
+def wait_for(path, timeout=5):
+    deadline = time.time() + timeout
+    while not path.exists():
+        assert time.time() < deadline, f"{path} não foi criado"
+        time.sleep(0.02)
+    return path.read_text().splitlines()
+
+
+def read_log(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_launch_starts_steam_exe_detached(tmp_path):
+    steam_exe, args = make_stub(tmp_path)
+    log_path = str(tmp_path / "launch_times.log")
+
+    elapsed_ms = GameLauncher(steam_exe, log_path, steam_running=False).launch(730)
+
+    # Retorna sem esperar o executável terminar (ele fica 2 s rodando)
+    assert elapsed_ms < 1000
+    assert wait_for(args) == ["steam://rungameid/730"]
+    entry, = read_log(log_path)
+    assert entry["appid"] == "730"
+    assert entry["mode"] == "exec"
+    assert entry["elapsed_ms"] == round(elapsed_ms, 2)
+
+
+def test_launch_hands_off_to_running_steam(tmp_path, monkeypatch):
+    steam_exe, steam_args = make_stub(tmp_path)
+    opener, opener_args = make_stub(tmp_path, "xdg-open")
+    monkeypatch.setattr(launcher.GameLauncher, "get_platform", staticmethod(lambda: "linux"))
+    monkeypatch.setattr(launcher.shutil, "which", lambda name: opener if name == "xdg-open" else None)
+    log_path = str(tmp_path / "launch_times.log")
+
+    GameLauncher(steam_exe, log_path, steam_running=True).launch("13000000001")
+
+    assert wait_for(opener_args) == ["steam://rungameid/13000000001"]
+    assert not steam_args.exists()
+    assert read_log(log_path)[0]["mode"] == "handoff"
+
+
+def test_timing_log_keeps_last_entries(tmp_path):
+    log_path = str(tmp_path / "launch_times.log")
+    game_launcher = GameLauncher("steam", log_path, steam_running=False)
+    for appid in range(LAUNCH_LOG_MAX_LINES + 5):
+        game_launcher.record_timing(appid, "exec", 1.5)
+    entries = read_log(log_path)
+    assert len(entries) == LAUNCH_LOG_MAX_LINES
+    assert entries[-1]["appid"] == str(LAUNCH_LOG_MAX_LINES + 4)
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import zlib
+
+from resources.nonsteam import NonSteam
+
+
+def test_shortcut_ids_from_vdf_appid():
+    rungameid, grid_id = NonSteam.get_shortcut_ids({'appid': 3123456789, 'AppName': 'Jogo', 'Exe': '"C:\\jogo.exe"'})
+    assert grid_id == '3123456789'
+    assert rungameid == str((3123456789 << 32) | 0x02000000)
+
+
+def test_shortcut_ids_negative_vdf_appid():
+    # O shortcuts.vdf grava o appid como int32 com sinal
+    assert NonSteam.get_shortcut_ids({'appid': 3123456789 - (1 << 32)}) == NonSteam.get_shortcut_ids({'appid': 3123456789})
+
+
+def test_shortcut_ids_legacy_crc():
+    exe, name = '"C:\\Games\\Jogo\\jogo.exe"', 'Jogo'
+    rungameid, grid_id = NonSteam.get_shortcut_ids({'exe': exe, 'appName': name})
+    short_id = zlib.crc32((exe + name).encode('utf-8')) | 0x80000000
+    assert grid_id == str(short_id)
+    assert int(grid_id) & 0x80000000
+    assert int(rungameid) >> 32 == short_id
+    assert int(rungameid) & 0xFFFFFFFF == 0x02000000
+
+
+def test_shortcut_ids_field_names_ignore_case():
+    assert NonSteam.get_shortcut_ids({'Exe': 'a', 'AppName': 'b'}) == NonSteam.get_shortcut_ids({'exe': 'a', 'appname': 'b'})
+
+
+def test_shortcut_ids_without_exe():
+    assert NonSteam.get_shortcut_ids({'appName': 'Jogo'}) == ("", "")
+
+
+STEAM_ART = {"capsule": "/lc/1p.jpg", "logo": "/lc/1_logo.png", "hero": "/lc/1_hero.jpg",
+             "header": "/lc/1.jpg", "icon": "/lc/1_icon.jpg"}
+
+
+def resolve_shortcut(monkeypatch, steam_game):
+    from resources.dedup import index_steam_games
+    from resources.metrics import SyncMetrics
+
+    resolved = []
+    monkeypatch.setattr(NonSteam, "resolve_grid_assets",
+                        lambda self, game_data, steam_grid, grid_id, metrics, prober=None: resolved.append(grid_id))
+    game_data = {"appid": "13000000001", "appName": "HADES™", "capsule": "", "icon": "", "logo": "", "hero": "", "header": ""}
+    NonSteam().resolve_game(game_data, "HADES™", "13000000001", "3000000001", "/grid", {}, {}, SyncMetrics("non_steam"),
+                            None, index_steam_games({"1145360": steam_game}))
+    return game_data, resolved
+
+
+def test_steam_duplicate_reuses_steam_art(monkeypatch):
+    game_data, resolved = resolve_shortcut(monkeypatch, dict(STEAM_ART, appid=1145360, appName="Hades"))
+    assert resolved == []
+    assert {field: game_data[field] for field in STEAM_ART} == STEAM_ART
+
+
+def test_steam_duplicate_missing_art_resolves_grid(monkeypatch):
+    game_data, resolved = resolve_shortcut(monkeypatch, dict(STEAM_ART, appid=1145360, appName="Hades", hero=""))
+    assert resolved == ["3000000001"]
+    assert game_data["capsule"] == ""
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+from resources import pathroots
+from resources.pathroots import (ROOT_SAMPLE_SIZE, from_rooted, load_rooted_catalog, root_catalogs, to_rooted)
+from resources.synclock import CATALOGS_LOCK, SyncLock
+from resources.utils import get_addon_data_dir, save_catalogs
+
+FILE_NAME = "steam_games.json"
+
+
+def make_grid(path, count=ROOT_SAMPLE_SIZE):
+    os.makedirs(path, exist_ok=True)
+    catalog = {}
+    for appid in range(count):
+        art = os.path.join(path, f"{appid}p.png")
+        with open(art, 'wb') as f:
+            f.write(b'png')
+        catalog[str(appid)] = {"appid": appid, "appName": f"Jogo {appid}", "capsule": art}
+    return catalog
+
+
+def roots_for(grid):
+    return {"steam_grid": os.path.normpath(str(grid)) + os.sep}
+
+
+def save(catalog, grid):
+    save_catalogs(get_addon_data_dir(), root_catalogs({FILE_NAME: {"steam": catalog}}, roots_for(grid)))
+
+
+def header():
+    with open(os.path.join(get_addon_data_dir(), FILE_NAME), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data["roots"], data.get("rejected_roots")
+
+
+def test_rooted_round_trip(tmp_path):
+    roots = roots_for(tmp_path / "grid")
+    path = os.path.join(str(tmp_path / "grid"), "sub", "1p.png")
+    assert to_rooted(path, roots) == "@steam_grid/sub/1p.png"
+    assert from_rooted("@steam_grid/sub/1p.png", roots) == path
+    assert to_rooted("/outro/1p.png", roots) == "/outro/1p.png"
+    assert from_rooted("@desconhecida/1p.png", roots) == "@desconhecida/1p.png"
+
+
+def test_unchanged_roots(tmp_path):
+    grid = tmp_path / "grid"
+    catalog = make_grid(str(grid))
+    save(catalog, grid)
+    games, rebased = load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(grid))
+    assert not rebased
+    assert games["0"]["capsule"] == catalog["0"]["capsule"]
+
+
+def test_moved_root_is_accepted_and_rewritten(tmp_path):
+    old, new = tmp_path / "grid", tmp_path / "grid_novo"
+    save(make_grid(str(old)), old)
+    os.rename(old, new)
+
+    games, rebased = load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(new))
+    assert rebased
+    assert games["3"]["capsule"] == os.path.join(str(new), "3p.png")
+    assert header() == (roots_for(new), None)
+
+
+@pytest.mark.parametrize("present, accepted", [(ROOT_SAMPLE_SIZE, True), (6, True), (5, False), (0, False)])
+def test_sample_ratio(tmp_path, present, accepted):
+    old, new = tmp_path / "grid", tmp_path / "grid_novo"
+    save(make_grid(str(old)), old)
+    make_grid(str(new), present)
+
+    games, rebased = load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(new))
+    assert rebased
+    expected = new if accepted else old
+    assert games["0"]["capsule"] == os.path.join(str(expected), "0p.png")
+    roots, rejected = header()
+    assert roots == roots_for(expected)
+    assert rejected == (None if accepted else roots_for(new))
+
+
+def test_rejected_root_is_not_sampled_again(tmp_path, monkeypatch):
+    old, new = tmp_path / "grid", tmp_path / "vazia"
+    save(make_grid(str(old)), old)
+    os.makedirs(new)
+    load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(new))
+
+    monkeypatch.setattr(pathroots, "sample_root", lambda *args: pytest.fail("raiz recusada conferida de novo"))
+    games, rebased = load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(new))
+    assert not rebased
+    assert games["0"]["capsule"] == os.path.join(str(old), "0p.png")
+
+
+def test_rewrite_skipped_while_catalogs_are_written(tmp_path):
+    old, new = tmp_path / "grid", tmp_path / "grid_novo"
+    save(make_grid(str(old)), old)
+    os.rename(old, new)
+
+    lock = SyncLock(CATALOGS_LOCK)
+    assert lock.acquire()
+    try:
+        games, rebased = load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(new))
+    finally:
+        lock.release("ok")
+    # Resolvido em memória pela nova pasta, sem regravar o arquivo
+    assert rebased
+    assert games["0"]["capsule"] == os.path.join(str(new), "0p.png")
+    assert header()[0] == roots_for(old)
+
+
+def test_rewrite_does_not_take_the_sync_lock(tmp_path):
+    old, new = tmp_path / "grid", tmp_path / "grid_novo"
+    save(make_grid(str(old)), old)
+    os.rename(old, new)
+
+    sync = SyncLock("steam")
+    assert sync.acquire()
+    try:
+        load_rooted_catalog(get_addon_data_dir(), FILE_NAME, "steam", roots_for(new))
+        # A trava da sincronização continua sendo da sincronização
+        assert sync.read_owner()["run_id"] == sync.run_id
+    finally:
+        sync.release("ok")
+    assert header()[0] == roots_for(new)
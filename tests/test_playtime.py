@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+
+import pytest
+
+from resources import playtime
+from resources.playtime import (PLAYTIME_KEEP_WEEKS, PLAYTIME_LOG_FILE, PLAYTIME_SNAPSHOT_FILE, compact_history,
+                                get_game_trends, get_weekly_totals, load_history, record_playtime, week_key)
+from resources.utils import get_addon_data_dir
+
+WEEK = 7 * 86400
+
+
+def game(appid, playtime, last_played=0, name=None):
+    return {"appid": appid, "appName": name or f"Jogo {appid}", "playtime": playtime, "LastPlayTime": last_played}
+
+
+def test_week_key_uses_iso_weeks():
+    assert week_key(time.mktime((2021, 1, 3, 12, 0, 0, 0, 0, -1))) == "2020-W53"
+    assert week_key(time.mktime((2021, 1, 4, 12, 0, 0, 0, 0, -1))) == "2021-W01"
+
+
+def test_first_sync_only_records_the_baseline():
+    assert record_playtime("steam", [game(1, 100), game(2, 50)]) == 0
+
+    history = load_history()
+    assert history["totals"]["steam"] == {"1": [100, 0], "2": [50, 0]}
+    assert history["weeks"] == {}
+    assert not os.path.exists(os.path.join(get_addon_data_dir(), PLAYTIME_LOG_FILE))
+
+
+def test_deltas_are_attributed_to_the_week_last_played():
+    now = time.time()
+    record_playtime("steam", [game(1, 100), game(2, 50), game(3, 10)])
+    assert record_playtime("steam", [game(1, 160, now - 2 * WEEK), game(2, 50), game(3, 40, now)]) == 2
+
+    history = load_history()
+    weekly = get_weekly_totals(history)
+    assert weekly[0] == (week_key(now), 30)
+    assert weekly[2] == (week_key(now - 2 * WEEK), 60)
+    assert sum(minutes for _, minutes in weekly) == 90
+    assert get_game_trends(history)["1"][2] == 60
+    assert "2" not in get_game_trends(history)
+
+
+def test_new_game_and_lower_playtime_add_no_minutes():
+    now = time.time()
+    record_playtime("steam", [game(1, 100)])
+    record_playtime("steam", [game(1, 80, now), game(2, 500, now)])
+
+    history = load_history()
+    assert history["totals"]["steam"]["2"] == [500, int(now)]
+    assert get_weekly_totals(history)[0][1] == 0
+
+
+def test_sources_keep_separate_totals():
+    record_playtime("steam", [game(1, 100)])
+    assert record_playtime("non_steam", [game(1, 5)]) == 0
+    assert record_playtime("steam", [game(1, 130, time.time())]) == 1
+    assert load_history()["totals"]["non_steam"]["1"][0] == 5
+
+
+def test_compaction_keeps_the_history_and_empties_the_log():
+    now = time.time()
+    record_playtime("steam", [game(1, 100)])
+    record_playtime("steam", [game(1, 130, now)])
+    record_playtime("steam", [game(1, 150, now)])
+    before = load_history()
+
+    compact_history()
+    path = get_addon_data_dir()
+    assert not os.path.exists(os.path.join(path, PLAYTIME_LOG_FILE))
+    assert os.path.exists(os.path.join(path, PLAYTIME_SNAPSHOT_FILE))
+    after = load_history()
+    assert after["totals"] == before["totals"]
+    assert after["weeks"] == before["weeks"] == {week_key(now): {"1": 50}}
+
+    record_playtime("steam", [game(1, 155, now)])
+    assert load_history()["weeks"][week_key(now)]["1"] == 55
+
+
+def test_log_is_compacted_when_it_grows(monkeypatch):
+    monkeypatch.setattr(playtime, "PLAYTIME_COMPACT_BYTES", 0)
+    record_playtime("steam", [game(1, 100)])
+    record_playtime("steam", [game(1, 130, time.time())])
+
+    assert not os.path.exists(os.path.join(get_addon_data_dir(), PLAYTIME_LOG_FILE))
+    assert get_weekly_totals(load_history())[0][1] == 30
+
+
+def test_interrupted_compaction_does_not_count_entries_twice(monkeypatch):
+    now = time.time()
+    record_playtime("steam", [game(1, 100)])
+    record_playtime("steam", [game(1, 130, now)])
+
+    # Queda entre gravar o snapshot e apagar o log
+    def fail(path):
+        raise OSError("interrompido")
+
+    with monkeypatch.context() as m:
+        m.setattr(playtime.os, "remove", fail)
+        with pytest.raises(OSError):
+            compact_history()
+    assert os.path.exists(os.path.join(get_addon_data_dir(), PLAYTIME_LOG_FILE))
+
+    assert load_history()["weeks"] == {week_key(now): {"1": 30}}
+    record_playtime("steam", [game(1, 140, now)])
+    assert load_history()["weeks"] == {week_key(now): {"1": 40}}
+
+
+def test_compaction_drops_old_weeks():
+    now = time.time()
+    old = now - (PLAYTIME_KEEP_WEEKS + 2) * WEEK
+    record_playtime("steam", [game(1, 100), game(2, 100)])
+    record_playtime("steam", [game(1, 110, old), game(2, 120, now)])
+    assert week_key(old) in load_history()["weeks"]
+
+    compact_history()
+    assert list(load_history()["weeks"]) == [week_key(now)]
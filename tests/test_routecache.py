@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from resources.cachemanager import CACHE_ACCESS_LOG, CACHE_INDEX_FILE, CacheManager, load_cache_stats
+from resources.routecache import load_route, save_route
+from resources.utils import get_addon_data_dir, load_json
+
+ITEMS = [{"label": "Jogo", "art": {}, "info": {}, "url": "plugin://x", "isFolder": False}]
+
+
+def test_route_round_trip():
+    save_route("list_all_games", "chave", ITEMS)
+    assert load_route("list_all_games", "chave") == ITEMS
+    assert load_route("list_all_games", "outra chave") is None
+    assert load_route("list_games_by_tag&tag=RPG", "chave") is None
+
+
+def test_routes_are_accounted_without_rewriting_the_index():
+    save_route("list_all_games", "chave", ITEMS)
+    load_route("list_all_games", "chave")
+    load_route("list_all_games", "chave")
+    assert not os.path.exists(os.path.join(get_addon_data_dir(), CACHE_INDEX_FILE))
+
+    stats = load_cache_stats()[0]["routes"]
+    assert (stats["files"], stats["hits"], stats["misses"]) == (1, 2, 1)
+    assert stats["size"] > 0
+
+
+def test_access_log_is_folded_into_the_index():
+    save_route("list_all_games", "chave", ITEMS)
+    load_route("list_all_games", "chave")
+    CacheManager().save()
+
+    path = get_addon_data_dir()
+    assert not os.path.exists(os.path.join(path, CACHE_ACCESS_LOG))
+    index = load_json(os.path.join(path, CACHE_INDEX_FILE), {})
+    assert len(index["entries"]["routes"]) == 1
+    assert index["counters"]["routes"][:2] == [1, 1]
+    assert load_cache_stats()[0]["routes"]["hits"] == 1
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+
+from resources import synclock
+from resources.synclock import SYNC_LOCK_STALE, SyncLock, run_coalesced, run_exclusive
+
+
+def make_stale(lock, run_id="antiga"):
+    with open(lock.lock_path, 'w', encoding='utf-8') as f:
+        json.dump({"run_id": run_id, "started": 0}, f)
+    old = time.time() - SYNC_LOCK_STALE - 10
+    os.utime(lock.lock_path, (old, old))
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_acquire_writes_owner_and_release_records_result():
+    lock = SyncLock("steam")
+    assert lock.acquire()
+    assert lock.read_owner()["run_id"] == lock.run_id
+    assert not SyncLock("steam").acquire()
+    lock.release("partial")
+
+    assert not os.path.exists(lock.lock_path)
+    assert not [n for n in os.listdir(os.path.dirname(lock.lock_path)) if n.endswith('.tmp')]
+    assert SyncLock("steam").wait() == "partial"
+
+
+def test_stale_lock_is_taken_over():
+    lock = SyncLock("steam")
+    os.makedirs(os.path.dirname(lock.lock_path), exist_ok=True)
+    make_stale(lock)
+
+    assert lock.acquire()
+    assert lock.read_owner()["run_id"] == lock.run_id != "antiga"
+    lock.release("ok")
+
+
+def test_fresh_lock_is_not_taken_over():
+    lock = SyncLock("steam")
+    os.makedirs(os.path.dirname(lock.lock_path), exist_ok=True)
+    make_stale(lock)
+    os.utime(lock.lock_path)
+
+    assert not lock.acquire()
+    assert lock.read_owner()["run_id"] == "antiga"
+
+
+def test_only_one_invocation_takes_over_a_stale_lock():
+    for _ in range(10):
+        lock = SyncLock("steam")
+        os.makedirs(os.path.dirname(lock.lock_path), exist_ok=True)
+        make_stale(lock)
+        locks = [SyncLock("steam") for _ in range(6)]
+        won = []
+        threads = [threading.Thread(target=lambda l=l: l.acquire() and won.append(l))
+                   for l in locks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(won) == 1
+        assert lock.read_owner()["run_id"] == won[0].run_id
+        won[0].release("ok")
+
+
+def test_lock_is_never_seen_without_owner():
+    lock_path = SyncLock("steam").lock_path
+    done = threading.Event()
+    empty = []
+
+    def reader():
+        while not done.is_set():
+            try:
+                with open(lock_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            if not content:
+                empty.append(True)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for _ in range(200):
+            lock = SyncLock("steam")
+            if lock.acquire():
+                lock.release("ok")
+    finally:
+        done.set()
+        thread.join()
+    assert not empty
+
+
+def test_waiter_gets_the_status_of_the_running_sync():
+    started = threading.Event()
+    calls = []
+
+    def sync(status):
+        calls.append(status)
+        started.set()
+        time.sleep(1)
+        return status
+
+    results = {}
+    owner = threading.Thread(target=lambda: results.update(owner=run_coalesced("steam", sync, "partial")))
+    owner.start()
+    started.wait(5)
+    waiter = run_coalesced("steam", sync, "ok")
+    owner.join()
+
+    assert calls == ["partial"]
+    assert results["owner"] == waiter == "partial"
+
+
+def test_waiter_ignores_the_result_of_an_earlier_run():
+    previous = SyncLock("steam")
+    assert previous.acquire()
+    previous.release("error")
+
+    current = SyncLock("steam")
+    assert current.acquire()
+    statuses = []
+    waiter = threading.Thread(target=lambda: statuses.append(SyncLock("steam").wait()))
+    waiter.start()
+    time.sleep(0.2)
+    current.release("ok")
+    waiter.join()
+    assert statuses == ["ok"]
+
+
+def test_run_exclusive_waits_for_held_locks_and_releases_in_reverse(monkeypatch):
+    released = []
+    release = SyncLock.release
+
+    def record_release(self, status):
+        released.append(os.path.basename(self.lock_path))
+        release(self, status)
+
+    monkeypatch.setattr(synclock.SyncLock, "release", record_release)
+
+    held = SyncLock("non_steam")
+    assert held.acquire()
+    order = []
+
+    def commit():
+        order.append("commit")
+        assert SyncLock("steam").read_owner() is not None
+        assert SyncLock("non_steam").read_owner()["run_id"] != held.run_id
+        return "ok"
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(run_exclusive(["steam", "non_steam"], commit)))
+    thread.start()
+    # A primeira trava é obtida enquanto a segunda ainda é aguardada
+    wait_for(lambda: SyncLock("steam").read_owner() is not None)
+    time.sleep(0.3)
+    assert order == []
+    order.append("release")
+    held.release("ok")
+    thread.join()
+
+    assert order == ["release", "commit"]
+    assert results == ["ok"]
+    assert released[1:] == ["_sync_non_steam.lock", "_sync_steam.lock"]
+    assert SyncLock("steam").acquire() and SyncLock("non_steam").acquire()
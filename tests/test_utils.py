@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+
+import pytest
+
+from resources import utils
+from resources.utils import (CATALOG_VERSIONS_FILE, get_catalog_hash, iter_json_array_items, load_catalog_versions,
+                             save_catalogs, write_file_atomic)
+
+GAMES = [
+    {"appid": 10, "name": "Counter-Strike", "playtime_forever": 120},
+    {"appid": 20, "name": "Pokémon ™ \"Edição\" [1]", "playtime_forever": 0},
+    {"appid": 30, "name": "日本語のゲーム", "tags": {"0": "RPG", "1": "Ação"}},
+]
+PAYLOAD = json.dumps({"response": {"game_count": 3, "games": GAMES}}, ensure_ascii=False).encode('utf-8')
+
+
+def split_at(data, *positions):
+    positions = [0, *positions, len(data)]
+    return [data[start:end] for start, end in zip(positions, positions[1:])]
+
+
+def test_items_in_one_chunk():
+    assert list(iter_json_array_items([PAYLOAD], "games")) == GAMES
+
+
+@pytest.mark.parametrize("position", range(1, len(PAYLOAD)))
+def test_items_split_at_every_byte(position):
+    # Inclui cortes no meio da chave, de strings, de escapes e de caracteres UTF-8
+    assert list(iter_json_array_items(split_at(PAYLOAD, position), "games")) == GAMES
+
+
+def test_items_one_byte_per_chunk():
+    assert list(iter_json_array_items([bytes([b]) for b in PAYLOAD], "games")) == GAMES
+
+
+def test_prefix_callback_sees_fields_before_array():
+    prefixes = []
+    list(iter_json_array_items(split_at(PAYLOAD, 10, 30), "games", prefixes.append))
+    assert len(prefixes) == 1
+    assert '"game_count": 3' in prefixes[0]
+
+
+def test_empty_array():
+    assert list(iter_json_array_items([b'{"response": {"games": [', b' ]}}'], "games")) == []
+
+
+def test_missing_key():
+    with pytest.raises(ValueError):
+        list(iter_json_array_items([b'{"response": {}}'], "games"))
+
+
+def test_unterminated_array():
+    with pytest.raises(ValueError):
+        list(iter_json_array_items([PAYLOAD[:PAYLOAD.rindex(b']')]], "games"))
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    path = tmp_path / "catalogos"
+    path.mkdir()
+    return path
+
+
+def listing(path):
+    return sorted(os.listdir(path))
+
+
+def test_write_file_atomic_replaces_content(catalog_dir):
+    file_path = str(catalog_dir / "dados.json")
+    write_file_atomic(file_path, b"antigo")
+    write_file_atomic(file_path, b"novo")
+    with open(file_path, 'rb') as f:
+        assert f.read() == b"novo"
+    assert "dados.json" in listing(catalog_dir)
+    assert not [name for name in listing(catalog_dir) if name.endswith('.tmp')]
+
+
+def test_write_file_atomic_keeps_old_content_on_failure(catalog_dir, monkeypatch):
+    file_path = str(catalog_dir / "dados.json")
+    write_file_atomic(file_path, b"antigo")
+
+    def fail(src, dst):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(utils.os, "replace", fail)
+    with pytest.raises(OSError):
+        write_file_atomic(file_path, b"novo")
+    monkeypatch.undo()
+    with open(file_path, 'rb') as f:
+        assert f.read() == b"antigo"
+    assert not [name for name in listing(catalog_dir) if name.endswith('.tmp')]
+
+
+def test_save_catalogs_skips_unchanged_content(catalog_dir):
+    path = str(catalog_dir)
+    catalogs = {"steam_games.json": [{"appid": 10}], "non_steam_games.json": [{"appid": 20}]}
+    written = save_catalogs(path, catalogs)
+    assert all(written.values())
+    versions = load_catalog_versions(path)
+    assert {entry["version"] for entry in versions.values()} == {1}
+    mtime = os.stat(catalog_dir / "steam_games.json").st_mtime_ns
+
+    assert save_catalogs(path, catalogs) == {"steam_games.json": 0, "non_steam_games.json": 0}
+    assert os.stat(catalog_dir / "steam_games.json").st_mtime_ns == mtime
+    assert load_catalog_versions(path) == versions
+
+    written = save_catalogs(path, {**catalogs, "steam_games.json": [{"appid": 11}]})
+    assert written["steam_games.json"] and not written["non_steam_games.json"]
+    versions = load_catalog_versions(path)
+    assert versions["steam_games.json"]["version"] == 2
+    assert versions["non_steam_games.json"]["version"] == 1
+    with open(catalog_dir / "steam_games.json", encoding='utf-8') as f:
+        assert json.load(f) == [{"appid": 11}]
+    assert not [name for name in listing(catalog_dir) if name.endswith('.tmp')]
+
+
+def test_save_catalogs_moves_nothing_if_a_write_fails(catalog_dir, monkeypatch):
+    path = str(catalog_dir)
+    save_catalogs(path, {"a.json": [1], "b.json": [2]})
+    write_temp_file = utils.write_temp_file
+    calls = []
+
+    def fail_second(file_path, data):
+        calls.append(file_path)
+        if len(calls) == 2:
+            raise OSError("disco cheio")
+        return write_temp_file(file_path, data)
+
+    monkeypatch.setattr(utils, "write_temp_file", fail_second)
+    with pytest.raises(OSError):
+        save_catalogs(path, {"a.json": [10], "b.json": [20]})
+    monkeypatch.undo()
+
+    with open(catalog_dir / "a.json", encoding='utf-8') as f:
+        assert json.load(f) == [1]
+    assert load_catalog_versions(path)["a.json"]["version"] == 1
+    assert listing(catalog_dir) == sorted([CATALOG_VERSIONS_FILE, "a.json", "b.json"])
+
+
+def test_save_catalogs_restores_a_lost_version_file(catalog_dir):
+    path = str(catalog_dir)
+    save_catalogs(path, {"a.json": [1]})
+    os.remove(catalog_dir / CATALOG_VERSIONS_FILE)
+
+    assert save_catalogs(path, {"a.json": [1]}) == {"a.json": 0}
+    assert load_catalog_versions(path)["a.json"]["hash"] == hashlib.sha1(b"[1]").hexdigest()
+
+
+def test_catalog_hash_trusts_the_recorded_hash(catalog_dir, monkeypatch):
+    path = str(catalog_dir)
+    save_catalogs(path, {"a.json": [1]})
+    recorded = load_catalog_versions(path)["a.json"]["hash"]
+
+    def no_hashing(*args):
+        raise AssertionError("o arquivo não deveria ser lido")
+
+    monkeypatch.setattr(utils.hashlib, "sha1", no_hashing)
+    assert get_catalog_hash(path, "a.json") == recorded
+    assert get_catalog_hash(path, "b.json") is None
+
+
+def test_catalog_hash_rehashes_a_changed_file(catalog_dir):
+    path = str(catalog_dir)
+    save_catalogs(path, {"a.json": [1]})
+    file_path = catalog_dir / "a.json"
+
+    # Mesmo tamanho, mtime diferente
+    file_path.write_bytes(b"[2]")
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert get_catalog_hash(path, "a.json") == hashlib.sha1(b"[2]").hexdigest()
+
+    # Tamanho diferente
+    file_path.write_bytes(b"[1, 2]")
+    assert get_catalog_hash(path, "a.json") == hashlib.sha1(b"[1, 2]").hexdigest()
+
+    os.remove(catalog_dir / CATALOG_VERSIONS_FILE)
+    assert get_catalog_hash(path, "a.json") == hashlib.sha1(b"[1, 2]").hexdigest()
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Benchmark ponta a ponta sobre bibliotecas sintéticas (ver tools/synthlib.py).
+#
+# Exemplos:
+#   python tools/bench.py --sizes 100,1000 --output bench_1.0.0.json
+#   python tools/bench.py --sizes 100,1000 --compare bench_1.0.0.json
+#
+# As pausas artificiais (time.sleep) dos laços de sincronização são desativadas durante as
+# medições, a menos que --keep-sleeps seja usado.
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import headless
+import synthlib
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+
+ROUTES = {
+    'show_games_by_tags': '',
+    'show_all_games': '?action=list_all_games',
+    'show_games_by_tag': '?action=list_games_by_tag&tag=RPG',
+    'show_games_by_tag_uncategorized': '?action=list_games_by_tag&tag=uncategorized',
+}
+
+
+def addon_version():
+    return ET.parse(os.path.join(headless.ADDON_DIR, 'addon.xml')).getroot().get('version')
+
+
+@contextlib.contextmanager
+def no_sleep(enabled=True):
+    original = time.sleep
+    if enabled:
+        time.sleep = lambda seconds: None
+    try:
+        yield
+    finally:
+        time.sleep = original
+
+
+def timed(func, *args, repeat=1):
+    """
+    Executa a função `repeat` vezes e retorna (menor tempo em segundos, último resultado).
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(func, *args):
+    """
+    Retorna o pico de memória alocada (em KB) durante func(*args), mantendo o resultado vivo
+    até o fim da medição como o código real faria.
+    """
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak / 1024
+
+
+def bench_owned_games_memory(steam_api):
+    """
+    Compara o pico de memória da leitura em streaming do GetOwnedGames com a leitura
+    completa via response.json() usada anteriormente.
+    """
+    import requests
+    from resources.metrics import SyncMetrics
+
+    params = {'steamid': steam_api.steam_user_id, 'key': steam_api.steam_api_key,
+              'format': 'json', 'include_appinfo': 'true'}
+
+    def legacy():
+        return requests.get(steam_api.api_url_owned_games, params=params).json()['response']['games']
+
+    def streaming():
+        return [game for game, _ in steam_api.iter_owned_games(params, SyncMetrics("steam"))]
+
+    return peak_memory(legacy), peak_memory(streaming)
+
+
+def bench_size(workdir, size, repeat, keep_sleeps):
+    dest = os.path.join(workdir, str(size))
+    start = time.perf_counter()
+    settings = synthlib.generate(dest, size)
+    generate_time = time.perf_counter() - start
+
+    headless.setup(os.path.join(dest, 'userdata'), os.path.join(dest, 'settings.json'))
+    server, api_url = synthlib.serve_owned_games(dest)
+
+    from resources.steam import SteamAPI, GameSaver
+    from resources.nonsteam import NonSteam
+
+    results = {}
+    try:
+        with no_sleep(not keep_sleeps):
+            steam_api = SteamAPI(settings['steam_user_id'], settings['steam_api_key'])
+            steam_api.api_url_owned_games = api_url
+            results['get_owned_games'], games = timed(steam_api.get_owned_games)
+            results['owned_games_legacy_peak_kb'], results['owned_games_streaming_peak_kb'] = \
+                bench_owned_games_memory(steam_api)
+            results['save_games'], _ = timed(GameSaver().save_games, games, repeat=repeat)
+            results['sync_non_steam_games'], _ = timed(NonSteam().sync_non_steam_games, repeat=repeat)
+            results['parse_shortcuts'], _ = timed(NonSteam.parse_shortcuts, settings['shortcuts_vdf'], repeat=repeat)
+
+            # Cada rota é medida sem o cache de listagens (comparável às medições anteriores a
+            # ele) e, à parte, com o cache já gravado pela execução anterior
+            from resources.routecache import invalidate_route_cache
+            for name, route in ROUTES.items():
+                cold = warm = None
+                for _ in range(repeat):
+                    invalidate_route_cache()
+                    elapsed, items, calls = headless.run_route(route)
+                    cold = elapsed if cold is None else min(cold, elapsed)
+                    elapsed, _, _ = headless.run_route(route)
+                    warm = elapsed if warm is None else min(warm, elapsed)
+                results[name] = cold
+                results[f'{name}_warm'] = warm
+                results[f'{name}_items'] = len(items)
+    finally:
+        server.shutdown()
+
+    results['generate'] = generate_time
+    return results
+
+
+def print_results(all_results, previous=None):
+    for size, results in all_results.items():
+        print(f'== {size} jogos ==')
+        for name, value in results.items():
+            if name.endswith('_items'):
+                continue
+            scale, unit = (1, 'KB') if name.endswith('_kb') else (1000, 'ms')
+            line = f'  {name:35} {value * scale:10.1f} {unit}'
+            old = (previous or {}).get(size, {}).get(name)
+            if old:
+                line += f'   ({value / old:5.2f}x vs {old * scale:.1f} {unit})'
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark ponta a ponta do Steam Games.')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Tamanhos de biblioteca separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por medição (vale o menor tempo)')
+    parser.add_argument('--workdir', help='Diretório para as bibliotecas geradas (padrão: temporário)')
+    parser.add_argument('--output', help='Arquivo JSON para salvar os resultados')
+    parser.add_argument('--compare', help='Arquivo JSON de uma execução anterior para comparação')
+    parser.add_argument('--keep-sleeps', action='store_true', help='Mantém as pausas artificiais das sincronizações')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    workdir = args.workdir or tempfile.mkdtemp(prefix='steamgames-bench-')
+
+    all_results = {}
+    try:
+        for size in sizes:
+            all_results[str(size)] = bench_size(workdir, size, args.repeat, args.keep_sleeps)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('results')
+    print_results(all_results, previous)
+
+    if args.output:
+        report = {
+            'version': addon_version(),
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'repeat': args.repeat,
+            'results': all_results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
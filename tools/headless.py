@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Executa uma rota do plugin fora do Kodi, usando os módulos de tools/kodistubs.
+#
+# Exemplos:
+#   python tools/headless.py "?action=list_all_games" --settings settings.json --userdata /tmp/kodi
+#   python tools/headless.py "?action=list_games_by_tag&tag=RPG" --set steam_grid=/tmp/grid --json
+
+import argparse
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(TOOLS_DIR)
+ADDON_ID = 'plugin.program.steamgames'
+
+sys.path.insert(0, os.path.join(TOOLS_DIR, 'kodistubs'))
+sys.path.insert(0, ADDON_DIR)
+
+import _kodi_stats  # noqa: E402
+
+
+def load_default_settings():
+    """
+    Lê os valores padrão de resources/settings.xml.
+    """
+    tree = ET.parse(os.path.join(ADDON_DIR, 'resources', 'settings.xml'))
+    return {node.get('id'): node.get('default', '') for node in tree.iter('setting') if node.get('id')}
+
+
+def setup(userdata, settings_file=None, overrides=(), verbose=False, yes=False):
+    """
+    Prepara o ambiente dos módulos Kodi de substituição.
+    """
+    _kodi_stats.state['userdata'] = os.path.abspath(userdata)
+    _kodi_stats.state['home'] = os.path.join(os.path.abspath(userdata), '..')
+    _kodi_stats.state['addon_path'] = ADDON_DIR
+    _kodi_stats.state['verbose'] = verbose
+    _kodi_stats.state['dialog_yesno'] = yes
+
+    _kodi_stats.settings.clear()
+    _kodi_stats.settings.update(load_default_settings())
+    if settings_file:
+        with open(settings_file, 'r', encoding='utf-8') as f:
+            _kodi_stats.settings.update(json.load(f))
+    for override in overrides:
+        key, _, value = override.partition('=')
+        _kodi_stats.settings[key] = value
+
+    os.makedirs(os.path.join(userdata, 'addon_data', ADDON_ID), exist_ok=True)
+    _kodi_stats.install_fs_counters()
+
+
+def run_route(route, handle=1):
+    """
+    Executa Main().run_plugin() para a rota informada e retorna
+    (tempo em segundos, itens do diretório, contadores de chamadas).
+    """
+    import resources.main as main
+
+    if not route.startswith('?') and '?' in route:
+        route = route[route.index('?'):]
+    argv = [f'plugin://{ADDON_ID}/', str(handle), route]
+    _kodi_stats.reset()
+
+    old_argv = sys.argv
+    sys.argv = argv
+    start = time.perf_counter()
+    try:
+        main.Main().run_plugin(argv)
+    except SystemExit:
+        pass
+    finally:
+        elapsed = time.perf_counter() - start
+        sys.argv = old_argv
+
+    return elapsed, list(_kodi_stats.directory), dict(_kodi_stats.calls)
+
+
+def print_report(route, elapsed, items, calls, as_json=False):
+    if as_json:
+        print(json.dumps({'route': route, 'wall_time': elapsed, 'items': items, 'calls': calls},
+                         ensure_ascii=False, indent=2))
+        return
+
+    for item in items:
+        kind = 'D' if item['isFolder'] else 'F'
+        print(f"[{kind}] {item['label']}  ->  {item['url']}")
+    print()
+    print(f'Rota: {route}')
+    print(f'Itens: {len(items)}')
+    print(f'Tempo total: {elapsed * 1000:.1f} ms')
+    print('Chamadas:')
+    for name, total in sorted(calls.items()):
+        print(f'  {name:45} {total}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Executa uma rota do Steam Games fora do Kodi.')
+    parser.add_argument('route', nargs='?', default='', help='Query da rota, por exemplo "?action=list_all_games"')
+    parser.add_argument('--userdata', default=os.path.join(TOOLS_DIR, '.userdata'),
+                        help='Diretório usado como special://userdata/')
+    parser.add_argument('--settings', help='Arquivo JSON com as configurações do addon')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='Sobrescreve uma configuração')
+    parser.add_argument('--yes', action='store_true', help='Responde "sim" aos diálogos yes/no')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+    parser.add_argument('--verbose', action='store_true', help='Mostra log e diálogos no stderr')
+    args = parser.parse_args(argv)
+
+    setup(args.userdata, args.settings, args.set, args.verbose, args.yes)
+    elapsed, items, calls = run_route(args.route)
+    print_report(args.route, elapsed, items, calls, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Contadores compartilhados pelos módulos Kodi de substituição
+
+import collections
+import os
+
+calls = collections.Counter()
+settings = {}
+directory = []
+state = {'userdata': '', 'home': '', 'dialog_yesno': False}
+
+
+def count(name):
+    calls[name] += 1
+
+
+def reset():
+    calls.clear()
+    del directory[:]
+
+
+def install_fs_counters():
+    """
+    Conta os acessos ao sistema de arquivos. os.path.exists/isdir/isfile usam os.stat,
+    então contar os.stat cobre também essas chamadas.
+    """
+    if getattr(os, '_kodistubs_patched', False):
+        return
+    for name in ('stat', 'lstat', 'scandir', 'listdir'):
+        original = getattr(os, name)
+
+        def wrapper(*args, _original=original, _name=name, **kwargs):
+            calls[f'os.{_name}'] += 1
+            return _original(*args, **kwargs)
+
+        setattr(os, name, wrapper)
+    os._kodistubs_patched = True
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Substituto do módulo xbmc para execução fora do Kodi
+
+import sys
+import time
+
+from _kodi_stats import count, state
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGWARNING = 2
+LOGERROR = 3
+LOGFATAL = 4
+LOGNONE = 5
+
+
+def log(msg, level=LOGDEBUG):
+    count('xbmc.log')
+    if state.get('verbose'):
+        sys.stderr.write(f'[kodi] {msg}\n')
+
+
+def executebuiltin(function, wait=False):
+    count('xbmc.executebuiltin')
+    log(f'executebuiltin({function})', LOGINFO)
+
+
+def sleep(ms):
+    count('xbmc.sleep')
+    time.sleep(ms / 1000.0)
+
+
+def getCondVisibility(condition):
+    count('xbmc.getCondVisibility')
+    return False
+
+
+def getInfoLabel(label):
+    count('xbmc.getInfoLabel')
+    return ''
+
+
+class Monitor:
+    def abortRequested(self):
+        return False
+
+    def waitForAbort(self, timeout=0):
+        time.sleep(timeout)
+        return False
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Substituto do módulo xbmcaddon para execução fora do Kodi
+
+from _kodi_stats import count, settings, state
+
+
+class Addon:
+    def __init__(self, id=None):
+        self.id = id or 'plugin.program.steamgames'
+
+    def getSetting(self, key):
+        count('xbmcaddon.getSetting')
+        return str(settings.get(key, ''))
+
+    def setSetting(self, key, value):
+        count('xbmcaddon.setSetting')
+        settings[key] = value
+
+    def getSettingBool(self, key):
+        count('xbmcaddon.getSetting')
+        return str(settings.get(key, '')).lower() == 'true'
+
+    def getSettingInt(self, key):
+        count('xbmcaddon.getSetting')
+        try:
+            return int(settings.get(key, 0))
+        except ValueError:
+            return 0
+
+    def getAddonInfo(self, key):
+        count('xbmcaddon.getAddonInfo')
+        if key == 'path':
+            return state['addon_path']
+        if key == 'id':
+            return self.id
+        if key == 'profile':
+            return f'special://userdata/addon_data/{self.id}/'
+        return ''
+
+    def getLocalizedString(self, string_id):
+        return str(string_id)
+
+    def openSettings(self):
+        count('xbmcaddon.openSettings')
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Substituto do módulo xbmcgui para execução fora do Kodi
+
+import sys
+
+from _kodi_stats import count, state
+
+NOTIFICATION_INFO = 'info'
+NOTIFICATION_WARNING = 'warning'
+NOTIFICATION_ERROR = 'error'
+INPUT_ALPHANUM = 0
+
+
+def _echo(kind, *text):
+    if state.get('verbose'):
+        sys.stderr.write(f'[{kind}] {" | ".join(str(t) for t in text)}\n')
+
+
+class ListItem:
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        count('xbmcgui.ListItem')
+        self.label = label
+        self.label2 = label2
+        self.path = path
+        self.art = {}
+        self.info = {}
+        self.properties = {}
+        self.context_menu = []
+
+    def getLabel(self):
+        return self.label
+
+    def setLabel(self, label):
+        self.label = label
+
+    def setArt(self, values):
+        count('xbmcgui.ListItem.setArt')
+        self.art.update(values)
+
+    def setInfo(self, type, infoLabels):
+        count('xbmcgui.ListItem.setInfo')
+        self.info.update(infoLabels)
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+    def addContextMenuItems(self, items, replaceItems=False):
+        count('xbmcgui.ListItem.addContextMenuItems')
+        self.context_menu.extend(items)
+
+
+class Dialog:
+    def ok(self, heading, message):
+        count('xbmcgui.Dialog.ok')
+        _echo('ok', heading, message)
+        return True
+
+    def yesno(self, heading, message, nolabel='', yeslabel='', autoclose=0):
+        count('xbmcgui.Dialog.yesno')
+        _echo('yesno', heading, message)
+        return state.get('dialog_yesno', False)
+
+    def notification(self, heading, message, icon=NOTIFICATION_INFO, time=5000, sound=True):
+        count('xbmcgui.Dialog.notification')
+        _echo('notification', heading, message)
+
+    def select(self, heading, list, autoclose=0, preselect=-1, useDetails=False):
+        count('xbmcgui.Dialog.select')
+        return -1
+
+    def multiselect(self, heading, options, autoclose=0, preselect=None, useDetails=False):
+        count('xbmcgui.Dialog.multiselect')
+        return None
+
+    def input(self, heading, defaultt='', type=INPUT_ALPHANUM, option=0, autoclose=0):
+        count('xbmcgui.Dialog.input')
+        return ''
+
+    def browse(self, type, heading, shares, mask='', useThumbs=False, treatAsFolder=False, defaultt='', enableMultiple=False):
+        count('xbmcgui.Dialog.browse')
+        return defaultt
+
+
+class DialogProgress:
+    def create(self, heading, message=''):
+        count('xbmcgui.DialogProgress.create')
+        _echo('progress', heading, message)
+
+    def update(self, percent, message=''):
+        count('xbmcgui.DialogProgress.update')
+
+    def iscanceled(self):
+        count('xbmcgui.DialogProgress.iscanceled')
+        return False
+
+    def close(self):
+        count('xbmcgui.DialogProgress.close')
+
+
+class DialogProgressBG(DialogProgress):
+    def isFinished(self):
+        return False
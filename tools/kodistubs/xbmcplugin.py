@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Substituto do módulo xbmcplugin para execução fora do Kodi
+
+from _kodi_stats import count, directory
+
+SORT_METHOD_NONE = 0
+SORT_METHOD_LABEL = 1
+
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    count('xbmcplugin.addDirectoryItem')
+    directory.append({
+        'label': listitem.getLabel(),
+        'url': url,
+        'isFolder': isFolder,
+        'art': listitem.art,
+        'info': listitem.info,
+    })
+    return True
+
+
+def addDirectoryItems(handle, items, totalItems=0):
+    for url, listitem, is_folder in items:
+        addDirectoryItem(handle, url, listitem, is_folder)
+    return True
+
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    count('xbmcplugin.endOfDirectory')
+
+
+def setContent(handle, content):
+    count('xbmcplugin.setContent')
+
+
+def addSortMethod(handle, sortMethod, label2Mask=''):
+    count('xbmcplugin.addSortMethod')
+
+
+def setResolvedUrl(handle, succeeded, listitem):
+    count('xbmcplugin.setResolvedUrl')
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Substituto do módulo xbmcvfs para execução fora do Kodi
+
+import os
+import shutil
+
+from _kodi_stats import count, state
+
+
+def translatePath(path):
+    count('xbmcvfs.translatePath')
+    if not path:
+        return path
+    if path.startswith('special://userdata/'):
+        return os.path.join(state['userdata'], path[len('special://userdata/'):])
+    if path.startswith('special://home/'):
+        return os.path.join(state['home'], path[len('special://home/'):])
+    return path
+
+
+def exists(path):
+    count('xbmcvfs.exists')
+    return os.path.exists(translatePath(path))
+
+
+def mkdir(path):
+    count('xbmcvfs.mkdir')
+    os.mkdir(translatePath(path))
+    return True
+
+
+def mkdirs(path):
+    count('xbmcvfs.mkdirs')
+    os.makedirs(translatePath(path), exist_ok=True)
+    return True
+
+
+def delete(path):
+    count('xbmcvfs.delete')
+    try:
+        os.remove(translatePath(path))
+        return True
+    except OSError:
+        return False
+
+
+def copy(source, destination):
+    count('xbmcvfs.copy')
+    shutil.copy(translatePath(source), translatePath(destination))
+    return True
+
+
+def listdir(path):
+    count('xbmcvfs.listdir')
+    path = translatePath(path)
+    dirs, files = [], []
+    for entry in os.scandir(path):
+        (dirs if entry.is_dir() else files).append(entry.name)
+    return dirs, files
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# Gera uma biblioteca Steam sintética para testes de desempenho.
+#
+# Estrutura gerada em <destino>:
+#   steam/appcache/librarycache/   imagens no padrão {appid}_header.jpg, _library_600x900.jpg...
+#   steam/userdata/<id>/config/grid/   imagens customizadas {id}p.png, {id}_hero.jpg...
+#   steam/userdata/<id>/config/shortcuts.vdf   atalhos Non-Steam em VDF binário
+#   nfo/        arquivos {nome}.nfo
+#   urls/       atalhos {nome}.url
+#   owned_games.json   resposta do GetOwnedGames
+#   settings.json      configurações do addon apontando para os caminhos acima
+
+import argparse
+import http.server
+import json
+import os
+import random
+import struct
+import threading
+import zlib
+
+USER_ID = '12345678'
+
+LIBRARY_CACHE_FILES = [
+    ('header', '{}_header.jpg', 0.95),
+    ('capsule', '{}_library_600x900.jpg', 0.85),
+    ('hero', '{}_library_hero.jpg', 0.8),
+    ('logo', '{}_logo.png', 0.75),
+    ('icon', '{}_icon.jpg', 0.6),
+]
+
+GRID_FILES = [
+    ('{}p', 0.4),
+    ('{}_hero', 0.3),
+    ('{}_logo', 0.25),
+    ('{}', 0.3),
+]
+
+GRID_EXTENSIONS = ['.jpg', '.png', '.jpg', '.png', '.jpeg', '.gif']
+
+TAGS = ['RPG', 'Ação', 'Aventura', 'Estratégia', 'Corrida', 'Indie', 'Favoritos', 'Emuladores']
+
+# Dimensões de cada tipo de arte, pelo sufixo do nome do arquivo
+ART_SIZES = [
+    ('_library_600x900', (600, 900)),
+    ('_library_hero', (3840, 1240)),
+    ('_hero', (3840, 1240)),
+    ('_header', (460, 215)),
+    ('_logo', (640, 360)),
+    ('_icon', (32, 32)),
+    ('p', (600, 900)),
+]
+BROKEN_IMAGE_RATIO = 0.02
+
+
+def vdf_dict(values):
+    """
+    Serializa um dicionário no formato VDF binário lido por NonSteam._read_dict.
+    """
+    out = []
+    for key, value in values.items():
+        name = key.encode('utf-8') + b'\x00'
+        if isinstance(value, dict):
+            out.append(b'\x00' + name + vdf_dict(value))
+        elif isinstance(value, str):
+            out.append(b'\x01' + name + value.encode('utf-8') + b'\x00')
+        else:
+            out.append(b'\x02' + name + struct.pack('<I', value))
+    out.append(b'\x08')
+    return b''.join(out)
+
+
+def image_stub(path):
+    """
+    Menor imagem válida para quem lê só o cabeçalho (e os bytes finais): JPEG com SOF0,
+    PNG com IHDR/IEND ou GIF, com as dimensões do tipo de arte.
+    """
+    base, ext = os.path.splitext(os.path.basename(path))
+    width, height = next((size for suffix, size in ART_SIZES if base.endswith(suffix)), (460, 215))
+    if ext == '.png':
+        ihdr = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+        return (b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+                + struct.pack('>I', 0) + b'IEND' + struct.pack('>I', zlib.crc32(b'IEND')))
+    if ext == '.gif':
+        return b'GIF89a' + struct.pack('<HH', width, height) + b'\x00\x00\x00' + b'\x00' * 16 + b'\x3b'
+    return (bytes.fromhex('ffd8ffe000104a46494600010100000100010000')
+            + b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00' + b'\xff\xd9')
+
+
+def touch_image(path, rng=None):
+    with open(path, 'wb') as f:
+        # Uma pequena parte das imagens sai vazia, como downloads interrompidos
+        if rng is None or rng.random() >= BROKEN_IMAGE_RATIO:
+            f.write(image_stub(path))
+
+
+def write_nfo(path, name, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            '<game>\n'
+            f'  <title>{name}</title>\n'
+            f'  <year>{rng.randint(1995, 2025)}</year>\n'
+            f'  <genre>{rng.choice(TAGS)}</genre>\n'
+            '  <developer>Synthetic</developer>\n'
+            '  <plot>Jogo gerado para testes de desempenho.</plot>\n'
+            '</game>\n')
+
+
+def generate(dest, count, seed=0, nfo_ratio=0.5, url_ratio=0.5):
+    """
+    Gera `count` jogos Steam e `count` atalhos Non-Steam em `dest`.
+    Retorna o dicionário de configurações do addon para a biblioteca gerada.
+    """
+    rng = random.Random(seed)
+    steam_dir = os.path.join(dest, 'steam')
+    library_cache = os.path.join(steam_dir, 'appcache', 'librarycache')
+    config_dir = os.path.join(steam_dir, 'userdata', USER_ID, 'config')
+    grid_dir = os.path.join(config_dir, 'grid')
+    nfo_dir = os.path.join(dest, 'nfo')
+    url_dir = os.path.join(dest, 'urls')
+    for path in (library_cache, grid_dir, nfo_dir, url_dir):
+        os.makedirs(path, exist_ok=True)
+
+    # Jogos Steam
+    games = []
+    for i in range(count):
+        appid = 10 + i * 10
+        name = f'Steam Game {i:06d}'
+        games.append({
+            'appid': appid,
+            'name': name,
+            'playtime_forever': rng.randint(0, 20000),
+            'img_icon_url': f'{rng.getrandbits(160):040x}',
+            'has_community_visible_stats': True,
+            'playtime_windows_forever': rng.randint(0, 20000),
+            'playtime_mac_forever': 0,
+            'playtime_linux_forever': 0,
+            'playtime_deck_forever': 0,
+            'rtime_last_played': rng.randint(1400000000, 1750000000),
+            'playtime_disconnected': 0,
+        })
+        for _, pattern, ratio in LIBRARY_CACHE_FILES:
+            if rng.random() < ratio:
+                touch_image(os.path.join(library_cache, pattern.format(appid)), rng)
+        for pattern, ratio in GRID_FILES:
+            if rng.random() < ratio:
+                touch_image(os.path.join(grid_dir, pattern.format(appid) + rng.choice(GRID_EXTENSIONS)), rng)
+        if rng.random() < nfo_ratio:
+            write_nfo(os.path.join(nfo_dir, f'{name}.nfo'), name, rng)
+
+    with open(os.path.join(dest, 'owned_games.json'), 'w', encoding='utf-8') as f:
+        json.dump({'response': {'game_count': count, 'games': games}}, f)
+
+    # Atalhos Non-Steam
+    shortcuts = {}
+    for i in range(count):
+        name = f'Shortcut Game {i:06d}'
+        exe = f'"C:\\Games\\{name}\\game.exe"'
+        short_id = zlib.crc32((exe + name).encode('utf-8')) | 0x80000000
+        tags = {str(t): tag for t, tag in enumerate(rng.sample(TAGS, rng.randint(0, 3)))}
+        shortcuts[str(i)] = {
+            'appid': short_id,
+            'AppName': name,
+            'Exe': exe,
+            'StartDir': f'"C:\\Games\\{name}\\"',
+            'icon': '',
+            'ShortcutPath': '',
+            'LaunchOptions': '',
+            'IsHidden': 0,
+            'LastPlayTime': rng.randint(1400000000, 1750000000),
+            'tags': tags,
+        }
+        for pattern, ratio in GRID_FILES:
+            if rng.random() < ratio:
+                touch_image(os.path.join(grid_dir, pattern.format(short_id) + rng.choice(GRID_EXTENSIONS)), rng)
+        if rng.random() < url_ratio:
+            with open(os.path.join(url_dir, f'{name}.url'), 'w', encoding='utf-8') as f:
+                f.write(f'[InternetShortcut]\nURL=steam://rungameid/{(short_id << 32) | 0x02000000}\n')
+        if rng.random() < nfo_ratio:
+            write_nfo(os.path.join(nfo_dir, f'{name}.nfo'), name, rng)
+
+    shortcuts_vdf = os.path.join(config_dir, 'shortcuts.vdf')
+    with open(shortcuts_vdf, 'wb') as f:
+        f.write(vdf_dict({'shortcuts': shortcuts}) + b'\x08')
+
+    settings = {
+        'library_cache': library_cache,
+        'steam_grid': grid_dir,
+        'steam_user_id': USER_ID,
+        'steam_api_key': 'synthetic',
+        'shortcuts_vdf': shortcuts_vdf,
+        'shortcuts_path': config_dir,
+        'non-steam_url': url_dir,
+        'nfo_files': nfo_dir,
+    }
+    with open(os.path.join(dest, 'settings.json'), 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=2)
+    return settings
+
+
+def serve_owned_games(dest, port=0):
+    """
+    Serve owned_games.json localmente no caminho do GetOwnedGames.
+    Retorna (servidor, url da API).
+    """
+    payload_path = os.path.join(dest, 'owned_games.json')
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            with open(payload_path, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/IPlayerService/GetOwnedGames/v1/'
+    return server, url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera uma biblioteca Steam sintética.')
+    parser.add_argument('dest', help='Diretório de destino')
+    parser.add_argument('--count', type=int, default=1000, help='Quantidade de jogos Steam e de atalhos Non-Steam')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    settings = generate(args.dest, args.count, args.seed)
+    print(json.dumps(settings, indent=2))
+
+
+if __name__ == '__main__':
+    main()